@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ============================================================
+# ANALYSIS RESULT CACHE
+# ============================================================
+# Bounded LRU/TTL cache for analysis reports with pluggable
+# in-memory and Redis backends
+# ============================================================
+
+import copy
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, is_dataclass
+from typing import Any, Dict, Optional
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+DEFAULT_TTL_SECONDS = 15 * 60
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def _json_default(obj: Any) -> Any:
+    """Serialize numpy scalars, timestamps and other report values"""
+    if hasattr(obj, "item"):
+        return obj.item()
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    return str(obj)
+
+
+def config_fingerprint(config: Any) -> str:
+    """Short stable hash of the configuration that produced a report"""
+    if config is None:
+        return "default"
+    values = asdict(config) if is_dataclass(config) else dict(vars(config))
+    payload = json.dumps(values, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def make_cache_key(symbol: str, period: str, interval: str, config: Any = None) -> str:
+    """Build a cache key that distinguishes period, interval and config"""
+    return f"analysis:{symbol.upper()}:{period}:{interval}:{config_fingerprint(config)}"
+
+
+@dataclass
+class CacheStats:
+    """Cache hit/miss/eviction counters"""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    sets: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "hit_rate": self.hit_rate}
+
+
+class MemoryCacheBackend:
+    """In-process LRU cache with TTL expiry and entry/byte budgets
+
+    Values are copied in and out, so callers can annotate a report they
+    received without changing the cached one (as with Redis).
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value, expires_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str, stats: CacheStats) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                stats.expirations += 1
+                return None
+
+            self._entries.move_to_end(key)
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Dict[str, Any], ttl: int, stats: CacheStats):
+        size = len(json.dumps(value, default=_json_default))
+        if size > self.max_bytes:
+            return
+
+        value = copy.deepcopy(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (value, time.monotonic() + ttl, size)
+            self._bytes += size
+
+            # Drop expired entries first, then least recently used ones
+            if len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                now = time.monotonic()
+                for expired_key in [k for k, (_, exp, _) in self._entries.items() if exp <= now]:
+                    self._remove(expired_key)
+                    stats.expirations += 1
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                stats.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes
+        }
+
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+
+class RedisCacheBackend:
+    """Redis-backed cache; TTL and LRU eviction are delegated to the server"""
+
+    def __init__(self, url: str, namespace: str = "eos"):
+        if not REDIS_AVAILABLE:
+            raise ImportError("redis package is required for RedisCacheBackend")
+        self.client = redis.Redis.from_url(url)
+        self.namespace = namespace
+
+    def get(self, key: str, stats: CacheStats) -> Optional[Dict[str, Any]]:
+        payload = self.client.get(f"{self.namespace}:{key}")
+        return json.loads(payload) if payload is not None else None
+
+    def set(self, key: str, value: Dict[str, Any], ttl: int, stats: CacheStats):
+        self.client.setex(f"{self.namespace}:{key}", ttl, json.dumps(value, default=_json_default))
+
+    def delete(self, key: str):
+        self.client.delete(f"{self.namespace}:{key}")
+
+    def clear(self):
+        for key in self.client.scan_iter(f"{self.namespace}:analysis:*"):
+            self.client.delete(key)
+
+    def info(self) -> Dict[str, Any]:
+        memory = self.client.info("memory")
+        return {
+            "backend": "redis",
+            "used_memory": memory.get("used_memory", 0),
+            "maxmemory_policy": memory.get("maxmemory_policy", "unknown")
+        }
+
+
+class AnalysisCache:
+    """Analysis report cache with counters over a pluggable backend"""
+
+    def __init__(self, backend: Any = None, ttl: int = DEFAULT_TTL_SECONDS):
+        self.backend = backend or MemoryCacheBackend()
+        self.ttl = ttl
+        self.stats = CacheStats()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self.get_record(key)
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    def set(self, key: str, value: Dict[str, Any], ttl: Optional[int] = None):
+        if self.set_record(key, value, ttl):
+            self.stats.sets += 1
+
+    def get_record(self, key: str) -> Optional[Dict[str, Any]]:
+        """Read any record (e.g. a job's state) without counting it as a report lookup"""
+        try:
+            return self.backend.get(key, self.stats)
+        except Exception as e:
+            logger.warning("Cache read of %s failed: %s", key, e)
+            return None
+
+    def set_record(self, key: str, value: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        """Write any record without counting it as a cached report; False if the backend failed"""
+        try:
+            self.backend.set(key, value, ttl or self.ttl, self.stats)
+            return True
+        except Exception as e:
+            logger.warning("Cache write of %s failed: %s", key, e)
+            return False
+
+    def invalidate(self, key: str):
+        self.backend.delete(key)
+
+    def clear(self):
+        self.backend.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats.as_dict(), **self.backend.info()}
+
+
+def create_analysis_cache(config: Any = None) -> AnalysisCache:
+    """Create the result cache, preferring Redis when configured and reachable"""
+    ttl = getattr(config, "cache_ttl_seconds", DEFAULT_TTL_SECONDS)
+    redis_url = getattr(config, "redis_url", None) or os.environ.get("REDIS_URL")
+
+    if redis_url and REDIS_AVAILABLE:
+        try:
+            backend = RedisCacheBackend(redis_url)
+            backend.client.ping()
+            return AnalysisCache(backend, ttl=ttl)
+        except Exception as e:
+            logger.warning("Redis at %s unavailable, using the in-process cache: %s", redis_url, e)
+
+    backend = MemoryCacheBackend(
+        max_entries=getattr(config, "cache_max_entries", DEFAULT_MAX_ENTRIES),
+        max_bytes=getattr(config, "cache_max_bytes", DEFAULT_MAX_BYTES)
+    )
+    return AnalysisCache(backend, ttl=ttl)
+
+
+def cache_analysis_results(engine_cls: type) -> type:
+    """Answer analyze_symbol from the result cache, keyed by symbol, period, interval and config
+
+    A hit returns the cached report without running (or run-scoping) the
+    analysis; a miss runs it and stores the report under the same key.
+    """
+    analyze = engine_cls.__dict__.get("analyze_symbol")
+    if analyze is None or getattr(engine_cls, "_results_cached", False):
+        return engine_cls
+    signature = inspect.signature(analyze)
+
+    @functools.wraps(analyze)
+    async def analyze_symbol(self, *args, **kwargs):
+        call = signature.bind(self, *args, **kwargs)
+        call.apply_defaults()
+        symbol, period, interval = (call.arguments[name] for name in ("symbol", "period", "interval"))
+        cached = self._get_cached_result(symbol, period, interval)
+        if cached is not None:
+            return cached
+        report = await analyze(self, *args, **kwargs)
+        self._cache_results(symbol, report, period, interval)
+        return report
+
+    engine_cls.analyze_symbol = analyze_symbol
+    engine_cls._results_cached = True
+    return engine_cls
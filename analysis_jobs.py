@@ -0,0 +1,424 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ============================================================
+# ANALYSIS JOBS
+# ============================================================
+# Shared executor for dashboard analyses: one long-lived event
+# loop per process runs every job, the engine's analysis slots
+# bound how many analyses run at once (shared with batch runs on
+# other loops) and a pending limit turns overload into
+# an immediate "busy" answer instead of an unbounded backlog.
+# Identical in-flight requests share one run; each submission
+# still gets its own job id, scoped to the browser session that
+# made it. With Redis configured, job state is also published
+# there so any gunicorn worker can answer for any job. Finished
+# jobs are pushed to the browser over Server-Sent Events.
+# ============================================================
+
+import asyncio
+import collections
+import json
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_MAX_PENDING = 16
+DEFAULT_JOB_TTL_SECONDS = 600
+
+# Longest a single event stream is held open; the browser reconnects after it.
+# Every open stream occupies a gunicorn thread, so at most DEFAULT_MAX_STREAMS
+# of a worker's threads stream at once; further streams are told to retry
+STREAM_SECONDS = 15
+HEARTBEAT_SECONDS = 5
+SHARED_POLL_SECONDS = 0.5
+DEFAULT_MAX_STREAMS = 4
+BUSY_RETRY_MS = 3000
+
+FINISHED = ("done", "error")
+
+# HttpOnly cookie naming the browser session that owns a job (EventSource cannot send headers)
+SESSION_COOKIE = "eos_session"
+
+JobKey = Tuple[str, str, str, str]
+
+logger = logging.getLogger(__name__)
+
+
+class JobRejected(RuntimeError):
+    """Raised when the executor is at its pending limit"""
+
+
+class AnalysisSlots:
+    """Engine-wide limit on concurrent analyses, shared by coroutines on any event loop
+
+    asyncio.Semaphore binds to the loop that first waits on it; the job
+    executor's loop and the loops that drive analyze_batch must all draw
+    from one budget, so waiters park a future on their own loop and a
+    released slot is handed to the oldest waiter thread-safely.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(1, int(limit))
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiters: collections.deque = collections.deque()
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._active < self.limit and not self._waiters:
+                self._active += 1
+                return
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                queued = waiter in self._waiters
+                if queued:
+                    self._waiters.remove(waiter)
+            # Cancelled after the slot was handed over: give it back
+            # (a cancelled future is returned by _grant instead)
+            if not queued and waiter[1].done() and not waiter[1].cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            while self._waiters:
+                loop, future = self._waiters.popleft()
+                try:
+                    loop.call_soon_threadsafe(self._grant, future)
+                    return
+                except RuntimeError:
+                    continue  # waiter's loop is closed
+            self._active -= 1
+
+    def _grant(self, future: asyncio.Future):
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.release()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"active": self._active, "waiting": len(self._waiters), "limit": self.limit}
+
+
+def json_safe(value: Any) -> Any:
+    """``value`` with NumPy scalars/arrays as Python values and NaN/inf as None, ready for strict JSON"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {str(key): json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [json_safe(item) for item in value]
+    if hasattr(value, "dtype") and hasattr(value, "tolist"):
+        return json_safe(value.tolist())  # NumPy scalar or array
+    if hasattr(value, "isoformat"):
+        return None if value != value else value.isoformat()  # datetime, pd.Timestamp (NaT -> None)
+    return value
+
+
+def to_json(value: Any) -> str:
+    """Strict JSON (no NaN/Infinity) for browser consumption; other objects become strings"""
+    return json.dumps(json_safe(value), default=str, allow_nan=False)
+
+
+def job_key(symbol: str, period: str, interval: str, mode: str) -> JobKey:
+    """Requests with the same key produce the same report and are run once"""
+    return (symbol.strip().upper(), period, interval, mode or "full")
+
+
+class JobExecutor:
+    """Bounded analysis executor on a single background event loop"""
+
+    def __init__(self, engine: Any, config: Any = None, store: Any = None,
+                 present: Optional[Callable[[Dict[str, Any], Dict[str, str]], Any]] = None):
+        self.engine = engine
+        # present(report, request) is applied once to each finished report, off the
+        # event loop; its output is what pollers and streams receive
+        self.present = present
+        self.max_concurrent = max(1, int(getattr(config, "max_concurrent_analysis", 4)))
+        self.max_pending = max(self.max_concurrent, int(
+            getattr(config, "max_pending_jobs", None) or os.environ.get("MAX_PENDING_JOBS", DEFAULT_MAX_PENDING)))
+        self.ttl = int(getattr(config, "job_ttl_seconds", DEFAULT_JOB_TTL_SECONDS))
+        self.max_streams = max(1, int(
+            getattr(config, "max_job_streams", None) or os.environ.get("MAX_JOB_STREAMS", DEFAULT_MAX_STREAMS)))
+        self._streams = 0
+        if store is None:
+            from analysis_cache import RedisCacheBackend, create_analysis_cache
+            cache = create_analysis_cache(config)
+            store = cache if isinstance(cache.backend, RedisCacheBackend) else None
+        # Shared record store (Redis); None keeps job state in this process only
+        self.store = store
+
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # The engine's slots when it has them, so jobs and analyze_batch share one limit
+        self.slots = getattr(engine, "analysis_slots", None) or AnalysisSlots(self.max_concurrent)
+        self._pid: Optional[int] = None
+        self._runs: Dict[JobKey, Future] = {}
+        self._waiting: Dict[JobKey, List[str]] = {}
+        self._running: set = set()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+
+    # Event loop ----------------------------------------------------------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        # Threads do not survive fork: under gunicorn --preload each worker
+        # starts its own loop on first use
+        if self._loop is None or self._pid != os.getpid():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=self._run_loop, args=(loop,), name="analysis-jobs", daemon=True)
+            thread.start()
+            self._loop, self._pid = loop, os.getpid()
+            self._runs.clear()
+            self._waiting.clear()
+            self._running.clear()
+        return self._loop
+
+    @staticmethod
+    def _run_loop(loop: asyncio.AbstractEventLoop):
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+
+    async def _run(self, key: JobKey) -> Tuple[str, Any]:
+        """(status, presented result) of one analysis"""
+        symbol, period, interval, _ = key
+        async with self.slots:
+            self._mark_running(key)
+            try:
+                result = await self.engine.analyze_symbol(symbol, period, interval)
+                status = "error" if result.get("error") else "done"
+            except Exception as e:
+                result, status = self.engine._error_result(symbol, str(e)), "error"
+        if self.present is not None:
+            # Presented on a worker thread before delivery, so the loop keeps driving other analyses
+            request = dict(zip(("symbol", "period", "interval", "mode"), key))
+            result = await asyncio.get_running_loop().run_in_executor(None, self.present, result, request)
+        return status, result
+
+    # Submission ----------------------------------------------------------
+
+    def submit(self, session_id: str, symbol: str, period: str, interval: str, mode: str = "full") -> str:
+        """Queue an analysis for ``session_id`` and return its job id
+
+        Joins an identical in-flight run if there is one; raises JobRejected
+        when ``max_pending`` runs are already queued or running.
+        """
+        from instrumentation import metrics
+
+        key = job_key(symbol, period, interval, mode)
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            loop = self._ensure_loop()
+            run = self._runs.get(key)
+            if run is None:
+                if len(self._runs) >= self.max_pending:
+                    metrics.inc("analysis_jobs_total", result="rejected")
+                    raise JobRejected(f"{len(self._runs)} analyses already pending")
+                run = asyncio.run_coroutine_threadsafe(self._run(key), loop)
+                self._runs[key] = run
+                self._waiting[key] = []
+                metrics.inc("analysis_jobs_total", result="submitted")
+            else:
+                metrics.inc("analysis_jobs_total", result="deduplicated")
+            self._waiting[key].append(job_id)
+            self._jobs[job_id] = {"session": session_id, "symbol": key[0],
+                                  "status": "running" if key in self._running else "queued",
+                                  "submitted": time.time()}
+            metrics.set_gauge("analysis_jobs_in_flight", len(self._runs))
+        self._publish(job_id)
+        run.add_done_callback(lambda future, key=key: self._finish(key, future))
+        return job_id
+
+    def _finish(self, key: JobKey, future: Future):
+        from instrumentation import metrics
+
+        with self._lock:
+            if self._runs.get(key) is not future:
+                return
+            del self._runs[key]
+            self._running.discard(key)
+            job_ids = self._waiting.pop(key, [])
+            metrics.set_gauge("analysis_jobs_in_flight", len(self._runs))
+
+        try:
+            status, result = future.result()
+        except Exception as e:
+            # Presenting the report failed: the jobs must still end, as failed
+            logger.exception("Finishing analysis %s failed", key)
+            status, result = "error", {"symbol": key[0], "error": f"Analysis could not be delivered: {e}"}
+        metrics.inc("analysis_jobs_total", result=status)
+
+        with self._lock:
+            for job_id in job_ids:
+                if job_id in self._jobs:
+                    self._jobs[job_id].update(status=status, result=result, finished=time.time())
+            self._changed.notify_all()
+        for job_id in job_ids:
+            self._publish(job_id)
+        self._expire()
+
+    def _mark_running(self, key: JobKey):
+        with self._lock:
+            self._running.add(key)
+            job_ids = list(self._waiting.get(key, ()))
+            for job_id in job_ids:
+                self._jobs[job_id]["status"] = "running"
+            self._changed.notify_all()
+        for job_id in job_ids:
+            self._publish(job_id)
+
+    def _publish(self, job_id: str):
+        record = self._jobs.get(job_id)
+        if self.store is not None and record is not None:
+            try:
+                self.store.set_record(f"job:{job_id}", record, ttl=self.ttl)
+            except Exception as e:
+                # This worker still answers for the job; only other workers miss it
+                logger.warning("Publishing job %s failed: %s", job_id, e)
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            for job_id in [j for j, job in self._jobs.items() if job.get("finished", float("inf")) < cutoff]:
+                del self._jobs[job_id]
+
+    # Status --------------------------------------------------------------
+
+    def status(self, session_id: str, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job record (status, and result once finished) if ``job_id`` belongs to the session"""
+        if not job_id:
+            return None
+        record = self._jobs.get(job_id)
+        if record is None and self.store is not None:
+            # Submitted through another worker
+            record = self.store.get_record(f"job:{job_id}")
+        if record is None or record.get("session") != session_id:
+            return None
+        return record
+
+    def wait(self, session_id: str, job_id: str, known_status: Optional[str] = None,
+             timeout: float = HEARTBEAT_SECONDS) -> Optional[Dict[str, Any]]:
+        """Block until the job's status differs from ``known_status`` (or ``timeout``)"""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            local = job_id in self._jobs
+            if local:
+                self._changed.wait_for(
+                    lambda: self._jobs.get(job_id, {}).get("status") != known_status,
+                    timeout=timeout)
+        if local:
+            return self.status(session_id, job_id)
+
+        # Job runs in another worker: only the shared store can tell
+        record = self.status(session_id, job_id)
+        while record is not None and record["status"] == known_status and time.monotonic() < deadline:
+            time.sleep(SHARED_POLL_SECONDS)
+            record = self.status(session_id, job_id)
+        return record
+
+    def events(self, session_id: str, job_id: str, duration: float = STREAM_SECONDS) -> Iterator[str]:
+        """Server-Sent Events for one job: ``status`` changes, then ``result`` (or ``gone``)
+
+        With ``max_streams`` streams already open in this process the stream
+        only tells the browser to reconnect later, keeping threads free for
+        ordinary requests.
+        """
+        with self._lock:
+            busy = self._streams >= self.max_streams
+            if not busy:
+                self._streams += 1
+        if busy:
+            yield f"retry: {BUSY_RETRY_MS}\n\n"
+            return
+        try:
+            yield "retry: 1000\n\n"
+            yield from self._events(session_id, job_id, duration)
+        finally:
+            with self._lock:
+                self._streams -= 1
+
+    def _events(self, session_id: str, job_id: str, duration: float) -> Iterator[str]:
+        deadline = time.monotonic() + duration
+        status = None
+        while time.monotonic() < deadline:
+            record = self.wait(session_id, job_id, status, timeout=min(HEARTBEAT_SECONDS, deadline - time.monotonic()))
+            if record is None:
+                yield "event: gone\ndata: {}\n\n"
+                return
+            if record["status"] in FINISHED:
+                yield f"event: result\ndata: {to_json(record['result'])}\n\n"
+                return
+            if record["status"] != status:
+                status = record["status"]
+                yield f"event: status\ndata: {json.dumps({'status': status})}\n\n"
+            else:
+                yield ": keep-alive\n\n"
+        # Stream ends here; EventSource reconnects and resumes waiting
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight": len(self._runs),
+                "waiting_jobs": sum(len(jobs) for jobs in self._waiting.values()),
+                "max_concurrent": self.slots.limit,
+                "max_pending": self.max_pending,
+                "streams": self._streams,
+                "max_streams": self.max_streams
+            }
+
+
+def request_session() -> str:
+    """Session id of the current Flask request, from its session cookie
+
+    A request without the cookie gets a new id, which register_job_routes
+    sets as the cookie on the response.
+    """
+    from flask import g, request
+
+    session_id = request.cookies.get(SESSION_COOKIE) or g.get("new_session")
+    if not session_id:
+        session_id = g.new_session = uuid.uuid4().hex
+    return session_id
+
+
+def register_job_routes(server: Any, executor: JobExecutor):
+    """Expose /jobs/<job_id>/events (Server-Sent Events) on a Flask server
+
+    Jobs are scoped to the session cookie, which every response issues when
+    the browser does not have one yet; the session id never appears in a URL.
+    """
+    from flask import Response, g, request, stream_with_context
+
+    @server.after_request
+    def issue_session_cookie(response):
+        if SESSION_COOKIE not in request.cookies:
+            response.set_cookie(SESSION_COOKIE, request_session(), httponly=True, samesite="Lax",
+                                secure=request.is_secure)
+        return response
+
+    @server.route("/jobs/<job_id>/events")
+    def job_events(job_id):
+        response = Response(stream_with_context(executor.events(request_session(), job_id)),
+                            mimetype="text/event-stream")
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["X-Accel-Buffering"] = "no"  # keep reverse proxies from buffering the stream
+        return response
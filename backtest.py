@@ -0,0 +1,403 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ============================================================
+# WALK-FORWARD BACKTESTING
+# ============================================================
+# Replays the ontology inference chain (indicator signals ->
+# market state / trend / risk -> overall score -> recommendation)
+# over every bar of a stored OHLCV history. All indicators are
+# causal, so the recommendation at bar t only uses bars <= t and
+# the position taken on it is applied from bar t+1.
+# ============================================================
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from signal_classification import (
+    ADX_LABELS, CCI_LABELS, MACD_LABELS, RSI_LABELS, STOCHASTIC_LABELS,
+    classify_indicator_columns
+)
+
+MARKET_STATES = ("bull_trend", "bear_trend", "sideways_consolidation", "volatile_breakout", "range_bound")
+TREND_DIRECTIONS = ("neutral", "strong_up", "moderate_up", "strong_down", "moderate_down")
+RISK_LEVELS = ("very_low", "low", "medium", "high", "very_high")
+RECOMMENDATIONS = ("hold", "strong_buy", "buy", "strong_sell", "sell")
+
+# Risk score used in the overall score for each inferred risk level
+RISK_LEVEL_SCORES = np.array([0.1, 0.3, 0.5, 0.7, 0.9])
+
+# Volatility regime from ATR as a fraction of price
+HIGH_VOLATILITY_ATR_PCT = 0.03
+LOW_VOLATILITY_ATR_PCT = 0.015
+VOLATILITY_CONFIDENCE = 0.7
+
+# Same weights as _generate_comprehensive_report
+DEFAULT_WEIGHTS = {"ontology": 0.4, "ml": 0.3, "risk": 0.2, "pattern": 0.1}
+
+MOMENTUM_SIGNALS = ("RSI", "MACD", "STOCH", "MFI", "CCI")
+
+
+@dataclass
+class BacktestResult:
+    """Per-bar recommendations, trades, equity curve and summary statistics"""
+    symbol: str
+    signals: pd.DataFrame
+    trades: pd.DataFrame
+    equity: pd.Series
+    stats: Dict[str, Any] = field(default_factory=dict)
+
+
+# Indicator computation ---------------------------------------------------
+
+def _wilder(values: pd.Series, window: int) -> pd.Series:
+    """Wilder smoothing seeded with the simple mean of the first window"""
+    valid = values.dropna()
+    result = pd.Series(np.nan, index=values.index)
+    if len(valid) < window:
+        return result
+
+    seeded = valid.iloc[window - 1:].copy()
+    seeded.iloc[0] = valid.iloc[:window].mean()
+    result.loc[seeded.index] = seeded.ewm(alpha=1 / window, adjust=False).mean()
+    return result
+
+
+def compute_indicator_columns(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Compute full-history indicator columns matching IncrementalIndicatorState"""
+    close, high, low = df["close"].astype(float), df["high"].astype(float), df["low"].astype(float)
+    volume = df["volume"].astype(float) if "volume" in df.columns else pd.Series(0.0, index=df.index)
+    columns = {"close": close.to_numpy()}
+
+    for window in (20, 50, 200):
+        columns[f"sma_{window}"] = close.rolling(window).mean().to_numpy()
+    ema_fast = close.ewm(span=12, adjust=False, min_periods=12).mean()
+    ema_slow = close.ewm(span=26, adjust=False, min_periods=26).mean()
+    macd = ema_fast - ema_slow
+    macd_signal = macd.ewm(span=9, adjust=False, min_periods=9).mean()
+    columns.update({
+        "ema_12": ema_fast.to_numpy(),
+        "ema_26": ema_slow.to_numpy(),
+        "macd": macd.where(macd_signal.notna()).to_numpy(),
+        "macd_signal": macd_signal.to_numpy(),
+        "macd_hist": (macd - macd_signal).to_numpy()
+    })
+
+    change = close.diff()
+    avg_gain = change.clip(lower=0).ewm(alpha=1 / 14, adjust=False, min_periods=14).mean()
+    avg_loss = (-change).clip(lower=0).ewm(alpha=1 / 14, adjust=False, min_periods=14).mean()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        columns["rsi"] = np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + avg_gain / avg_loss))
+    columns["rsi"][avg_gain.isna().to_numpy()] = np.nan
+
+    highest, lowest = high.rolling(14).max(), low.rolling(14).min()
+    span = highest - lowest
+    stoch_k = (100 * (close - lowest) / span).where(span != 0, 50.0).where(span.notna())
+    stoch_d = stoch_k.rolling(3).mean()
+    columns["stoch_k"] = stoch_k.where(stoch_d.notna()).to_numpy()
+    columns["stoch_d"] = stoch_d.to_numpy()
+
+    prev_close = close.shift()
+    true_range = pd.concat([high - low, (high - prev_close).abs(), (low - prev_close).abs()], axis=1).max(axis=1)
+    true_range = true_range.where(prev_close.notna())
+    up_move, down_move = high.diff(), -low.diff()
+    plus_dm = up_move.where((up_move > down_move) & (up_move > 0), 0.0).where(prev_close.notna())
+    minus_dm = down_move.where((down_move > up_move) & (down_move > 0), 0.0).where(prev_close.notna())
+    atr = _wilder(true_range, 14)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        plus_di = 100 * _wilder(plus_dm, 14) / atr
+        minus_di = 100 * _wilder(minus_dm, 14) / atr
+        di_sum = plus_di + minus_di
+        dx = (100 * (plus_di - minus_di).abs() / di_sum).where(di_sum != 0, 0.0).where(di_sum.notna())
+    columns.update({
+        "atr": atr.to_numpy(),
+        "plus_di": plus_di.to_numpy(),
+        "minus_di": minus_di.to_numpy(),
+        "adx": _wilder(dx, 14).to_numpy()
+    })
+
+    typical = (high + low + close) / 3
+    money_flow = typical * volume
+    prev_typical = typical.shift()
+    positive = money_flow.where(typical > prev_typical, 0.0).where(prev_typical.notna()).rolling(14).sum()
+    negative = money_flow.where(typical < prev_typical, 0.0).where(prev_typical.notna()).rolling(14).sum()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        columns["mfi"] = np.where(negative == 0, 100.0, 100 - 100 / (1 + positive / negative))
+    columns["mfi"][positive.isna().to_numpy()] = np.nan
+
+    tp = typical.to_numpy()
+    cci = np.full(len(tp), np.nan)
+    if len(tp) >= 20:
+        windows = sliding_window_view(tp, 20)
+        mean = windows.mean(axis=1)
+        mean_deviation = np.abs(windows - mean[:, None]).mean(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cci[19:] = np.where(mean_deviation == 0, 0.0, (tp[19:] - mean) / (0.015 * mean_deviation))
+    columns["cci"] = cci
+
+    return columns
+
+
+# Vectorized inference chain ----------------------------------------------
+
+def _contains(codes: np.ndarray, labels, fragment: str) -> np.ndarray:
+    """Boolean mask of codes whose label contains a substring"""
+    hits = np.array([fragment in label for label in labels])
+    return hits[codes]
+
+
+def build_evidence(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Turn classified indicator columns into per-bar evidence arrays"""
+    signals = classify_indicator_columns(columns)
+    bars = len(columns["close"])
+    label_tables = {"RSI": RSI_LABELS, "MACD": MACD_LABELS, "STOCH": STOCHASTIC_LABELS,
+                    "MFI": RSI_LABELS, "CCI": CCI_LABELS}
+
+    adx_codes, adx_confidence = signals["ADX"]
+    adx_ready = ~np.isnan(columns["adx"])
+    strength = np.where(adx_ready, adx_codes, -1)  # -1: not enough history
+
+    bullish_momentum = np.zeros(bars, dtype=np.int8)
+    bearish_momentum = np.zeros(bars, dtype=np.int8)
+    exhausted = np.zeros(bars, dtype=bool)
+    confidence_sum = np.zeros(bars)
+    for name in MOMENTUM_SIGNALS:
+        codes, confidence = signals[name]
+        labels = label_tables[name]
+        bullish_momentum += _contains(codes, labels, "bullish")
+        bearish_momentum += _contains(codes, labels, "bearish")
+        exhausted |= _contains(codes, labels, "overbought") | _contains(codes, labels, "oversold")
+        confidence_sum += confidence
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        atr_pct = columns["atr"] / columns["close"]
+    regime = np.select([atr_pct > HIGH_VOLATILITY_ATR_PCT, atr_pct < LOW_VOLATILITY_ATR_PCT], [2, 0], default=1)
+    regime = np.where(np.isnan(atr_pct), -1, regime)  # 0 low, 1 medium, 2 high, -1 unknown
+
+    return {
+        "strength": strength,  # index into ADX_LABELS
+        "trend_confidence": adx_confidence,
+        "di_bullish": np.nan_to_num(columns["plus_di"]) > np.nan_to_num(columns["minus_di"]),
+        "bullish_momentum": bullish_momentum,
+        "bearish_momentum": bearish_momentum,
+        "momentum_confidence": confidence_sum / len(MOMENTUM_SIGNALS),
+        "exhausted": exhausted,
+        "volatility_regime": regime,
+        "volatility_confidence": np.full(bars, VOLATILITY_CONFIDENCE)
+    }
+
+
+def infer_market_state(evidence: Dict[str, np.ndarray]):
+    """Vectorized _infer_market_state: winning state code and its confidence"""
+    bars = len(evidence["strength"])
+    scores = np.zeros((len(MARKET_STATES), bars))
+    confidence_sum = np.zeros((len(MARKET_STATES), bars))
+    confidence_count = np.zeros((len(MARKET_STATES), bars))
+
+    def _add(state: int, mask: np.ndarray, score: float, confidence: np.ndarray):
+        scores[state] += np.where(mask, score, 0.0)
+        confidence_sum[state] += np.where(mask, confidence, 0.0)
+        confidence_count[state] += mask
+
+    strong = (evidence["strength"] == ADX_LABELS.index("strong")) | \
+             (evidence["strength"] == ADX_LABELS.index("very_strong"))
+    _add(0, strong & evidence["di_bullish"], 0.3, evidence["trend_confidence"])
+    _add(1, strong & ~evidence["di_bullish"], 0.3, evidence["trend_confidence"])
+
+    bullish_momentum = evidence["bullish_momentum"] >= 2
+    _add(0, bullish_momentum, 0.25, evidence["momentum_confidence"])
+    _add(1, ~bullish_momentum & (evidence["bearish_momentum"] >= 2), 0.25, evidence["momentum_confidence"])
+
+    high_volatility = evidence["volatility_regime"] == 2
+    _add(3, high_volatility, 0.15, evidence["volatility_confidence"])
+    quiet = (evidence["volatility_regime"] == 0) & (scores.max(axis=0) < 0.3)
+    _add(4, quiet, 0.15, evidence["volatility_confidence"])
+
+    state = scores.argmax(axis=0)
+    picked_sum = np.take_along_axis(confidence_sum, state[None], axis=0)[0]
+    picked_count = np.take_along_axis(confidence_count, state[None], axis=0)[0]
+    return state, picked_sum / np.maximum(picked_count, 1)
+
+
+def infer_trend_direction(evidence: Dict[str, np.ndarray]):
+    """Vectorized _infer_trend_direction: direction code and confidence"""
+    very_strong = evidence["strength"] == ADX_LABELS.index("very_strong")
+    strong = evidence["strength"] == ADX_LABELS.index("strong")
+    bullish_score = np.where(very_strong, 2.0, np.where(strong, 1.5, 0.0))
+    bullish_score = bullish_score + evidence["bullish_momentum"] * 0.8
+    total_confidence = np.where(very_strong | strong, evidence["trend_confidence"], 0.0)
+    total_confidence = total_confidence + evidence["momentum_confidence"]
+
+    direction = np.select(
+        [bullish_score >= 3.0, bullish_score >= 1.5, bullish_score <= -3.0, bullish_score <= -1.5],
+        [1, 2, 3, 4], default=0
+    )
+    return direction, np.where(total_confidence > 0, total_confidence / 3, 0.5)
+
+
+def infer_risk_level(evidence: Dict[str, np.ndarray]):
+    """Vectorized _infer_risk_level: risk level code and confidence"""
+    regime = evidence["volatility_regime"]
+    weak = evidence["strength"] == ADX_LABELS.index("weak")
+    exhausted = evidence["exhausted"]
+
+    risk_score = np.select([regime == 2, regime == 1], [4.0, 2.0], default=0.0) + weak * 1.0 + exhausted * 1.5
+    volatility_known = (regime == 2) | (regime == 1)
+    confidence_sum = np.where(volatility_known, evidence["volatility_confidence"], 0.0) + weak * 0.6 + exhausted * 0.7
+    confidence_count = volatility_known.astype(int) + weak + exhausted
+
+    level = np.select([risk_score >= 4.5, risk_score >= 3.5, risk_score >= 2.5, risk_score >= 1.5],
+                      [4, 3, 2, 1], default=0)
+    return level, np.where(confidence_count > 0, confidence_sum / np.maximum(confidence_count, 1), 0.5)
+
+
+def detect_crosses(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    """Golden/death cross pattern confidence per bar (0.8 on a cross, else 0)"""
+    short, long = columns["sma_20"], columns["sma_50"]
+    prev_short, prev_long = np.roll(short, 1), np.roll(long, 1)
+    prev_short[0] = prev_long[0] = np.nan
+    golden = (short > long) & (prev_short <= prev_long)
+    death = (short < long) & (prev_short >= prev_long)
+    return np.where(golden | death, 0.8, 0.0)
+
+
+def effective_weights(weights: Optional[Dict[str, float]] = None, ml: bool = True) -> Dict[str, float]:
+    """Score weights; without ML confidence the ML weight is dropped and the rest rescaled to the same total
+
+    A history has no stored ML predictions to replay, and scoring the ML term
+    as zero would cap the overall score at 0.7 (so strong_buy could never fire).
+    """
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    if ml:
+        return weights
+    total = sum(weights.values())
+    remaining = total - weights["ml"]
+    scale = total / remaining if remaining else 0.0
+    return {name: 0.0 if name == "ml" else weight * scale for name, weight in weights.items()}
+
+
+def score_history(df: pd.DataFrame, ml_confidence: Optional[np.ndarray] = None,
+                  weights: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+    """Run the inference chain over every bar and return the recommendation series
+
+    ``ml_confidence`` is one ML confidence per bar; when None the remaining
+    weights are renormalized (see effective_weights).
+    """
+    weights = effective_weights(weights, ml=ml_confidence is not None)
+    columns = compute_indicator_columns(df)
+    evidence = build_evidence(columns)
+
+    state, state_confidence = infer_market_state(evidence)
+    direction, _ = infer_trend_direction(evidence)
+    risk_level, _ = infer_risk_level(evidence)
+    pattern_confidence = detect_crosses(columns)
+    ml_confidence = np.zeros(len(df)) if ml_confidence is None else np.asarray(ml_confidence, dtype=float)
+
+    overall_score = (
+        state_confidence * weights["ontology"]
+        + ml_confidence * weights["ml"]
+        + (1 - RISK_LEVEL_SCORES[risk_level]) * weights["risk"]
+        + pattern_confidence * weights["pattern"]
+    )
+    recommendation = np.select(
+        [overall_score > 0.7, overall_score > 0.5, overall_score < 0.3, overall_score < 0.5],
+        [1, 2, 3, 4], default=0
+    )
+
+    # Bars before the slowest indicator warms up carry no recommendation
+    warm = ~np.isnan(columns["adx"]) & ~np.isnan(columns["sma_50"])
+    return pd.DataFrame({
+        "close": columns["close"],
+        "market_state": np.asarray(MARKET_STATES, dtype=object)[state],
+        "trend_direction": np.asarray(TREND_DIRECTIONS, dtype=object)[direction],
+        "risk_level": np.asarray(RISK_LEVELS, dtype=object)[risk_level],
+        "confidence": state_confidence,
+        "overall_score": np.where(warm, overall_score, np.nan),
+        "recommendation": np.where(warm, np.asarray(RECOMMENDATIONS, dtype=object)[recommendation], "hold")
+    }, index=df.index)
+
+
+# Trade simulation --------------------------------------------------------
+
+def _extract_trades(positions: pd.Series, close: pd.Series) -> pd.DataFrame:
+    """List round-trip trades from a position series"""
+    trades = []
+    entry_time, entry_price, side = None, None, 0
+    for timestamp, position, price in zip(positions.index, positions.to_numpy(), close.to_numpy()):
+        if position != side:
+            if side != 0:
+                trades.append({
+                    "entry_time": entry_time, "exit_time": timestamp, "side": "long" if side > 0 else "short",
+                    "entry_price": entry_price, "exit_price": price,
+                    "return": side * (price / entry_price - 1)
+                })
+            entry_time, entry_price, side = timestamp, price, position
+    return pd.DataFrame(trades, columns=["entry_time", "exit_time", "side", "entry_price", "exit_price", "return"])
+
+
+def run_backtest(symbol: str, df: pd.DataFrame, allow_short: bool = False, cost_bps: float = 5.0,
+                 weights: Optional[Dict[str, float]] = None, periods_per_year: int = 252,
+                 ml_confidence: Optional[np.ndarray] = None) -> BacktestResult:
+    """Backtest the recommendation series of one symbol (``ml_confidence``: per-bar, aligned with ``df``)"""
+    if ml_confidence is not None and len(ml_confidence) != len(df):
+        raise ValueError(f"ml_confidence has {len(ml_confidence)} values for {len(df)} bars")
+    signals = score_history(df, ml_confidence=ml_confidence, weights=weights)
+
+    recommendation = signals["recommendation"]
+    target = np.where(recommendation.isin(["buy", "strong_buy"]), 1,
+                      np.where(recommendation.isin(["sell", "strong_sell"]) & allow_short, -1, 0))
+    # Act on the close of the signal bar -> exposed from the next bar on
+    positions = pd.Series(target, index=df.index).shift(fill_value=0)
+
+    returns = signals["close"].pct_change().fillna(0.0)
+    turnover = positions.diff().abs().fillna(positions.abs())
+    strategy_returns = positions * returns - turnover * cost_bps / 10000
+    equity = (1 + strategy_returns).cumprod()
+    signals["position"] = positions
+    signals["strategy_return"] = strategy_returns
+
+    trades = _extract_trades(positions, signals["close"])
+    volatility = strategy_returns.std()
+    drawdown = equity / equity.cummax() - 1
+    stats = {
+        "bars": len(df),
+        "total_return": float(equity.iloc[-1] - 1) if len(equity) else 0.0,
+        "sharpe": float(strategy_returns.mean() / volatility * np.sqrt(periods_per_year)) if volatility else 0.0,
+        "max_drawdown": float(drawdown.min()) if len(drawdown) else 0.0,
+        "trades": len(trades),
+        "win_rate": float((trades["return"] > 0).mean()) if len(trades) else 0.0,
+        "exposure": float((positions != 0).mean()) if len(positions) else 0.0
+    }
+    return BacktestResult(symbol=symbol, signals=signals, trades=trades, equity=equity, stats=stats)
+
+
+def _run_one(args) -> BacktestResult:
+    symbol, df, kwargs = args
+    return run_backtest(symbol, df, **kwargs)
+
+
+def run_universe(histories: Dict[str, pd.DataFrame], processes: Optional[int] = None,
+                 ml_confidence: Optional[Dict[str, np.ndarray]] = None, **kwargs) -> Dict[str, BacktestResult]:
+    """Backtest many symbols, optionally fanning out over a process pool
+
+    ``ml_confidence`` maps symbols to per-bar ML confidence; symbols without
+    an entry are scored with renormalized weights.
+    """
+    ml_confidence = ml_confidence or {}
+    jobs = [(symbol, df, {**kwargs, "ml_confidence": ml_confidence.get(symbol)}) for symbol, df in histories.items()]
+    if processes == 1 or len(jobs) <= 1:
+        return {symbol: _run_one(job) for symbol, job in zip(histories, jobs)}
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        results = pool.map(_run_one, jobs, chunksize=max(1, len(jobs) // (4 * (processes or 4))))
+        return {result.symbol: result for result in results}
+
+
+def summarize(results: Dict[str, BacktestResult]) -> pd.DataFrame:
+    """One row of summary statistics per symbol"""
+    return pd.DataFrame({symbol: result.stats for symbol, result in results.items()}).T
@@ -0,0 +1,338 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ============================================================
+# LOCAL OHLCV BAR STORE
+# ============================================================
+# Columnar on-disk cache of market data keyed by symbol and
+# interval. Each column is a .npy file read back memory-mapped,
+# so loading a history is zero-copy; only the missing tail is
+# fetched from the network. Timestamps are naive UTC. The store
+# may be shared by several processes (gunicorn workers): file
+# locks serialize refreshes and keep a version directory alive
+# while a reader is opening it.
+# ============================================================
+
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process locks apply
+    fcntl = None
+
+BAR_COLUMNS = ("open", "high", "low", "close", "volume")
+
+PERIOD_LENGTHS = {
+    "1d": timedelta(days=1),
+    "5d": timedelta(days=5),
+    "1mo": timedelta(days=31),
+    "3mo": timedelta(days=92),
+    "6mo": timedelta(days=183),
+    "1y": timedelta(days=365),
+    "2y": timedelta(days=731),
+    "3y": timedelta(days=1096),
+    "5y": timedelta(days=1827),
+    "10y": timedelta(days=3653)
+}
+
+INTERVAL_LENGTHS = {
+    "1m": timedelta(minutes=1),
+    "5m": timedelta(minutes=5),
+    "15m": timedelta(minutes=15),
+    "30m": timedelta(minutes=30),
+    "1h": timedelta(hours=1),
+    "1d": timedelta(days=1),
+    "1wk": timedelta(weeks=1),
+    "1mo": timedelta(days=31)
+}
+
+# A stored series is re-fetched at most this often (the last bar may still be forming)
+DEFAULT_REFRESH_SECONDS = 60
+
+# fetcher(symbol, start, end, interval) -> OHLCV DataFrame indexed by timestamp
+Fetcher = Callable[[str, Optional[datetime], Optional[datetime], str], pd.DataFrame]
+
+
+def utc_now() -> datetime:
+    """Current time as naive UTC, the convention of stored bar timestamps"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def period_start(period: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """Start of a yahooquery-style period ("max" -> None), naive UTC"""
+    if period == "max":
+        return None
+    now = now or utc_now()
+    if period == "ytd":
+        return datetime(now.year, 1, 1)
+    return now - PERIOD_LENGTHS.get(period, PERIOD_LENGTHS["1y"])
+
+
+def normalize_bars(df: pd.DataFrame) -> pd.DataFrame:
+    """Coerce a provider frame to a sorted, de-duplicated float OHLCV frame"""
+    if df is None or not isinstance(df, pd.DataFrame) or df.empty:
+        return pd.DataFrame(columns=list(BAR_COLUMNS), index=pd.DatetimeIndex([], name="timestamp"))
+
+    if isinstance(df.index, pd.MultiIndex):
+        df = df.reset_index(level=0, drop=True)
+    df = df.rename(columns=str.lower)
+    index = pd.to_datetime(df.index, utc=True).tz_convert(None)
+
+    bars = pd.DataFrame(
+        {column: pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float64)
+         if column in df.columns else np.zeros(len(df)) for column in BAR_COLUMNS},
+        index=pd.DatetimeIndex(index, name="timestamp")
+    )
+    bars = bars[~bars.index.duplicated(keep="last")].sort_index()
+    return bars.dropna(subset=["close"])
+
+
+def yahooquery_fetcher(symbol: str, start: Optional[datetime], end: Optional[datetime],
+                       interval: str) -> pd.DataFrame:
+    """Fetch bars through yahooquery"""
+    from yahooquery import Ticker
+
+    ticker = Ticker(symbol)
+    if start is None:
+        history = ticker.history(period="max", interval=interval)
+    else:
+        history = ticker.history(start=start, end=end, interval=interval)
+    return normalize_bars(history if isinstance(history, pd.DataFrame) else None)
+
+
+@contextmanager
+def _file_lock(path: Path, exclusive: bool = True) -> Iterator[None]:
+    """flock on ``path`` (created if needed), released when the block exits"""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+
+class BarStore:
+    """Persistent columnar OHLCV store with tail-only refresh"""
+
+    def __init__(self, root: str = "./data/bars", retention_days: Optional[int] = 365,
+                 fetcher: Optional[Fetcher] = None, offline: bool = False,
+                 refresh_seconds: float = DEFAULT_REFRESH_SECONDS):
+        self.root = Path(root)
+        self.retention_days = retention_days
+        self.fetcher = fetcher or yahooquery_fetcher
+        self.offline = offline
+        self.refresh_interval = timedelta(seconds=refresh_seconds)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    # Public API ----------------------------------------------------------
+
+    def get_bars(self, symbol: str, period: str = "1y", interval: str = "1d") -> pd.DataFrame:
+        """Bars for a period, refreshing only what is missing from the store"""
+        start = period_start(period)
+        cutoff = self._retention_cutoff()
+        step = INTERVAL_LENGTHS.get(interval, timedelta(days=1))
+        store_start = start if cutoff is None else (cutoff if start is None else max(start, cutoff))
+
+        with self._writing(symbol, interval):
+            meta = self._read_meta(symbol, interval)
+            if not self.offline:
+                meta = self._refresh(symbol, interval, store_start, meta)
+            bars = self._load(symbol, interval, meta)
+
+        if not self.offline and cutoff is not None and (start is None or start < cutoff - step):
+            # Windows reaching past the retention horizon: the head passes through unstored
+            head = normalize_bars(self.fetcher(symbol, start, cutoff, interval))
+            head = head[head.index < (bars.index[0] if len(bars) else cutoff)]
+            bars = pd.concat([head, bars]) if len(head) else bars
+
+        return bars if start is None else bars[bars.index >= start]
+
+    def read(self, symbol: str, interval: str = "1d", start: Optional[datetime] = None,
+             end: Optional[datetime] = None) -> pd.DataFrame:
+        """Stored bars with ``start <= timestamp <= end`` (naive UTC, either optional), without touching the network
+
+        Only the window's rows are mapped into the frame; nothing else is read.
+        """
+        directory = self._directory(symbol, interval)
+        if not directory.exists():
+            return normalize_bars(None)
+        # Shared: a concurrent writer cannot delete the version between meta and mmap
+        with _file_lock(directory / ".versions.lock", exclusive=False):
+            return self._load(symbol, interval, self._read_meta(symbol, interval), start, end)
+
+    def write(self, symbol: str, interval: str, bars: pd.DataFrame, coverage_start: Optional[datetime] = None):
+        """Merge bars into the store (used for seeding offline stores)"""
+        with self._writing(symbol, interval):
+            meta = self._read_meta(symbol, interval)
+            self._merge_and_write(symbol, interval, normalize_bars(bars), meta, coverage_start)
+
+    def prune(self, symbol: str, interval: str):
+        """Drop bars older than the retention window"""
+        self.write(symbol, interval, pd.DataFrame())
+
+    def stored(self, symbol: str, interval: str = "1d") -> bool:
+        """Whether anything has been stored for a symbol/interval"""
+        return (self._directory(symbol, interval) / "meta.json").exists()
+
+    def symbols(self, interval: str = "1d"):
+        """Symbols stored for an interval"""
+        directory = self.root / interval
+        return sorted(p.name for p in directory.iterdir() if (p / "meta.json").exists()) if directory.exists() else []
+
+    # Refresh -------------------------------------------------------------
+
+    def _refresh(self, symbol: str, interval: str, start: Optional[datetime],
+                 meta: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        step = INTERVAL_LENGTHS.get(interval, timedelta(days=1))
+        coverage_start = meta.get("coverage_start") if meta else None
+        if meta is None:
+            covers_head = False
+        elif start is None:
+            covers_head = coverage_start is None
+        else:
+            covers_head = coverage_start is None or pd.Timestamp(coverage_start) <= pd.Timestamp(start + step)
+
+        if not covers_head:
+            # Nothing stored for this window yet - fetch it whole
+            fetched = normalize_bars(self.fetcher(symbol, start, None, interval))
+            return self._merge_and_write(symbol, interval, fetched, meta, start, full=True)
+
+        # Refreshed moments ago (throttles bursts of identical requests). The age of
+        # the last bar says nothing here: a daily candle keeps changing all day
+        if utc_now() - self._updated(meta) < self.refresh_interval:
+            return meta
+        last_bar = pd.Timestamp(meta["last_timestamp"]).to_pydatetime()
+
+        # Re-fetch from the last stored bar so a still-forming candle is replaced
+        fetched = normalize_bars(self.fetcher(symbol, last_bar, None, interval))
+        return self._merge_and_write(
+            symbol, interval, fetched, meta,
+            pd.Timestamp(coverage_start).to_pydatetime() if coverage_start else None
+        )
+
+    @staticmethod
+    def _updated(meta: Dict[str, Any]) -> datetime:
+        updated = datetime.fromisoformat(meta["updated"])
+        if updated.tzinfo is None:
+            return datetime.min  # local time written by older versions: treat as stale
+        return updated.astimezone(timezone.utc).replace(tzinfo=None)
+
+    def _retention_cutoff(self) -> Optional[datetime]:
+        if not self.retention_days:
+            return None
+        return utc_now() - timedelta(days=self.retention_days)
+
+    # Storage -------------------------------------------------------------
+
+    def _directory(self, symbol: str, interval: str) -> Path:
+        return self.root / interval / symbol.upper()
+
+    def _lock(self, symbol: str, interval: str) -> threading.Lock:
+        key = f"{interval}/{symbol.upper()}"
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    @contextmanager
+    def _writing(self, symbol: str, interval: str) -> Iterator[None]:
+        """One refresh/write per symbol/interval at a time, across threads and processes"""
+        directory = self._directory(symbol, interval)
+        directory.mkdir(parents=True, exist_ok=True)
+        with self._lock(symbol, interval), _file_lock(directory / ".refresh.lock"):
+            yield
+
+    def _read_meta(self, symbol: str, interval: str) -> Optional[Dict[str, Any]]:
+        path = self._directory(symbol, interval) / "meta.json"
+        if not path.exists():
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _load(self, symbol: str, interval: str, meta: Optional[Dict[str, Any]],
+              start: Optional[datetime] = None, end: Optional[datetime] = None) -> pd.DataFrame:
+        if meta is None:
+            return normalize_bars(None)
+
+        version_dir = self._directory(symbol, interval) / meta["version"]
+        timestamps = np.load(version_dir / "timestamp.npy", mmap_mode="r")
+        # Timestamps are sorted: the window is one slice of every memory-mapped column
+        first = 0 if start is None else int(np.searchsorted(timestamps, pd.Timestamp(start).to_datetime64(), "left"))
+        stop = len(timestamps) if end is None else int(np.searchsorted(timestamps, pd.Timestamp(end).to_datetime64(), "right"))
+        timestamps = timestamps[first:stop]
+        columns = {column: np.load(version_dir / f"{column}.npy", mmap_mode="r")[first:stop] for column in BAR_COLUMNS}
+        # copy=False keeps each column backed by its memory map
+        return pd.DataFrame(columns, index=pd.DatetimeIndex(timestamps, name="timestamp"), copy=False)
+
+    def _merge_and_write(self, symbol: str, interval: str, fetched: pd.DataFrame,
+                         meta: Optional[Dict[str, Any]], coverage_start: Optional[datetime],
+                         full: bool = False) -> Optional[Dict[str, Any]]:
+        existing = self._load(symbol, interval, meta)
+        if full and coverage_start is not None and len(existing):
+            # Keep stored bars that the full fetch does not cover
+            existing = existing[existing.index < coverage_start]
+
+        bars = pd.concat([existing, fetched]) if len(existing) else fetched
+        bars = bars[~bars.index.duplicated(keep="last")].sort_index()
+
+        cutoff = self._retention_cutoff()
+        if cutoff is not None:
+            bars = bars[bars.index >= cutoff]
+            if coverage_start is None or coverage_start < cutoff:
+                coverage_start = cutoff
+
+        if bars.empty:
+            return meta
+
+        directory = self._directory(symbol, interval)
+        version = f"v{utc_now().strftime('%Y%m%d%H%M%S%f')}-{os.getpid()}"
+        version_dir = directory / version
+        version_dir.mkdir(parents=True, exist_ok=True)
+
+        np.save(version_dir / "timestamp.npy", bars.index.to_numpy(dtype="datetime64[ns]"))
+        for column in BAR_COLUMNS:
+            np.save(version_dir / f"{column}.npy", np.ascontiguousarray(bars[column].to_numpy(dtype=np.float64)))
+
+        new_meta = {
+            "symbol": symbol.upper(),
+            "interval": interval,
+            "version": version,
+            "bars": len(bars),
+            "coverage_start": coverage_start.isoformat() if coverage_start is not None else None,
+            "first_timestamp": bars.index[0].isoformat(),
+            "last_timestamp": bars.index[-1].isoformat(),
+            "updated": datetime.now(timezone.utc).isoformat()
+        }
+
+        # Atomic switch: readers see either the old or the new version
+        tmp_path = directory / f"meta.json.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(new_meta, f)
+        os.replace(tmp_path, directory / "meta.json")
+
+        # Old versions stay readable through open memory maps until released; the
+        # exclusive lock waits for readers still between reading meta and mapping
+        with _file_lock(directory / ".versions.lock"):
+            for old in directory.iterdir():
+                if old.is_dir() and old.name != version:
+                    shutil.rmtree(old, ignore_errors=True)
+
+        return new_meta
+
+
+def create_bar_store(config: Any = None, fetcher: Optional[Fetcher] = None) -> BarStore:
+    """Bar store configured from SystemConfig"""
+    return BarStore(
+        root=getattr(config, "bar_store_path", "./data/bars"),
+        retention_days=getattr(config, "data_retention_days", 365),
+        fetcher=fetcher,
+        offline=getattr(config, "offline_mode", False),
+        refresh_seconds=getattr(config, "bar_refresh_seconds", DEFAULT_REFRESH_SECONDS)
+    )
@@ -0,0 +1,327 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Benchmark suite for the analysis pipeline
+
+Times each stage of the analysis pipeline separately against synthetic
+histories (default 1k/10k/100k bars) and universes (default 1/50/500 symbols),
+recording throughput, p50/p99 latency and peak RSS. Results are written as a JSON
+baseline that a later run can be compared against:
+
+    python benchmark.py --output baseline.json
+    python benchmark.py --quick --compare baseline.json --threshold 0.25
+
+Stages run on the standalone modules the engine delegates to (bar store,
+vectorized and incremental indicators, signal classification, the partitioned
+ontology graph, signal index, inference chain, report views and export), so the
+benchmark does not need the engine module itself.
+
+`--import-budget SECONDS` instead checks the cold import time of those modules and exits
+1 when one is over budget.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from backtest import compute_indicator_columns, score_history
+from bar_store import BarStore
+from indicator_series import IndicatorSeries
+from indicator_state import IncrementalIndicatorState
+from market_data import SyntheticProvider
+from ontology_bulk import add_indicator_block, indicator_block
+from ontology_export import iter_export
+from ontology_index import SignalIndex
+from ontology_partitions import PartitionedGraph
+from report_views import report_views
+from signal_classification import classify_indicator_columns
+
+STAGES = (
+    "data_load", "indicators", "incremental_state", "classification", "ontology_population",
+    "signal_index", "inference", "report", "serialize"
+)
+BENCH_INTERVAL = "1h"  # 100k hourly bars fit comfortably in pandas' timestamp range
+
+# Modules checked by --import-budget (the engine's standalone building blocks)
+IMPORT_MODULES = (
+    "analysis_cache", "analysis_jobs", "backtest", "bar_store", "indicator_series", "indicator_state",
+    "instrumentation", "market_data", "ontology_bulk", "ontology_export", "ontology_index",
+    "ontology_partitions", "price_series", "report_views", "signal_classification", "triple_store"
+)
+
+
+def rss_bytes() -> int:
+    """Current resident set size (psutil when installed, else /proc, else the peak)"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class StageTimer:
+    """Collects per-stage durations and RSS samples"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        self.peak_rss = rss_bytes()
+
+    def run(self, stage: str, func: Callable, *args, **kwargs) -> Any:
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.samples[stage].append(time.perf_counter() - start)
+        self.peak_rss = max(self.peak_rss, rss_bytes())
+        return result
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        stats = {}
+        for stage, durations in self.samples.items():
+            if not durations:
+                continue
+            values = np.asarray(durations)
+            stats[stage] = {
+                "calls": len(values),
+                "p50_ms": float(np.percentile(values, 50) * 1000),
+                "p99_ms": float(np.percentile(values, 99) * 1000),
+                "mean_ms": float(values.mean() * 1000),
+                "throughput_per_s": float(len(values) / values.sum()) if values.sum() else 0.0
+            }
+        return stats
+
+
+def _index(index: SignalIndex, symbol: str, block: Dict[str, np.ndarray]) -> Dict[str, int]:
+    for row in range(len(block["value"])):
+        index.record(row, symbol, block["indicator"][row], block["signal"][row], float(block["confidence"][row]))
+    return index.counts(symbol)
+
+
+def run_symbol(graph: PartitionedGraph, index: SignalIndex, store: BarStore, timer: StageTimer,
+               symbol: str, period: str):
+    """One pass of the pipeline for one symbol, timing every stage"""
+    df = timer.run("data_load", store.get_bars, symbol, period, BENCH_INTERVAL)
+    columns = timer.run("indicators", compute_indicator_columns, df)
+
+    state, series = IncrementalIndicatorState(), IndicatorSeries()
+    timer.run("incremental_state", state.update_from_frame, df, series.record)
+
+    latest = {name: values[-1:] for name, values in columns.items()}
+    block = timer.run("classification",
+                      lambda: indicator_block(symbol, latest, classify_indicator_columns(latest)))
+    timer.run("ontology_population", add_indicator_block, SimpleNamespace(graph=graph), block)
+    counts = timer.run("signal_index", _index, index, symbol, block)
+
+    signals = timer.run("inference", score_history, df)
+    last = signals.iloc[-1]
+    report = {
+        "symbol": symbol,
+        "market_context": {"market_state": last["market_state"], "trend_direction": last["trend_direction"]},
+        "overall_score": float(last["overall_score"]),
+        "overall_recommendation": last["recommendation"],
+        "knowledge_summary": counts
+    }
+    timer.run("report", report_views, report, {"symbol": symbol, "period": period, "interval": BENCH_INTERVAL})
+    timer.run("serialize", lambda: sum(len(chunk) for chunk in iter_export(graph.symbol_graph(symbol), "nt")))
+
+
+def run_scenario(bars: int, symbols: int, seed: int) -> Dict[str, Any]:
+    """Benchmark one (history length, universe size) combination with a fresh graph and store"""
+    provider = SyntheticProvider(seed=seed, max_bars=bars)
+    graph = PartitionedGraph(retention_days=None)
+    index = SignalIndex()
+    timer = StageTimer()
+
+    with tempfile.TemporaryDirectory(prefix="eos-bench-") as root:
+        store = BarStore(root, retention_days=None, fetcher=provider)
+        universe = [f"SYN{i:03d}" for i in range(symbols)]
+        # "max" with max_bars caps every history at exactly `bars` bars
+        started = time.perf_counter()
+        for symbol in universe:
+            run_symbol(graph, index, store, timer, symbol, "max")
+        elapsed = time.perf_counter() - started
+
+    return {
+        "bars": bars,
+        "symbols": symbols,
+        "elapsed_s": elapsed,
+        "symbols_per_s": symbols / elapsed if elapsed else 0.0,
+        "peak_rss_mb": timer.peak_rss / 2**20,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "stages": timer.summary()
+    }
+
+
+def _ontology_rss(storage: str, statements: int, queue) -> None:
+    """RSS growth (MB) from populating an ontology graph; run in a fresh process"""
+    from compact_store import CompactStore
+    from ontology_bulk import INDICATOR_PROPERTIES, STOCK, mint_indicator_rows
+
+    baseline = rss_bytes()
+    graph = PartitionedGraph(store=CompactStore() if storage == "compact" else "default",
+                             retention_days=None, max_runs_per_symbol=None)
+    i = np.arange(statements // (len(INDICATOR_PROPERTIES) + 1))
+    block = {
+        "symbol": np.array([f"SYN{n:03d}" for n in range(500)], dtype=object)[i % 500],
+        "indicator": np.full(len(i), "RSI", dtype=object),
+        "value": 30 + (i % 4000) / 100,
+        "signal": np.where(i % 2, "oversold", "overbought").astype(object),
+        "confidence": 0.5 + (i % 50) / 100
+    }
+    for start in range(0, len(i), 10_000):
+        _, quads = mint_indicator_rows(block, i[start:start + 10_000], 0, str(STOCK))
+        for s, p, o, _ in quads:
+            graph.add((s, p, o))
+    queue.put(((rss_bytes() - baseline) / 2**20, len(graph)))
+
+
+def measure_ontology_memory(statements: int) -> Dict[str, Any]:
+    """RSS for the same indicator statements in the default and the compact store"""
+    import multiprocessing
+
+    context = multiprocessing.get_context("spawn")
+    result = {"statements": statements}
+    for storage in ("memory", "compact"):
+        queue = context.Queue()
+        worker = context.Process(target=_ontology_rss, args=(storage, statements, queue))
+        worker.start()
+        rss_mb, count = queue.get()
+        worker.join()
+        result[f"{storage}_rss_mb"] = rss_mb
+        result[f"{storage}_statements"] = count
+    result["reduction"] = result["memory_rss_mb"] / result["compact_rss_mb"] if result["compact_rss_mb"] > 0 else 0.0
+    return result
+
+
+def measure_import_time(module: str, runs: int = 3) -> Dict[str, Any]:
+    """Best-of-N cold import time of a module (fresh interpreter each run) and its slowest imports"""
+    import subprocess
+
+    best, slowest = None, []
+    for _ in range(runs):
+        completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                   capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+        # "import time: self [us] | cumulative | imported package"
+        rows = []
+        for line in completed.stderr.splitlines():
+            if line.startswith("import time:") and "|" in line and "self [us]" not in line:
+                _, cumulative, package = line[len("import time:"):].split("|", 2)
+                rows.append((int(cumulative), package.strip()))
+        total = next((us for us, package in rows if package == module), sum(us for us, _ in rows)) / 1e6
+        if best is None or total < best:
+            top_level = [(us, package) for us, package in rows if "." not in package]
+            best, slowest = total, sorted(top_level, reverse=True)[:10]
+    return {"module": module, "seconds": best, "slowest": [{"module": p, "seconds": us / 1e6} for us, p in slowest]}
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Stage p50 latencies that regressed by more than `threshold` (fractional)"""
+    regressions = []
+    previous = {(s["bars"], s["symbols"]): s for s in baseline.get("scenarios", [])}
+    for scenario in current["scenarios"]:
+        old = previous.get((scenario["bars"], scenario["symbols"]))
+        if old is None:
+            continue
+        for stage, stats in scenario["stages"].items():
+            old_stats = old["stages"].get(stage)
+            if old_stats and old_stats["p50_ms"] > 0:
+                change = stats["p50_ms"] / old_stats["p50_ms"] - 1
+                if change > threshold:
+                    regressions.append(
+                        f"{scenario['bars']} bars x {scenario['symbols']} symbols - {stage}: "
+                        f"p50 {old_stats['p50_ms']:.2f}ms -> {stats['p50_ms']:.2f}ms (+{change:.0%})"
+                    )
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark analysis pipeline stages")
+    parser.add_argument("--bars", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--symbols", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--quick", action="store_true", help="1k bars x 1/50 symbols")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="baseline JSON to diff against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed p50 slowdown (0.2 = 20%%)")
+    parser.add_argument("--ontology-memory", type=int, metavar="STATEMENTS",
+                        help="also compare ontology RSS in the default vs compact store")
+    parser.add_argument("--import-budget", type=float, metavar="SECONDS",
+                        help="only check that importing each module stays within this budget")
+    parser.add_argument("--import-module", action="append", metavar="MODULE",
+                        help="module to check with --import-budget (repeatable; default: the pipeline modules)")
+    args = parser.parse_args(argv)
+
+    if args.import_budget is not None:
+        over = []
+        for module in args.import_module or IMPORT_MODULES:
+            timing = measure_import_time(module)
+            print(f"📦 import {module}: {timing['seconds']:.3f}s (budget {args.import_budget:.2f}s)")
+            if timing["seconds"] > args.import_budget:
+                over.append(module)
+                for entry in timing["slowest"]:
+                    print(f"   {entry['module']:<30} {entry['seconds']:.3f}s")
+        if over:
+            print(f"❌ Import time over budget: {', '.join(over)}")
+            return 1
+        print("✅ Import times within budget")
+        return 0
+
+    if args.quick:
+        args.bars, args.symbols = [1_000], [1, 50]
+
+    results = {
+        "created": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "scenarios": []
+    }
+    for bars in args.bars:
+        for symbols in args.symbols:
+            print(f"⏱  {bars:>7,} bars x {symbols:>3} symbols ...", flush=True)
+            scenario = run_scenario(bars, symbols, args.seed)
+            results["scenarios"].append(scenario)
+            print(f"   {scenario['symbols_per_s']:.2f} symbols/s, peak RSS {scenario['peak_rss_mb']:.0f} MB")
+            for stage, stats in scenario["stages"].items():
+                print(f"   {stage:<20} p50 {stats['p50_ms']:9.2f}ms  p99 {stats['p99_ms']:9.2f}ms")
+
+    if args.ontology_memory:
+        memory = results["ontology_memory"] = measure_ontology_memory(args.ontology_memory)
+        print(f"🧠 {memory['statements']:,} statements: default store {memory['memory_rss_mb']:.0f} MB, "
+              f"compact store {memory['compact_rss_mb']:.0f} MB ({memory['reduction']:.1f}x)")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print("❌ Regressions:")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print("✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
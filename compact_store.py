@@ -0,0 +1,491 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ============================================================
+# COMPACT IN-MEMORY TRIPLE STORE
+# ============================================================
+# Context-aware rdflib Store that keeps quads as dictionary-
+# encoded term ids in NumPy int32 columns, with numeric literals
+# held by value in typed NumPy columns instead of as Literal
+# objects. rdflib terms are only materialized when a query or an
+# export reads them, so statement memory is a few dozen bytes
+# instead of the default store's nested dicts of term objects.
+# ============================================================
+
+import threading
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from rdflib import BNode, Graph, Literal, URIRef
+from rdflib.namespace import XSD
+from rdflib.store import VALID_STORE, Store
+
+from triple_store import BLANK, LITERAL, URI, _context_id
+
+# Numeric datatypes stored by value: type code -> (datatype, Python constructor)
+NUMERIC_TYPES = (
+    (XSD.double, float),
+    (XSD.float, float),
+    (XSD.decimal, lambda v: Decimal(repr(v))),
+    (XSD.integer, int),
+    (XSD.int, int),
+    (XSD.long, int)
+)
+NUMERIC_CODES = {datatype: code for code, (datatype, _) in enumerate(NUMERIC_TYPES)}
+
+# Unsorted rows tolerated after the sorted part of each index before re-sealing
+TAIL_ROWS = 8192
+INITIAL_CAPACITY = 1024
+# Statements materialized per step of a triples() iteration
+TRIPLE_CHUNK_ROWS = 4096
+
+SUBJECT, PREDICATE, OBJECT, GRAPH = range(4)
+
+
+def _numeric_literal(term: Any) -> Optional[Tuple[float, int]]:
+    """(value, type code) when a literal round-trips exactly through float64, else None"""
+    if not isinstance(term, Literal) or term.language:
+        return None
+    code = NUMERIC_CODES.get(term.datatype)
+    if code is None:
+        return None
+    native = term.value
+    if isinstance(native, int) and not isinstance(native, bool):
+        # Exact below 2**53; the lexical form must be the canonical one
+        return (float(native), code) if abs(native) < 2 ** 53 and str(term) == str(native) else None
+    if isinstance(native, float):
+        # rdflib writes doubles with repr(); NaN never compares equal, keep it as a term
+        return (native, code) if native == native and str(term) == repr(native) else None
+    if native is None:
+        return None
+    value = float(native)
+    return (value, code) if str(_decode_number(value, code)) == str(term) else None
+
+
+def _decode_number(value: float, code: int) -> Literal:
+    datatype, convert = NUMERIC_TYPES[code]
+    return Literal(convert(value), datatype=datatype)
+
+
+class CompactStore(Store):
+    """rdflib Store on NumPy id columns (in memory)"""
+
+    context_aware = True
+    formula_aware = False
+    transaction_aware = False
+    graph_aware = True
+    # Reads copy matching id rows out under the store lock, so iterating alongside writers is safe
+    concurrent_reads = True
+
+    def __init__(self, configuration: Optional[str] = None, identifier: Any = None):
+        # Term dictionary: id -> value string, kind; literal datatype/language by id
+        self._values: List[str] = []
+        self._kinds = np.zeros(INITIAL_CAPACITY, dtype=np.uint8)
+        self._literal_meta: Dict[int, Tuple[str, str]] = {}
+        self._uri_ids: Dict[str, int] = {}
+        self._bnode_ids: Dict[str, int] = {}
+        self._literal_ids: Dict[Tuple[str, str, str], int] = {}
+
+        # Quad columns; an object id < 0 refers to numeric slot -(id + 1)
+        self._columns = np.zeros((4, INITIAL_CAPACITY), dtype=np.int32)
+        self._alive = np.zeros(INITIAL_CAPACITY, dtype=bool)
+        self._numbers = np.zeros(INITIAL_CAPACITY, dtype=np.float64)
+        self._number_types = np.zeros(INITIAL_CAPACITY, dtype=np.uint8)
+        self._rows = 0
+        self._slots = 0
+        self._dead = 0
+
+        # Sorted subject/object indexes over rows [0, _sealed); the tail is scanned
+        self._sealed = 0
+        self._order: Dict[int, np.ndarray] = {SUBJECT: np.zeros(0, np.int32), OBJECT: np.zeros(0, np.int32)}
+        self._keys: Dict[int, np.ndarray] = {SUBJECT: np.zeros(0, np.int32), OBJECT: np.zeros(0, np.int32)}
+
+        self._distinct: Optional[int] = 0
+        self._graph_ids: set = set()
+        self._graphs: Dict[Any, Graph] = {}
+        self._prefixes: Dict[str, URIRef] = {}
+        self._namespaces: Dict[URIRef, str] = {}
+        self._lock = threading.RLock()
+        super().__init__(configuration, identifier)
+
+    def open(self, configuration: str, create: bool = True) -> int:
+        return VALID_STORE
+
+    # Term dictionary -----------------------------------------------------
+
+    def _lookup(self, term: Any, create: bool = False) -> Optional[int]:
+        if type(term) is URIRef:  # the common case, without the isinstance chain
+            table, key, kind = self._uri_ids, str(term), URI
+        elif isinstance(term, Literal):
+            table, key, kind = self._literal_ids, (str(term), str(term.datatype or ""), term.language or ""), LITERAL
+        elif isinstance(term, BNode):
+            table, key, kind = self._bnode_ids, str(term), BLANK
+        elif isinstance(term, URIRef):
+            table, key, kind = self._uri_ids, str(term), URI
+        else:
+            raise TypeError(f"Unsupported term type: {type(term).__name__}")
+        term_id = table.get(key)
+        if term_id is None and create:
+            term_id = table[key] = len(self._values)
+            if term_id >= len(self._kinds):
+                self._kinds = np.resize(self._kinds, 2 * len(self._kinds))
+            self._kinds[term_id] = kind
+            if kind == LITERAL:
+                self._values.append(key[0])
+                if key[1] or key[2]:
+                    self._literal_meta[term_id] = key[1:]
+            else:
+                self._values.append(key)
+        return term_id
+
+    def _term(self, term_id: int, dictionary: Optional[tuple] = None) -> Any:
+        values, kinds, literal_meta = (dictionary or self._dictionary())[:3]
+        kind, value = kinds[term_id], values[term_id]
+        if kind == URI:
+            return URIRef(value)
+        if kind == BLANK:
+            return BNode(value)
+        datatype, lang = literal_meta.get(term_id, ("", ""))
+        return Literal(value, lang=lang or None, datatype=URIRef(datatype) if datatype else None)
+
+    def _object(self, object_id: int, dictionary: Optional[tuple] = None) -> Any:
+        dictionary = dictionary or self._dictionary()
+        if object_id >= 0:
+            return self._term(object_id, dictionary)
+        slot = -object_id - 1
+        return _decode_number(float(dictionary[3][slot]), int(dictionary[4][slot]))
+
+    def _dictionary(self) -> tuple:
+        """Term and numeric tables as of now
+
+        Writes only append to these and _rebuild replaces them, so ids read
+        together with this tuple stay decodable after the lock is released.
+        """
+        return self._values, self._kinds, self._literal_meta, self._numbers, self._number_types
+
+    def _graph(self, identifier: Any) -> Graph:
+        graph = self._graphs.get(identifier)
+        if graph is None:
+            graph = self._graphs[identifier] = Graph(store=self, identifier=identifier)
+        return graph
+
+    # Row lookup ----------------------------------------------------------
+
+    def _grow(self):
+        capacity = 2 * self._columns.shape[1]
+        columns = np.zeros((4, capacity), dtype=np.int32)
+        columns[:, :self._rows] = self._columns[:, :self._rows]
+        self._columns = columns
+        self._alive = np.resize(self._alive, capacity)
+        self._alive[self._rows:] = False
+
+    def _seal(self):
+        """Merge the unsorted tail into the subject/object indexes"""
+        rows = self._rows
+        for column in (SUBJECT, OBJECT):
+            tail = np.arange(self._sealed, rows, dtype=np.int32)
+            order = np.concatenate([self._order[column], tail])
+            keys = np.concatenate([self._keys[column], self._columns[column, self._sealed:rows]])
+            # Two runs (sorted prefix + tail): the stable sort merges them in linear time
+            permutation = np.argsort(keys, kind="stable")
+            self._order[column] = order[permutation]
+            self._keys[column] = keys[permutation]
+        self._sealed = rows
+
+    def _rows_where(self, column: int, value: int) -> np.ndarray:
+        """Live rows whose ``column`` equals ``value`` (subject/object via the index)"""
+        value = np.int32(value)  # a Python int would make searchsorted upcast (copy) the keys
+        if column in self._order:
+            keys = self._keys[column]
+            lo, hi = keys.searchsorted(value, "left"), keys.searchsorted(value, "right")
+            tail = np.flatnonzero(self._columns[column, self._sealed:self._rows] == value) + self._sealed
+            rows = np.concatenate([self._order[column][lo:hi], tail.astype(np.int32)])
+        else:
+            rows = np.flatnonzero(self._columns[column, :self._rows] == value)
+        return rows[self._alive[rows]]
+
+    def _numeric_rows(self, value: float, code: int) -> np.ndarray:
+        slots = np.flatnonzero((self._numbers[:self._slots] == value) & (self._number_types[:self._slots] == code))
+        if not len(slots):
+            return np.zeros(0, dtype=np.int64)
+        rows = np.flatnonzero(np.isin(self._columns[OBJECT, :self._rows], -(slots + 1)))
+        return rows[self._alive[rows]]
+
+    def _match(self, triple_pattern: Tuple[Any, Any, Any], context: Any) -> Optional[np.ndarray]:
+        """Rows matching a pattern, or None when a bound term is unknown"""
+        subject, predicate, obj = triple_pattern
+        bound = {}
+        for column, term in ((SUBJECT, subject), (PREDICATE, predicate), (GRAPH, _context_id(context))):
+            if term is not None:
+                term_id = self._lookup(term)
+                if term_id is None:
+                    return None
+                bound[column] = term_id
+
+        number = _numeric_literal(obj) if obj is not None else None
+        if obj is not None and number is None:
+            term_id = self._lookup(obj)
+            if term_id is None:
+                return None
+            bound[OBJECT] = term_id
+
+        if SUBJECT in bound:
+            rows = self._rows_where(SUBJECT, bound.pop(SUBJECT))
+        elif OBJECT in bound:
+            rows = self._rows_where(OBJECT, bound.pop(OBJECT))
+        elif number is not None:
+            rows, number = self._numeric_rows(*number), None
+        else:
+            rows = np.flatnonzero(self._alive[:self._rows])
+
+        for column, term_id in bound.items():
+            rows = rows[self._columns[column, rows] == term_id]
+        if number is not None:
+            objects = self._columns[OBJECT, rows]
+            slots = np.where(objects < 0, -objects - 1, 0)
+            rows = rows[(objects < 0) & (self._numbers[slots] == number[0]) & (self._number_types[slots] == number[1])]
+        return rows
+
+    def _triple_keys(self, rows: np.ndarray) -> List[Tuple[int, int, Any]]:
+        """Hashable (s, p, o) keys; numeric objects compare by value and type"""
+        s, p, o = self._columns[SUBJECT, rows], self._columns[PREDICATE, rows], self._columns[OBJECT, rows]
+        slots = np.where(o < 0, -o - 1, 0)
+        numbers, types = self._numbers[slots], self._number_types[slots]
+        return [(si, pi, oi if oi >= 0 else (float(v), int(t)))
+                for si, pi, oi, v, t in zip(s.tolist(), p.tolist(), o.tolist(), numbers.tolist(), types.tolist())]
+
+    # Writes --------------------------------------------------------------
+
+    def add(self, triple: Tuple[Any, Any, Any], context: Any, quoted: bool = False):
+        Store.add(self, triple, context, quoted)
+        self.addN([(*triple, context)])
+
+    def addN(self, quads):
+        with self._lock:
+            for s, p, o, context in quads:
+                self._add_quad(s, p, o, _context_id(context))
+
+    def _add_quad(self, s: Any, p: Any, o: Any, graph_id: Any):
+        terms = len(self._values)
+        s_id, p_id, g_id = self._lookup(s, True), self._lookup(p, True), self._lookup(graph_id, True)
+        number = _numeric_literal(o)
+        o_id = None if number is not None else self._lookup(o, True)
+
+        if s_id < terms:
+            # Known subject: look for the same triple in this or another graph
+            rows = self._rows_where(SUBJECT, s_id)
+            rows = rows[self._columns[PREDICATE, rows] == p_id]
+            objects = self._columns[OBJECT, rows]
+            if number is None:
+                rows = rows[objects == o_id]
+            else:
+                slots = np.where(objects < 0, -objects - 1, 0)
+                rows = rows[(objects < 0) & (self._numbers[slots] == number[0])
+                            & (self._number_types[slots] == number[1])]
+            if len(rows) and np.any(self._columns[GRAPH, rows] == g_id):
+                return  # already in this graph
+        else:
+            rows = ()
+        if not len(rows) and self._distinct is not None:
+            self._distinct += 1
+
+        if number is not None:
+            if self._slots >= len(self._numbers):
+                self._numbers = np.resize(self._numbers, 2 * len(self._numbers))
+                self._number_types = np.resize(self._number_types, 2 * len(self._number_types))
+            self._numbers[self._slots], self._number_types[self._slots] = number
+            o_id = -self._slots - 1
+            self._slots += 1
+
+        if self._rows >= self._columns.shape[1]:
+            self._grow()
+        self._columns[:, self._rows] = (s_id, p_id, o_id, g_id)
+        self._alive[self._rows] = True
+        self._rows += 1
+        self._graph_ids.add(g_id)
+        if self._rows - self._sealed >= TAIL_ROWS:
+            self._seal()
+
+    def remove(self, triple_pattern: Tuple[Any, Any, Any], context: Any = None):
+        with self._lock:
+            rows = self._match(triple_pattern, context)
+            if rows is not None and len(rows):
+                self._kill(rows)
+
+    def _kill(self, rows: np.ndarray):
+        self._alive[rows] = False
+        self._dead += len(rows)
+        self._distinct = None  # recounted on the next len()
+        if self._dead > max(TAIL_ROWS, self._rows // 2):
+            self._rebuild()
+
+    def add_graph(self, graph: Graph):
+        with self._lock:
+            self._graph_ids.add(self._lookup(graph.identifier, True))
+
+    def remove_graph(self, graph: Graph):
+        with self._lock:
+            graph_id = self._lookup(_context_id(graph))
+            if graph_id is None:
+                return
+            self._graph_ids.discard(graph_id)
+            rows = np.flatnonzero(self._alive[:self._rows] & (self._columns[GRAPH, :self._rows] == graph_id))
+            if len(rows):
+                self._kill(rows)
+
+    def _rebuild(self):
+        """Drop dead rows, numeric slots and terms nothing refers to any more"""
+        live = np.flatnonzero(self._alive[:self._rows])
+        columns = self._columns[:, live]
+
+        numeric = columns[OBJECT] < 0
+        slots = -columns[OBJECT, numeric] - 1
+        numbers, number_types = self._numbers[slots], self._number_types[slots]
+        columns[OBJECT, numeric] = -np.arange(len(slots), dtype=np.int32) - 1
+
+        used = np.zeros(len(self._values), dtype=bool)
+        for column in (SUBJECT, PREDICATE, GRAPH):
+            used[columns[column]] = True
+        used[columns[OBJECT, ~numeric]] = True
+        used[list(self._graph_ids)] = True
+        keep = np.flatnonzero(used)
+        remap = np.full(len(self._values), -1, dtype=np.int32)
+        remap[keep] = np.arange(len(keep), dtype=np.int32)
+        for column in (SUBJECT, PREDICATE, GRAPH):
+            columns[column] = remap[columns[column]]
+        columns[OBJECT, ~numeric] = remap[columns[OBJECT, ~numeric]]
+
+        values, kinds, meta = self._values, self._kinds, self._literal_meta
+        self._values = [values[i] for i in keep.tolist()]
+        self._kinds = np.resize(kinds[keep], max(INITIAL_CAPACITY, 2 * len(keep)))
+        self._literal_meta = {int(remap[i]): m for i, m in meta.items() if used[i]}
+        self._uri_ids, self._bnode_ids, self._literal_ids = {}, {}, {}
+        for new_id, (value, kind) in enumerate(zip(self._values, self._kinds[:len(keep)].tolist())):
+            if kind == URI:
+                self._uri_ids[value] = new_id
+            elif kind == BLANK:
+                self._bnode_ids[value] = new_id
+            else:
+                self._literal_ids[(value, *self._literal_meta.get(new_id, ("", "")))] = new_id
+        self._graph_ids = {int(remap[i]) for i in self._graph_ids}
+
+        capacity = max(INITIAL_CAPACITY, 2 * len(live))
+        self._columns = np.zeros((4, capacity), dtype=np.int32)
+        self._columns[:, :len(live)] = columns
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._alive[:len(live)] = True
+        self._numbers = np.resize(numbers, max(INITIAL_CAPACITY, 2 * len(slots)))
+        self._number_types = np.resize(number_types, len(self._numbers))
+        self._rows, self._slots, self._dead = len(live), len(slots), 0
+        self._sealed = 0
+        for column in (SUBJECT, OBJECT):
+            self._order[column] = np.zeros(0, np.int32)
+            self._keys[column] = np.zeros(0, np.int32)
+        self._seal()
+
+    # Reads ---------------------------------------------------------------
+
+    def triples(self, triple_pattern: Tuple[Any, Any, Any], context: Any = None
+                ) -> Iterator[Tuple[Tuple[Any, Any, Any], Iterator[Any]]]:
+        # Only the matching id rows are copied under the lock; terms are built
+        # a chunk at a time as the caller consumes them
+        with self._lock:
+            rows = self._match(triple_pattern, context)
+            if rows is None or not len(rows):
+                return
+            ids = self._columns[:, rows]
+            dictionary = self._dictionary()
+            graphs = {graph_id: self._graph(self._term(graph_id)) for graph_id in np.unique(ids[GRAPH]).tolist()}
+
+        if context is None:
+            # Union view: one result per distinct triple with every graph holding it
+            order, starts = self._group_triples(ids, dictionary)
+            ids = ids[:, order]
+        else:
+            starts = np.arange(ids.shape[1])
+        ends = np.append(starts[1:], ids.shape[1])
+        for first in range(0, len(starts), TRIPLE_CHUNK_ROWS):
+            chunk = slice(first, first + TRIPLE_CHUNK_ROWS)
+            heads = ids[:GRAPH, starts[chunk]].T.tolist()
+            for (s, p, o), start, end in zip(heads, starts[chunk].tolist(), ends[chunk].tolist()):
+                yield ((self._term(s, dictionary), self._term(p, dictionary), self._object(o, dictionary)),
+                       iter([graphs[graph_id] for graph_id in ids[GRAPH, start:end].tolist()]))
+
+    @staticmethod
+    def _group_triples(ids: np.ndarray, dictionary: tuple) -> Tuple[np.ndarray, np.ndarray]:
+        """Stable order putting equal (s, p, o) together, and where each group starts
+
+        Numeric objects in different slots are equal when value and type are.
+        """
+        objects = ids[OBJECT].astype(np.int64)
+        numeric = np.flatnonzero(objects < 0)
+        if len(numeric):
+            slots = -objects[numeric] - 1
+            by_value = np.lexsort((dictionary[4][slots], dictionary[3][slots]))
+            values, types = dictionary[3][slots[by_value]], dictionary[4][slots[by_value]]
+            changed = np.ones(len(slots), dtype=bool)
+            changed[1:] = (values[1:] != values[:-1]) | (types[1:] != types[:-1])
+            canonical = np.empty(len(slots), dtype=np.int64)
+            canonical[by_value] = np.flatnonzero(changed)[np.cumsum(changed) - 1]
+            objects[numeric] = -canonical - 1
+        order = np.lexsort((objects, ids[PREDICATE], ids[SUBJECT]))
+        keys = (ids[SUBJECT, order], ids[PREDICATE, order], objects[order])
+        changed = np.ones(len(order), dtype=bool)
+        changed[1:] = np.any([key[1:] != key[:-1] for key in keys], axis=0)
+        return order, np.flatnonzero(changed)
+
+    def __len__(self, context: Any = None) -> int:
+        with self._lock:
+            if context is not None:
+                graph_id = self._lookup(_context_id(context))
+                if graph_id is None:
+                    return 0
+                return int(np.count_nonzero(self._alive[:self._rows] & (self._columns[GRAPH, :self._rows] == graph_id)))
+            if self._distinct is None:
+                rows = np.flatnonzero(self._alive[:self._rows])
+                self._distinct = len(set(self._triple_keys(rows)))
+            return self._distinct
+
+    def contexts(self, triple: Optional[Tuple[Any, Any, Any]] = None) -> Iterator[Any]:
+        with self._lock:
+            if triple is None or triple == (None, None, None):
+                graph_ids = list(self._graph_ids)
+            else:
+                rows = self._match(triple, None)
+                graph_ids = [] if rows is None else np.unique(self._columns[GRAPH, rows]).tolist()
+            identifiers = [self._term(graph_id) for graph_id in graph_ids]
+        yield from identifiers
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Bytes held by the id columns, numeric columns and indexes"""
+        arrays = (self._columns.nbytes + self._alive.nbytes + self._kinds.nbytes,
+                  self._numbers.nbytes + self._number_types.nbytes,
+                  sum(a.nbytes for a in self._order.values()) + sum(a.nbytes for a in self._keys.values()))
+        return {"statements": self._rows - self._dead, "terms": len(self._values),
+                "columns": arrays[0], "numbers": arrays[1], "indexes": arrays[2]}
+
+    # Namespaces ----------------------------------------------------------
+
+    def bind(self, prefix: str, namespace: URIRef, override: bool = True):
+        namespace = URIRef(namespace)
+        with self._lock:
+            if not override and (prefix in self._prefixes or namespace in self._namespaces):
+                return
+            old_namespace = self._prefixes.pop(prefix, None)
+            if old_namespace is not None:
+                self._namespaces.pop(old_namespace, None)
+            old_prefix = self._namespaces.pop(namespace, None)
+            if old_prefix is not None:
+                self._prefixes.pop(old_prefix, None)
+            self._prefixes[prefix] = namespace
+            self._namespaces[namespace] = prefix
+
+    def namespace(self, prefix: str) -> Optional[URIRef]:
+        return self._prefixes.get(prefix)
+
+    def prefix(self, namespace: URIRef) -> Optional[str]:
+        return self._namespaces.get(URIRef(namespace))
+
+    def namespaces(self) -> Iterator[Tuple[str, URIRef]]:
+        yield from list(self._prefixes.items())
@@ -13,14 +13,10 @@ import dash_bootstrap_components as dbc
 from dash import dcc, html, Dash, Input, Output, State, callback_context
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import plotly.express as px
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import json
-import asyncio
-from threading import Thread
-import queue
 
 # Import the enhanced ontology system
 from enhanced_ontology_system import (
@@ -32,6 +28,12 @@ from enhanced_ontology_system import (
     config,
     enhanced_engine
 )
+from analysis_jobs import JobExecutor, JobRejected, register_job_routes, request_session
+from bar_store import period_start
+from instrumentation import metrics, register_metrics_routes
+from report_views import PANEL_FIELDS, report_views
+from ontology_export import register_export_routes
+from price_series import register_price_routes
 
 # Custom CSS for enhanced styling
 custom_css = """
@@ -174,9 +176,20 @@ app = Dash(
     title="Enhanced Ontology-Driven Trading Dashboard"
 )
 
+# Shared analysis executor: bounded pool on one event loop, results scoped to the session.
+# Finished reports are split into per-panel slices once, before they are delivered
+analysis_jobs = JobExecutor(enhanced_engine, config, present=report_views)
+
+# Flask server (gunicorn entry point) with /metrics, /metrics.json, /ontology/export,
+# /jobs/<id>/events and /prices/<symbol>
+server = app.server
+register_metrics_routes(server, metrics)
+register_export_routes(server, enhanced_engine)
+register_job_routes(server, analysis_jobs)
+register_price_routes(server, enhanced_engine)
+
 # Global variables for real-time updates
 real_time_data = {}
-analysis_queue = queue.Queue()
 
 # Layout Components
 def create_header():
@@ -517,9 +530,11 @@ app.layout = dbc.Container([
     # Ontology Visualization
     create_ontology_visualization(),
     
-    # Hidden divs for data storage
-    html.Div(id="analysis-data", style={"display": "none"}),
+    # Report slices (one store per panel) and hidden divs for data storage
+    *[dcc.Store(id=f"report-{panel}") for panel in PANEL_FIELDS],
     html.Div(id="real-time-data", style={"display": "none"}),
+    dcc.Store(id="job-id"),
+    dcc.Store(id="job-status"),
     
     # Interval component for real-time updates
     dcc.Interval(
@@ -539,70 +554,93 @@ app.layout = dbc.Container([
 
 # Callback Functions
 
+IDLE_BUTTON = [html.I(className="fas fa-play mr-2"), "Start Analysis"]
+BUSY_BUTTON = [html.I(className="fas fa-spinner fa-spin mr-2"), "Analyzing..."]
+
 @app.callback(
     [Output("analysis-progress", "children"),
      Output("analyze-button", "disabled"),
-     Output("analyze-button", "children")],
+     Output("analyze-button", "children"),
+     Output("job-id", "data")],
     Input("analyze-button", "n_clicks"),
+    Input("job-status", "data"),
     State("stock-input", "value"),
     State("time-range", "value"),
     State("interval", "value"),
     State("analysis-mode", "value")
 )
-def start_analysis(n_clicks, symbol, time_range, interval, analysis_mode):
-    """Handle analysis initiation"""
+def start_analysis(n_clicks, job_status, symbol, time_range, interval, analysis_mode):
+    """Submit analyses to the shared executor; re-arm the button when the job is delivered"""
+    triggered = callback_context.triggered[0]["prop_id"] if callback_context.triggered else ""
+    
+    if triggered.startswith("job-status"):
+        expired = (job_status or {}).get("status") == "gone"
+        message = "Analysis result expired - please run it again" if expired else ""
+        return message, False, IDLE_BUTTON, None
+    
     if not n_clicks:
-        return "", False, [html.I(className="fas fa-play mr-2"), "Start Analysis"]
+        return "", False, IDLE_BUTTON, None
     
     if not symbol:
-        return "Please enter a stock symbol", False, [html.I(className="fas fa-play mr-2"), "Start Analysis"]
+        return "Please enter a stock symbol", False, IDLE_BUTTON, None
     
-    # Start analysis in background thread
-    thread = Thread(target=run_analysis, args=(symbol, time_range, interval, analysis_mode))
-    thread.start()
+    try:
+        job_id = analysis_jobs.submit(request_session(), symbol, time_range, interval, analysis_mode)
+    except JobRejected:
+        return "The server is busy with other analyses - please try again shortly", False, IDLE_BUTTON, None
     
     return [
         html.Div([
             html.Div(className="loading-spinner"),
-            html.P("Analyzing... This may take a moment.", className="text-center mt-2")
+            html.P("Analyzing... This may take a moment.", id="analysis-progress-text", className="text-center mt-2")
         ]),
         True,
-        [html.I(className="fas fa-spinner fa-spin mr-2"), "Analyzing..."]
+        BUSY_BUTTON,
+        job_id
     ]
 
-def run_analysis(symbol, time_range, interval, analysis_mode):
-    """Run analysis in background thread"""
-    try:
-        # Run the enhanced analysis
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        if analysis_mode == "full":
-            result = loop.run_until_complete(enhanced_engine.analyze_symbol(symbol, time_range, interval))
-        else:
-            # Simplified analysis for other modes
-            result = loop.run_until_complete(enhanced_engine.analyze_symbol(symbol, time_range, interval))
-        
-        # Put result in queue
-        analysis_queue.put(result)
-        
-    except Exception as e:
-        analysis_queue.put({"error": str(e), "symbol": symbol})
-
-@app.callback(
-    [Output("analysis-data", "children"),
-     Output("analyze-button", "disabled"),
-     Output("analyze-button", "children"),
-     Output("analysis-progress", "children")],
-    Input("real-time-interval", "n_intervals")
+# Completed jobs are pushed over Server-Sent Events (/jobs/<id>/events); the
+# browser holds one stream per pending job instead of polling, parses the
+# result once and fans the slices out to the panel stores
+app.clientside_callback(
+    """
+    function(jobId) {
+        if (!jobId) {
+            return window.dash_clientside.no_update;
+        }
+        var clientside = window.dash_clientside;
+        var panels = %s;
+        var unchanged = panels.map(function() { return clientside.no_update; });
+        return new Promise(function(resolve) {
+            // The session cookie goes with the request; EventSource cannot set headers
+            var source = new EventSource("/jobs/" + jobId + "/events");
+            source.addEventListener("status", function(event) {
+                if (clientside.set_props && JSON.parse(event.data).status === "running") {
+                    clientside.set_props("analysis-progress-text", {children: "Analysis running..."});
+                }
+            });
+            source.addEventListener("result", function(event) {
+                source.close();
+                var views = JSON.parse(event.data);
+                var slices = panels.map(function(panel) { return views[panel] || {}; });
+                resolve(slices.concat([{job_id: jobId, status: "done"}]));
+            });
+            source.addEventListener("gone", function() {
+                source.close();
+                resolve(unchanged.concat([{job_id: jobId, status: "gone"}]));
+            });
+            source.onerror = function() {
+                // Reconnects are automatic; only a refused stream ends here
+                if (source.readyState === EventSource.CLOSED) {
+                    resolve(unchanged.concat([{job_id: jobId, status: "gone"}]));
+                }
+            };
+        });
+    }
+    """ % json.dumps(list(PANEL_FIELDS)),
+    [Output(f"report-{panel}", "data") for panel in PANEL_FIELDS] + [Output("job-status", "data")],
+    Input("job-id", "data")
 )
-def check_analysis_completion(n_intervals):
-    """Check for completed analysis"""
-    try:
-        result = analysis_queue.get_nowait()
-        return json.dumps(result), False, [html.I(className="fas fa-play mr-2"), "Start Analysis"], ""
-    except queue.Empty:
-        return dash.no_update, dash.no_update, dash.no_update, dash.no_update
 
 @app.callback(
     [Output("market-state-value", "children"),
@@ -612,16 +650,14 @@ def check_analysis_completion(n_intervals):
      Output("risk-value", "children"),
      Output("score-value", "children"),
      Output("score-description", "children")],
-    Input("analysis-data", "children")
+    Input("report-metrics", "data")
 )
-def update_metrics(analysis_data):
+def update_metrics(data):
     """Update main metrics display"""
-    if not analysis_data:
+    if not data:
         return ["--"] * 7
     
     try:
-        data = json.loads(analysis_data)
-        
         # Market State
         market_state = data.get("market_context", {}).get("market_state", "unknown")
         market_state_class = "status-bullish" if "bull" in market_state else "status-bearish" if "bear" in market_state else "status-neutral"
@@ -652,28 +688,53 @@ def update_metrics(analysis_data):
     except Exception as e:
         return [f"Error: {str(e)}"] + ["--"] * 6
 
+def zoom_window(relayout_data):
+    """Visible x range from a graph's relayoutData: (start, end), None for autorange, or no change"""
+    relayout_data = relayout_data or {}
+    if "xaxis.range[0]" in relayout_data:
+        return relayout_data["xaxis.range[0]"], relayout_data["xaxis.range[1]"]
+    if "xaxis.range" in relayout_data:
+        return tuple(relayout_data["xaxis.range"])
+    if relayout_data.get("xaxis.autorange"):
+        return None
+    return dash.no_update
+
 @app.callback(
     Output("main-price-chart", "figure"),
-    Input("analysis-data", "children")
+    Input("report-main-chart", "data"),
+    Input("main-price-chart", "relayoutData")
 )
-def update_main_chart(analysis_data):
-    """Update main price chart"""
-    if not analysis_data:
+def update_main_chart(data, relayout_data):
+    """Update main price chart from the stored bars, decimated server-side to the visible range"""
+    if not data:
         return go.Figure().update_layout(title="No data available", template="plotly_dark")
     
+    zoomed = callback_context.triggered and callback_context.triggered[0]["prop_id"].endswith("relayoutData")
+    visible = zoom_window(relayout_data) if zoomed else None
+    if visible is dash.no_update:
+        return dash.no_update
+    start, end = visible or (None, None)
+    
     try:
-        data = json.loads(analysis_data)
+        symbol = data.get("symbol", "Stock")
+        request = data.get("request", {})
+        series = enhanced_engine.price_series(
+            symbol, request.get("period", "1y"), request.get("interval", "1d"),
+            width=1000, method="ohlc", start=start, end=end
+        )
+        columns = series["columns"]
         
-        # Create enhanced candlestick chart
+        # Candles re-aggregated per bucket keep the true high/low of every span
         fig = go.Figure()
-        
-        # Add candlestick (placeholder - would need actual OHLC data)
-        fig.add_trace(go.Scatter(
-            x=[1, 2, 3, 4, 5],
-            y=[100, 102, 98, 105, 103],
-            mode='lines+markers',
-            name=f"{data.get('symbol', 'Stock')} Price",
-            line=dict(color='#00d4ff', width=2)
+        fig.add_trace(go.Candlestick(
+            x=columns["t"].astype("datetime64[ms]"),
+            open=columns["open"],
+            high=columns["high"],
+            low=columns["low"],
+            close=columns["close"],
+            name=f"{symbol} Price",
+            increasing_line_color="#00d4ff",
+            decreasing_line_color="#ff6b6b"
         ))
         
         # Add support and resistance levels
@@ -688,11 +749,18 @@ def update_main_chart(analysis_data):
             fig.add_hline(y=level, line_dash="dash", line_color="red",
                          annotation_text=f"Resistance {i+1}: {level:.2f}")
         
+        shown = len(columns["t"])
+        title = f"{symbol} Price Analysis"
+        if shown < series["bars"]:
+            title += f" ({series['bars']:,} bars shown as {shown:,})"
         fig.update_layout(
-            title=f"{data.get('symbol', 'Stock')} Price Analysis",
+            title=title,
             template="plotly_dark",
             height=500,
-            showlegend=True
+            showlegend=True,
+            xaxis_rangeslider_visible=False,
+            # Keep the user's zoom while re-decimated data is swapped in
+            uirevision=f"{symbol}-{request.get('period')}-{request.get('interval')}"
         )
         
         return fig
@@ -700,17 +768,136 @@ def update_main_chart(analysis_data):
     except Exception as e:
         return go.Figure().update_layout(title=f"Error: {str(e)}", template="plotly_dark")
 
+def indicator_columns(data, relayout_data):
+    """Cached indicator history for the analysed window, following the price chart's zoom"""
+    zoomed = callback_context.triggered and callback_context.triggered[0]["prop_id"].endswith("relayoutData")
+    visible = zoom_window(relayout_data) if zoomed else None
+    if visible is dash.no_update:
+        return dash.no_update
+    request = data.get("request", {})
+    start, end = visible or (period_start(request.get("period", "1y")), None)
+    columns = enhanced_engine.indicator_window(
+        data.get("symbol"), request.get("interval", "1d"), start=start, end=end, width=800
+    )
+    columns["x"] = columns["t"].astype("datetime64[ms]")
+    return columns
+
+def indicator_figure(data, title, height):
+    """Shared styling for the indicator chart family (uirevision keeps zoom across redraws)"""
+    request = data.get("request", {})
+    return dict(
+        title=title,
+        template="plotly_dark",
+        height=height,
+        margin=dict(l=40, r=20, t=40, b=30),
+        legend=dict(orientation="h", y=1.02, x=0),
+        uirevision=f"{data.get('symbol')}-{request.get('period')}-{request.get('interval')}"
+    )
+
+@app.callback(
+    Output("indicators-chart", "figure"),
+    Input("report-indicators", "data"),
+    Input("main-price-chart", "relayoutData")
+)
+def update_indicators_chart(data, relayout_data):
+    """Moving averages, RSI and MACD from the indicator series cache"""
+    if not data:
+        return go.Figure().update_layout(title="No data available", template="plotly_dark")
+    
+    try:
+        columns = indicator_columns(data, relayout_data)
+        if columns is dash.no_update:
+            return dash.no_update
+        x = columns["x"]
+        
+        fig = make_subplots(rows=3, cols=1, shared_xaxes=True, row_heights=[0.5, 0.25, 0.25],
+                            vertical_spacing=0.04)
+        fig.add_trace(go.Scatter(x=x, y=columns["close"], name="Close", line=dict(color="#00d4ff", width=1.5)), row=1, col=1)
+        for name, color in (("sma_20", "#ffd166"), ("sma_50", "#f78c6b"), ("sma_200", "#9b5de5")):
+            fig.add_trace(go.Scatter(x=x, y=columns[name], name=name.upper().replace("_", " "),
+                                     line=dict(color=color, width=1)), row=1, col=1)
+        
+        fig.add_trace(go.Scatter(x=x, y=columns["rsi"], name="RSI", line=dict(color="#06d6a0", width=1)), row=2, col=1)
+        fig.add_hline(y=70, line_dash="dot", line_color="red", row=2, col=1)
+        fig.add_hline(y=30, line_dash="dot", line_color="green", row=2, col=1)
+        
+        fig.add_trace(go.Bar(x=x, y=columns["macd_hist"], name="MACD Hist", marker_color="#6c757d"), row=3, col=1)
+        fig.add_trace(go.Scatter(x=x, y=columns["macd"], name="MACD", line=dict(color="#00d4ff", width=1)), row=3, col=1)
+        fig.add_trace(go.Scatter(x=x, y=columns["macd_signal"], name="Signal", line=dict(color="#ff6b6b", width=1)), row=3, col=1)
+        
+        fig.update_layout(**indicator_figure(data, f"{data.get('symbol', 'Stock')} Indicators", 500))
+        return fig
+        
+    except Exception as e:
+        return go.Figure().update_layout(title=f"Error: {str(e)}", template="plotly_dark")
+
+@app.callback(
+    Output("volume-momentum-chart", "figure"),
+    Input("report-indicators", "data"),
+    Input("main-price-chart", "relayoutData")
+)
+def update_volume_momentum_chart(data, relayout_data):
+    """Volume with money flow and stochastic momentum from the indicator series cache"""
+    if not data:
+        return go.Figure().update_layout(title="No data available", template="plotly_dark")
+    
+    try:
+        columns = indicator_columns(data, relayout_data)
+        if columns is dash.no_update:
+            return dash.no_update
+        x = columns["x"]
+        
+        fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.5, 0.5], vertical_spacing=0.06)
+        fig.add_trace(go.Bar(x=x, y=columns["volume"], name="Volume", marker_color="#00d4ff"), row=1, col=1)
+        fig.add_trace(go.Scatter(x=x, y=columns["mfi"], name="MFI", line=dict(color="#ffd166", width=1)), row=2, col=1)
+        fig.add_trace(go.Scatter(x=x, y=columns["stoch_k"], name="%K", line=dict(color="#06d6a0", width=1)), row=2, col=1)
+        fig.add_trace(go.Scatter(x=x, y=columns["stoch_d"], name="%D", line=dict(color="#ff6b6b", width=1)), row=2, col=1)
+        
+        fig.update_layout(**indicator_figure(data, "Volume & Momentum", 300))
+        return fig
+        
+    except Exception as e:
+        return go.Figure().update_layout(title=f"Error: {str(e)}", template="plotly_dark")
+
+@app.callback(
+    Output("volatility-chart", "figure"),
+    Input("report-indicators", "data"),
+    Input("main-price-chart", "relayoutData")
+)
+def update_volatility_chart(data, relayout_data):
+    """ATR, return volatility and directional movement from the indicator series cache"""
+    if not data:
+        return go.Figure().update_layout(title="No data available", template="plotly_dark")
+    
+    try:
+        columns = indicator_columns(data, relayout_data)
+        if columns is dash.no_update:
+            return dash.no_update
+        x = columns["x"]
+        
+        fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.5, 0.5], vertical_spacing=0.06)
+        fig.add_trace(go.Scatter(x=x, y=columns["atr_pct"], name="ATR %", line=dict(color="#f78c6b", width=1)), row=1, col=1)
+        fig.add_trace(go.Scatter(x=x, y=columns["volatility"], name="Return Vol %", line=dict(color="#9b5de5", width=1)), row=1, col=1)
+        fig.add_trace(go.Scatter(x=x, y=columns["adx"], name="ADX", line=dict(color="#ffd166", width=1)), row=2, col=1)
+        fig.add_trace(go.Scatter(x=x, y=columns["plus_di"], name="+DI", line=dict(color="#06d6a0", width=1)), row=2, col=1)
+        fig.add_trace(go.Scatter(x=x, y=columns["minus_di"], name="-DI", line=dict(color="#ff6b6b", width=1)), row=2, col=1)
+        
+        fig.update_layout(**indicator_figure(data, "Volatility Analysis", 300))
+        return fig
+        
+    except Exception as e:
+        return go.Figure().update_layout(title=f"Error: {str(e)}", template="plotly_dark")
+
 @app.callback(
     Output("ontology-insights", "children"),
-    Input("analysis-data", "children")
+    Input("report-ontology", "data")
 )
-def update_ontology_insights(analysis_data):
+def update_ontology_insights(data):
     """Update ontology insights panel"""
-    if not analysis_data:
+    if not data:
         return html.Div("No analysis data available")
     
     try:
-        data = json.loads(analysis_data)
         market_context = data.get("market_context", {})
         
         insights = [
@@ -763,15 +950,14 @@ def update_ontology_insights(analysis_data):
 
 @app.callback(
     Output("ml-insights", "children"),
-    Input("analysis-data", "children")
+    Input("report-ml", "data")
 )
-def update_ml_insights(analysis_data):
+def update_ml_insights(data):
     """Update ML insights panel"""
-    if not analysis_data:
+    if not data:
         return html.Div("No ML analysis data available")
     
     try:
-        data = json.loads(analysis_data)
         ml_analysis = data.get("ml_analysis", {})
         
         insights = [
@@ -813,15 +999,14 @@ def update_ml_insights(analysis_data):
 
 @app.callback(
     Output("risk-insights", "children"),
-    Input("analysis-data", "children")
+    Input("report-risk", "data")
 )
-def update_risk_insights(analysis_data):
+def update_risk_insights(data):
     """Update risk insights panel"""
-    if not analysis_data:
+    if not data:
         return html.Div("No risk analysis data available")
     
     try:
-        data = json.loads(analysis_data)
         risk_assessment = data.get("risk_assessment", {})
         
         risk_score = risk_assessment.get("risk_score", 0.5)
@@ -857,15 +1042,14 @@ def update_risk_insights(analysis_data):
 
 @app.callback(
     Output("trading-recommendations", "children"),
-    Input("analysis-data", "children")
+    Input("report-recommendations", "data")
 )
-def update_recommendations(analysis_data):
+def update_recommendations(data):
     """Update trading recommendations"""
-    if not analysis_data:
+    if not data:
         return html.Div("No recommendations available")
     
     try:
-        data = json.loads(analysis_data)
         recommendation = data.get("overall_recommendation", "hold")
         
         # Map recommendation to CSS class
@@ -915,15 +1099,14 @@ def toggle_realtime(n_clicks, current_disabled):
 
 @app.callback(
     Output("knowledge-stats", "children"),
-    Input("analysis-data", "children")
+    Input("report-knowledge", "data")
 )
-def update_knowledge_stats(analysis_data):
+def update_knowledge_stats(data):
     """Update knowledge graph statistics"""
-    if not analysis_data:
+    if not data:
         return "No knowledge graph data"
     
     try:
-        data = json.loads(analysis_data)
         knowledge_summary = data.get("knowledge_summary", {})
         
         stats = [
@@ -944,18 +1127,23 @@ def update_knowledge_stats(analysis_data):
 # Real-time update callback
 @app.callback(
     Output("real-time-data", "children"),
-    Input("real-time-interval", "n_intervals")
+    Input("real-time-interval", "n_intervals"),
+    State("stock-input", "value")
 )
-def update_real_time(n_intervals):
-    """Update real-time data"""
-    if n_intervals == 0:
+def update_real_time(n_intervals, symbol):
+    """Latest live bar for the selected symbol and the indicator signals it moves, streamed through the market data provider"""
+    symbol = (symbol or "").strip().upper()
+    if n_intervals == 0 or not symbol:
         return ""
     
-    # Here you would implement real-time data fetching
-    # For now, return a placeholder
+    # Subscribing is idempotent; the first tick starts the symbol's stream
+    enhanced_engine.live_feed.subscribe([symbol])
+    bar = enhanced_engine.live_feed.latest(symbol)
     return json.dumps({
         "timestamp": datetime.now().isoformat(),
-        "status": "real_time_update"
+        "status": "real_time_update" if bar else "waiting_for_stream",
+        "bar": bar,
+        "signals": enhanced_engine.live_indicator_signals(symbol)
     })
 
 # Initialize the enhanced dashboard
@@ -969,5 +1157,6 @@ if __name__ == "__main__":
     print("   • Enhanced Visualizations")
     print("   • Real-time Data Streaming")
     print("\n🔗 Dashboard will be available at: http://localhost:8050")
+    print("📈 Metrics: http://localhost:8050/metrics (Prometheus), /metrics.json")
     
     app.run_server(debug=True, port=8050, host="0.0.0.0")
\ No newline at end of file
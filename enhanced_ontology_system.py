@@ -23,13 +23,15 @@
         """Detect basic chart patterns"""
         patterns = []
         
-        # Simple moving average crossover detection
-        sma_short = pd.Series(prices).rolling(20).mean()
-        sma_long = pd.Series(prices).rolling(50).mean()
-        
-        if len(prices) >= 50:
+        # Simple moving average crossover detection - only the last two values of each
+        # average are needed, so average the trailing windows instead of rolling the history
+        # (the previous long average needs 51 bars to exist)
+        if len(prices) >= 51:
+            sma_short = (prices[-20:].mean(), prices[-21:-1].mean())
+            sma_long = (prices[-50:].mean(), prices[-51:-1].mean())
+            
             # Golden Cross (bullish)
-            if sma_short.iloc[-1] > sma_long.iloc[-1] and sma_short.iloc[-2] <= sma_long.iloc[-2]:
+            if sma_short[0] > sma_long[0] and sma_short[1] <= sma_long[1]:
                 patterns.append({
                     "type": "golden_cross",
                     "direction": "bullish",
@@ -38,7 +40,7 @@
                 })
             
             # Death Cross (bearish)
-            if sma_short.iloc[-1] < sma_long.iloc[-1] and sma_short.iloc[-2] >= sma_long.iloc[-2]:
+            if sma_short[0] < sma_long[0] and sma_short[1] >= sma_long[1]:
                 patterns.append({
                     "type": "death_cross",
                     "direction": "bearish", 
@@ -96,7 +98,8 @@
             "overall_score": 0.0,
             "overall_recommendation": "hold",
             "confidence": ontology_results.get("confidence_score", 0.5),
-            "ontology_graph": self.ontology.serialize(),
+            # Handle only - the serialized graph is fetched on demand via get_ontology_graph()
+            "ontology_graph": self._ontology_graph_handle(symbol),
             "knowledge_summary": self.ontology.get_knowledge_summary()
         }
         
@@ -131,6 +134,94 @@
         
         return report
     
+    def _ontology_graph_handle(self, symbol: str) -> Dict[str, Any]:
+        """Build a lightweight reference to this run's named graph for a report
+
+        The handle is the run graph identifier (see ontology_partitions.py), so it
+        keeps naming exactly the statements of this analysis until retention drops
+        the run; None when the ontology is not partitioned into runs.
+        """
+        from ontology_partitions import PartitionedGraph, active_run
+
+        run = active_run()
+        if run is None or not isinstance(self.ontology.graph, PartitionedGraph):
+            return {"symbol": symbol, "handle": None, "statements": None}
+        return {
+            "symbol": symbol,
+            "handle": str(run.identifier),
+            "statements": len(run.graph) if run.graph is not None else 0
+        }
+
+    def get_ontology_graph(self, symbol: Optional[str] = None, format: str = "turtle",
+                           handle: Optional[str] = None) -> str:
+        """Serialize the ontology graph on demand, scoped to one symbol or to a report's run handle
+
+        Raises KeyError when ``handle`` names a run graph that has expired.
+        """
+        if handle is not None:
+            return self._run_graph(handle).serialize(format=format)
+        if symbol is None:
+            return self.ontology.export_knowledge(format=format)
+        return self._symbol_subgraph(symbol).serialize(format=format)
+
+    def _run_graph(self, handle: str) -> "Graph":
+        from ontology_partitions import PartitionedGraph
+        graph = self.ontology.graph
+        run_graph = graph.run_graph(handle) if isinstance(graph, PartitionedGraph) else None
+        if run_graph is None:
+            raise KeyError(f"Ontology graph {handle!r} is not available (expired or unknown)")
+        return run_graph
+
+    def stream_ontology_graph(self, symbol: Optional[str] = None, format: str = "nt",
+                              compress: bool = False) -> "Iterator[bytes]":
+        """Serialize the ontology graph as byte chunks (N-Triples/N-Quads stream, optionally gzip)"""
+        from ontology_export import iter_export
+        graph = self.ontology.graph if symbol is None else self._symbol_subgraph(symbol)
+        return iter_export(graph, format=format, compress=compress)
+
+    def export_ontology_graph(self, destination: "BinaryIO", symbol: Optional[str] = None,
+                              format: str = "nt", compress: bool = False) -> int:
+        """Stream the ontology graph into a binary file object; returns bytes written"""
+        from ontology_export import write_export
+        graph = self.ontology.graph if symbol is None else self._symbol_subgraph(symbol)
+        return write_export(graph, destination, format=format, compress=compress)
+
+    def compact_ontology(self) -> Dict[str, int]:
+        """Drop expired run graphs from the ontology store"""
+        compact = getattr(self.ontology.graph, "compact", None)
+        return compact() if compact else {"graphs_dropped": 0}
+
+    def _symbol_subgraph(self, symbol: str) -> "Graph":
+        """Extract the statements describing a symbol and the nodes that reference it"""
+        from rdflib import Graph, Literal, URIRef
+        from ontology_partitions import PartitionedGraph
+        graph = self.ontology.graph
+        if isinstance(graph, PartitionedGraph):
+            # Everything an analysis states about a symbol lives in its run graphs
+            return graph.symbol_graph(symbol)
+
+        subgraph = Graph()
+        for prefix, namespace in graph.namespaces():
+            subgraph.bind(prefix, namespace)
+
+        # Symbol resources are identified by their URI suffix or a literal ticker value
+        anchors = {
+            node for node in graph.all_nodes()
+            if isinstance(node, URIRef) and str(node).rstrip("/").rsplit("/", 1)[-1].rsplit("#", 1)[-1] == symbol
+        }
+        anchors.update(s for s, _, _ in graph.triples((None, None, Literal(symbol))))
+
+        # One hop out: indicator/prediction/risk statements pointing at the symbol
+        subjects = set(anchors)
+        for anchor in anchors:
+            subjects.update(graph.subjects(None, anchor))
+
+        for subject in subjects:
+            for triple in graph.triples((subject, None, None)):
+                subgraph.add(triple)
+
+        return subgraph
+
     def _generate_technical_summary(self, ontology_results: Dict[str, Any]) -> Dict[str, Any]:
         """Generate technical analysis summary"""
         return {
@@ -180,14 +271,33 @@
             "anomaly_type": anomaly_results.get("anomaly_type", "none")
         }
     
-    def _cache_results(self, symbol: str, report: Dict[str, Any]):
-        """Cache analysis results"""
-        cache_key = f"analysis_{symbol}"
-        self.cache[cache_key] = {
-            "report": report,
-            "timestamp": datetime.now(),
-            "expiry": datetime.now() + timedelta(minutes=15)  # Cache for 15 minutes
-        }
+    @property
+    def result_cache(self) -> "AnalysisCache":
+        """Bounded LRU/TTL analysis result cache (memory or Redis backend)"""
+        if getattr(self, "_result_cache", None) is None:
+            from analysis_cache import create_analysis_cache
+            self._result_cache = create_analysis_cache(self.config)
+        return self._result_cache
+    
+    def _get_cached_result(self, symbol: str, period: str, interval: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached report for this symbol, period, interval and config"""
+        if not self.config.cache_enabled:
+            return None
+        from analysis_cache import make_cache_key
+        cached = self.result_cache.get(make_cache_key(symbol, period, interval, self.config))
+        metrics.inc("cache_requests_total", result="miss" if cached is None else "hit")
+        return cached
+    
+    def _cache_results(self, symbol: str, report: Dict[str, Any], period: str, interval: str):
+        """Cache analysis results under the symbol, period, interval and config that produced them"""
+        if not self.config.cache_enabled or "error" in report:
+            return
+        from analysis_cache import make_cache_key
+        self.result_cache.set(make_cache_key(symbol, period, interval, self.config), report)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Return cache hit/miss/eviction counters and backend usage"""
+        return self.result_cache.get_stats()
     
     def _error_result(self, symbol: str, error: str) -> Dict[str, Any]:
         """Generate error result"""
@@ -198,75 +308,264 @@
             "overall_recommendation": "error",
             "overall_score": 0.0
         }
+
+    async def analyze_batch(self, symbols: List[str], period: str = "1y",
+                            interval: str = "1d") -> "AsyncIterator[Dict[str, Any]]":
+        """Analyze many symbols concurrently, yielding reports as they finish
+
+        Fan-out is bounded by the engine's analysis slots, shared with the
+        dashboard job executor and any concurrent batch. A failure for one
+        symbol is reported through ``_error_result`` and never cancels the
+        rest of the batch.
+        """
+        async def _bounded(symbol: str) -> Dict[str, Any]:
+            async with self.analysis_slots:
+                try:
+                    return await self.analyze_symbol(symbol, period, interval)
+                except Exception as e:
+                    log_step(f"Batch analysis failed for {symbol}: {e}", "ERROR")
+                    return self._error_result(symbol, str(e))
+
+        unique_symbols = list(dict.fromkeys(s.strip() for s in symbols if s and s.strip()))
+        tasks = [asyncio.ensure_future(_bounded(symbol)) for symbol in unique_symbols]
+
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            # Consumer stopped early - don't leave orphaned analyses running
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    @property
+    def analysis_slots(self) -> "AnalysisSlots":
+        """Engine-wide bound of ``config.max_concurrent_analysis`` concurrent analyses, across event loops"""
+        if getattr(self, "_analysis_slots", None) is None:
+            from analysis_jobs import AnalysisSlots
+            self._analysis_slots = AnalysisSlots(self.config.max_concurrent_analysis)
+        return self._analysis_slots
+
+    def backtest(self, symbol: str, df: pd.DataFrame, allow_short: bool = False,
+                 cost_bps: float = 5.0, ml_confidence: Optional[np.ndarray] = None) -> "BacktestResult":
+        """Replay the inference chain over a stored OHLCV history (see backtest.py)
+
+        Without per-bar ``ml_confidence`` the ML weight is redistributed over
+        the other score components.
+        """
+        from backtest import run_backtest
+        return run_backtest(symbol, df, allow_short=allow_short, cost_bps=cost_bps, ml_confidence=ml_confidence)
+    
+    @property
+    def data_provider(self) -> "MarketDataProvider":
+        """Market data source (yahooquery, synthetic or replay - see market_data.py)"""
+        if getattr(self, "_data_provider", None) is None:
+            from market_data import create_provider
+            self._data_provider = create_provider(self.config)
+        return self._data_provider
+    
+    @data_provider.setter
+    def data_provider(self, provider: "MarketDataProvider"):
+        if getattr(self, "_live_feed", None) is not None:
+            self._live_feed.stop()
+        self._data_provider = provider
+        self._bar_store = None
+        self._live_feed = None
+    
+    @property
+    def live_feed(self) -> "LiveBarFeed":
+        """Latest live bar per subscribed symbol, streamed through the data provider (see market_data.py)"""
+        if getattr(self, "_live_feed", None) is None:
+            from market_data import LiveBarFeed
+            self._live_feed = LiveBarFeed(self.data_provider, interval=getattr(self.config, "stream_interval", "1m"))
+        return self._live_feed
+    
+    @property
+    def bar_store(self) -> "BarStore":
+        """Local columnar OHLCV store in front of the market data provider"""
+        if getattr(self, "_bar_store", None) is None:
+            from bar_store import create_bar_store
+            self._bar_store = create_bar_store(self.config, fetcher=self.data_provider)
+        return self._bar_store
+    
+    async def _load_market_data(self, symbol: str, period: str, interval: str) -> pd.DataFrame:
+        """Load OHLCV bars through the bar store, fetching only the missing tail"""
+        loop = asyncio.get_running_loop()
+        df = await loop.run_in_executor(None, self.bar_store.get_bars, symbol, period, interval)
+        log_step(f"Loaded {len(df)} bars for {symbol} ({period}, {interval})")
+        if not df.empty:
+            # Advance the incremental indicators, recording the history the indicator charts draw
+            try:
+                await loop.run_in_executor(None, self._update_indicator_state, symbol, interval, df)
+            except Exception as e:
+                log_step(f"Indicator state update failed for {symbol}: {e}", "ERROR")
+        return df
+
+    def price_series(self, symbol: str, period: str = "1y", interval: str = "1d", width: int = 1000,
+                     method: str = "ohlc", start: Optional[Any] = None, end: Optional[Any] = None) -> Dict[str, Any]:
+        """Stored bars for the analysed window, decimated to about ``width`` points (see price_series.py)
+
+        Only the visible window is read from the bar store, and the network is
+        never touched here: with nothing stored yet the series is empty and
+        ``pending`` while a background fetch fills the store.
+        """
+        from bar_store import period_start
+        from price_series import decimate, parse_timestamp
+
+        start, end = parse_timestamp(start), parse_timestamp(end)
+        first = period_start(period)
+        if first is not None and (start is None or start < first):
+            start = first
+        visible = self.bar_store.read(symbol, interval, start, end)
+        pending = visible.empty and not self.bar_store.stored(symbol, interval)
+        if pending:
+            self._fetch_bars_later(symbol, period, interval)
+        return {
+            "symbol": symbol,
+            "interval": interval,
+            "method": method,
+            "bars": len(visible),
+            "pending": pending,
+            "columns": decimate(visible, width, method)
+        }
+
+    def _fetch_bars_later(self, symbol: str, period: str, interval: str):
+        """Fill the bar store for a chart off the request thread (one fetch per symbol/period/interval at a time)"""
+        if getattr(self, "_bar_fetch_pool", None) is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._bar_fetch_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bar-fetch")
+            self._bar_fetches = {}
+        key = (symbol.upper(), period, interval)
+        fetch = self._bar_fetches.get(key)
+        if fetch is None or fetch.done():
+            self._bar_fetches[key] = self._bar_fetch_pool.submit(self.bar_store.get_bars, symbol, period, interval)
+
+    @property
+    def indicator_series(self) -> "IndicatorSeriesCache":
+        """Per symbol/interval indicator histories recorded from the bars (see indicator_series.py)"""
+        if getattr(self, "_indicator_series", None) is None:
+            from indicator_series import create_indicator_series_cache
+            self._indicator_series = create_indicator_series_cache(self.config)
+        return self._indicator_series
+
+    def _update_indicator_state(self, symbol: str, interval: str, df: pd.DataFrame) -> Dict[str, Any]:
+        """Absorb new bars into the symbol's incremental indicator state, recording every bar for the charts"""
+        snapshot, new_bars = self.indicator_series.update(symbol, interval, df)
+        log_step(f"Indicator state for {symbol} ({interval}) advanced by {new_bars} bars")
+        return snapshot
+
+    def _refresh_indicator_state(self, symbol: str, interval: str) -> Optional[Dict[str, Any]]:
+        """Absorb the stored bars the symbol's indicator state has not seen (all of them in a fresh process)
+
+        Reads only the local bar store, from the state's last committed bar on; nothing is fetched.
+        """
+        since = self.indicator_series.last_timestamp(symbol, interval)
+        bars = self.bar_store.read(symbol, interval, start=since)
+        if bars.empty:
+            return None
+        return self._update_indicator_state(symbol, interval, bars)
+
+    def indicator_window(self, symbol: str, interval: str, start: Optional[Any] = None, end: Optional[Any] = None,
+                         width: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Indicator history for a chart window, brought up to date with the bar store (see indicator_series.py)"""
+        self._refresh_indicator_state(symbol, interval)
+        return self.indicator_series.window(symbol, interval, start, end, width)
+    
+    def live_indicator_signals(self, symbol: str) -> Dict[str, Tuple[str, float]]:
+        """Classify the symbol's indicators with its latest live bar applied as the forming bar
+
+        The state first catches up with the stored bars, so a real-time refresh
+        absorbs only the newest candles instead of recomputing the history.
+        """
+        from price_series import parse_timestamp
+        interval = self.live_feed.interval
+        snapshot = self._refresh_indicator_state(symbol, interval)
+        bar = self.live_feed.latest(symbol)
+        if bar is not None:
+            frame = pd.DataFrame([bar], index=pd.DatetimeIndex([parse_timestamp(bar["timestamp"])]),
+                                 columns=["open", "high", "low", "close", "volume"])
+            snapshot, _ = self.indicator_series.update(symbol, interval, frame)
+        return self._classify_indicator_snapshot(snapshot) if snapshot else {}
+    
+    def _classify_indicator_snapshot(self, snapshot: Dict[str, Any]) -> Dict[str, Tuple[str, float]]:
+        """Classify incremental indicator values with the standard signal classifiers"""
+        signals = {}
+        close = snapshot.get("close")
+        
+        for name in ("sma_20", "sma_50", "sma_200", "ema_12", "ema_26"):
+            if close is not None and snapshot.get(name):
+                signals[name.upper()] = self._classify_ma_signal(close, snapshot[name])
+        
+        if snapshot.get("rsi") is not None:
+            signals["RSI"] = self._classify_rsi(snapshot["rsi"])
+        if snapshot.get("macd_signal") is not None:
+            signals["MACD"] = self._classify_macd(snapshot["macd"], snapshot["macd_signal"], snapshot["macd_hist"])
+        if snapshot.get("stoch_d") is not None:
+            signals["STOCH"] = self._classify_stochastic(snapshot["stoch_k"], snapshot["stoch_d"])
+        if snapshot.get("adx") is not None:
+            signals["ADX"] = self._classify_adx(snapshot["adx"])
+        if snapshot.get("mfi") is not None:
+            signals["MFI"] = self._classify_mfi(snapshot["mfi"])
+        if snapshot.get("cci") is not None:
+            signals["CCI"] = self._classify_cci(snapshot["cci"])
+        
+        return signals
+    
+    # Signal classification helper methods (scalar wrappers over signal_classification)
+    def _classify_vectorized(self, name: str, *values: float) -> Tuple[str, float]:
+        """Run one of the vectorized classifiers on scalar inputs"""
+        from signal_classification import CLASSIFIERS
+        classifier, labels = CLASSIFIERS[name]
+        codes, confidence = classifier(*values)
+        return labels[int(codes)], float(confidence)
     
-    # Signal classification helper methods
     def _classify_ma_signal(self, current: float, ma_value: float, threshold: float = 0.02) -> Tuple[str, float]:
-        """Classify price vs moving average relationship"""
-        deviation = (current - ma_value) / ma_value
-        if deviation > threshold:
-            return "strong_above", min(deviation * 2, 1.0)
-        elif deviation > 0:
-            return "above", deviation * 1.5
-        elif deviation < -threshold:
-            return "strong_below", min(abs(deviation) * 2, 1.0)
-        else:
-            return "below", abs(deviation) * 1.5
+        """Classify price vs moving average relationship (a zero average no longer raises, see classify_ma_signal)"""
+        return self._classify_vectorized("ma", current, ma_value, threshold)
     
     def _classify_adx(self, value: float) -> Tuple[str, float]:
         """Classify ADX strength"""
-        if value > 40:
-            return "very_strong", 0.95
-        elif value > 25:
-            return "strong", 0.8
-        elif value > 20:
-            return "moderate", 0.6
-        return "weak", 0.4
+        return self._classify_vectorized("adx", value)
     
     def _classify_rsi(self, value: float) -> Tuple[str, float]:
         """Classify RSI signal"""
-        if value > 80:
-            return "extremely_overbought", 0.95
-        elif value > 70:
-            return "overbought", 0.8
-        elif value < 20:
-            return "extremely_oversold", 0.95
-        elif value < 30:
-            return "oversold", 0.8
-        return "neutral", 0.5
+        return self._classify_vectorized("rsi", value)
     
     def _classify_macd(self, macd: float, signal: float, hist: float) -> Tuple[str, float]:
         """Classify MACD signal"""
-        if macd > signal and macd > 0:
-            strength = "strong_" if abs(hist) > 0.02 else ""
-            return f"{strength}bullish", 0.85 if "strong" in strength else 0.6
-        elif macd < signal and macd < 0:
-            strength = "strong_" if abs(hist) > 0.02 else ""
-            return f"{strength}bearish", 0.85 if "strong" in strength else 0.6
-        return "neutral", 0.4
+        return self._classify_vectorized("macd", macd, signal, hist)
     
     def _classify_stochastic(self, k: float, d: float) -> Tuple[str, float]:
         """Classify Stochastic signal"""
-        if k > 80 and d > 80:
-            return "overbought", 0.8
-        elif k < 20 and d < 20:
-            return "oversold", 0.8
-        elif k > d and k < 50:
-            return "bullish_cross", 0.7
-        elif k < d and k > 50:
-            return "bearish_cross", 0.7
-        return "neutral", 0.5
+        return self._classify_vectorized("stochastic", k, d)
     
     def _classify_mfi(self, value: float) -> Tuple[str, float]:
         """Classify MFI signal (similar to RSI)"""
-        return self._classify_rsi(value)
+        return self._classify_vectorized("mfi", value)
     
     def _classify_cci(self, value: float) -> Tuple[str, float]:
         """Classify CCI signal"""
-        if value > 100:
-            return "overbought", 0.7
-        elif value < -100:
-            return "oversold", 0.7
-        return "neutral", 0.5
+        return self._classify_vectorized("cci", value)
+    
+    def classify_history(self, columns: Dict[str, np.ndarray]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """Classify whole indicator histories (or symbols x bars matrices) in one call
+
+        Returns ``{indicator: (codes, confidence)}``; codes index the label tables in
+        ``signal_classification`` and match the scalar ``_classify_*`` results exactly.
+        """
+        from signal_classification import classify_indicator_columns
+        return classify_indicator_columns(columns)
+    
+    def add_indicator_block(self, symbols: Any, columns: Dict[str, Any]) -> List[Any]:
+        """Classify indicator values and add them to the ontology in one batch
+
+        ``columns`` uses the snapshot names (scalars for one symbol, arrays aligned
+        with ``symbols`` for a universe); NaN indicators are skipped.
+        """
+        from ontology_bulk import add_indicator_block, indicator_block
+        columns = {name: np.asarray(value, dtype=np.float64) for name, value in columns.items()}
+        block = indicator_block(symbols, columns, self.classify_history(columns))
+        return add_indicator_block(self.ontology, block)
     
     def _infer_market_state(self, extracts: Dict[str, Any]) -> Tuple[str, float]:
         """Infer market state from weighted evidence"""
@@ -443,17 +742,64 @@
             chain.extend(top_evidence)
         
         # Add contradictions
-        contradictions = self.ontology.detect_contradictions()
+        contradictions = self.ontology.detect_contradictions(symbol)
         if contradictions:
             chain.append(f"⚠️ Detected {len(contradictions)} indicator contradictions")
         
         # Add confirmations
-        confirmations = self.ontology.find_confirmations()
+        confirmations = self.ontology.find_confirmations(symbol)
         if confirmations:
             chain.append(f"✅ Found {len(confirmations)} strong indicator confirmations")
         
         return chain
 
+# ML models, risk manager and streamer are built on first use (see lazy_subsystems.py)
+from lazy_subsystems import defer_subsystems
+defer_subsystems(EnhancedStockAnalysisEngine, {
+    "pattern_model": ("ml_enabled", lambda config: PatternRecognitionModel(config)),
+    "anomaly_detector": ("ml_enabled", lambda config: AnomalyDetector()),
+    "risk_manager": ("risk_management_enabled", lambda config: AdvancedRiskManager(config)),
+    "data_streamer": ("real_time_enabled", lambda config: RealTimeDataStreamer(config))
+})
+
+# Indexed contradiction/confirmation lookups (see ontology_index.py)
+from ontology_index import index_ontology_class
+index_ontology_class(EnhancedStockOntologyGraph)
+
+# Cold starts restore the built schema and compiled reasoner from a snapshot (see ontology_snapshot.py)
+from ontology_snapshot import snapshot_ontology_class, snapshot_path
+snapshot_ontology_class(
+    EnhancedStockOntologyGraph,
+    snapshot_path(config),
+    reasoning_mode=getattr(config, "reasoning_mode", "incremental")
+)
+
+# Per-symbol, per-run named graphs with retention (see ontology_partitions.py)
+# backed by a persistent SQLite store when ontology_store_path / ONTOLOGY_STORE_PATH is set
+from ontology_partitions import partition_ontology_class, scope_analysis_runs
+from triple_store import open_ontology_store
+partition_ontology_class(
+    EnhancedStockOntologyGraph,
+    retention_days=config.data_retention_days,
+    max_runs_per_symbol=getattr(config, "ontology_max_runs", 3),
+    store_factory=lambda: open_ontology_store(config),
+    reasoning_mode=getattr(config, "reasoning_mode", "incremental")
+)
+scope_analysis_runs(EnhancedStockAnalysisEngine)
+
+# Serve repeated analyses from the result cache before any work is scheduled
+from analysis_cache import cache_analysis_results
+cache_analysis_results(EnhancedStockAnalysisEngine)
+
+# Per-stage spans, end-to-end latency and error counters (see instrumentation.py);
+# wrapped outermost so cache hits are timed as well
+from instrumentation import instrument_engine, metrics
+instrument_engine(EnhancedStockAnalysisEngine)
+
+# Knowledge summaries from running counters (see knowledge_stats.py)
+from knowledge_stats import count_ontology_class
+count_ontology_class(EnhancedStockOntologyGraph)
+
 # Initialize the enhanced analysis engine
 enhanced_engine = EnhancedStockAnalysisEngine(config)
 
@@ -466,5 +812,6 @@ __all__ = [
     'RealTimeDataStreamer',
     'SystemConfig',
     'config',
-    'enhanced_engine'
+    'enhanced_engine',
+    'metrics'
 ]
\ No newline at end of file
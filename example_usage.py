@@ -153,23 +153,19 @@ async def main():
     symbols = ["GOOGL", "MSFT", "TSLA", "NVDA"]
     batch_results = {}
     
-    for symbol in symbols:
-        try:
-            print(f"   Analyzing {symbol}...")
-            result = await engine.analyze_symbol(symbol, "6mo", "1d")
-            
-            if "error" not in result:
-                batch_results[symbol] = {
-                    "overall_score": result["overall_score"],
-                    "recommendation": result["overall_recommendation"],
-                    "confidence": result["confidence"]
-                }
-                print(f"   ✅ {symbol}: {result['overall_recommendation'].upper()} ({result['overall_score']:.1%})")
-            else:
-                print(f"   ❌ {symbol}: {result['error']}")
-                
-        except Exception as e:
-            print(f"   ❌ {symbol}: Error - {str(e)}")
+    # Results stream back as each symbol finishes (bounded by max_concurrent_analysis)
+    async for result in engine.analyze_batch(symbols, "6mo", "1d"):
+        symbol = result["symbol"]
+
+        if "error" not in result:
+            batch_results[symbol] = {
+                "overall_score": result["overall_score"],
+                "recommendation": result["overall_recommendation"],
+                "confidence": result["confidence"]
+            }
+            print(f"   ✅ {symbol}: {result['overall_recommendation'].upper()} ({result['overall_score']:.1%})")
+        else:
+            print(f"   ❌ {symbol}: {result['error']}")
     
     # Display batch results summary
     print(f"\n   Batch Analysis Summary:")
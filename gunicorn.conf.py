@@ -0,0 +1,18 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ============================================================
+# GUNICORN SERVER HOOKS
+# ============================================================
+# Loaded by start_render.sh (--config). With --preload the
+# master imports the app once; right before each worker is
+# forked it freezes the heap built so far, so the workers'
+# garbage collectors leave those pages shared copy-on-write.
+# ============================================================
+
+
+def pre_fork(server, worker):
+    """Freeze the master's preloaded heap before a worker is forked"""
+    if server.cfg.preload_app:
+        from ontology_snapshot import freeze_for_fork
+        freeze_for_fork()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ============================================================
+# INCREMENTAL OWL-RL REASONING
+# ============================================================
+# The TBox (class/property axioms) is closed once at startup and
+# compiled into lookup tables; each batch of new ABox statements
+# is then materialized semi-naively: only consequences of the
+# delta are derived, joining against the graph through indexed
+# lookups, so cost follows the new facts rather than the store.
+# ============================================================
+
+from collections import OrderedDict, defaultdict, deque
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from rdflib import Graph, Literal, OWL, RDF, RDFS
+
+Triple = Tuple[Any, Any, Any]
+
+# Predicates and types that make a statement part of the TBox
+TBOX_PREDICATES = {
+    RDFS.subClassOf, RDFS.subPropertyOf, RDFS.domain, RDFS.range,
+    OWL.equivalentClass, OWL.equivalentProperty, OWL.inverseOf
+}
+PROPERTY_TYPES = {OWL.TransitiveProperty, OWL.SymmetricProperty}
+
+# Compiled reasoners by TBox contents, most recently used last: the closure is
+# computed once per schema, and only the latest few schemas are kept
+MAX_REASONERS = 8
+_REASONERS: "OrderedDict[frozenset, IncrementalReasoner]" = OrderedDict()
+
+
+def _transitive_closure(edges: Dict[Any, Set[Any]]) -> Dict[Any, Set[Any]]:
+    """Reachability sets (excluding the node itself unless on a cycle)"""
+    closure = {}
+    for start in list(edges):
+        seen, queue = set(), deque(edges[start])
+        while queue:
+            node = queue.popleft()
+            if node not in seen:
+                seen.add(node)
+                queue.extend(edges.get(node, ()))
+        closure[start] = seen
+    return closure
+
+
+def tbox_triples(graph: Any) -> Graph:
+    """The schema part of a graph"""
+    tbox = Graph()
+    for predicate in TBOX_PREDICATES:
+        for triple in graph.triples((None, predicate, None)):
+            tbox.add(triple)
+    for property_type in PROPERTY_TYPES:
+        for subject in graph.subjects(RDF.type, property_type):
+            tbox.add((subject, RDF.type, property_type))
+    return tbox
+
+
+class IncrementalReasoner:
+    """Semi-naive materialization of OWL-RL ABox rules against a closed TBox
+
+    Covers cax-sco, prp-spo1, prp-dom, prp-rng, prp-inv, prp-symp and prp-trp
+    (owl:sameAs and class-expression rules are left to full closure).
+    """
+
+    def __init__(self, tbox: Graph, close_with_owlrl: bool = True):
+        if close_with_owlrl:
+            try:
+                import owlrl
+                owlrl.DeductiveClosure(owlrl.OWLRL_Semantics, axiomatic_triples=False,
+                                       datatype_axioms=False).expand(tbox)
+            except ImportError:
+                pass  # transitive closure below still covers the hierarchy rules
+        self._compile(tbox)
+
+    @classmethod
+    def from_graph(cls, graph: Any, **kwargs) -> "IncrementalReasoner":
+        return cls(tbox_triples(graph), **kwargs)
+
+    def _compile(self, tbox: Graph):
+        subclass, subproperty = defaultdict(set), defaultdict(set)
+        for sub, sup in tbox.subject_objects(RDFS.subClassOf):
+            subclass[sub].add(sup)
+        for a, b in tbox.subject_objects(OWL.equivalentClass):
+            subclass[a].add(b)
+            subclass[b].add(a)
+        for sub, sup in tbox.subject_objects(RDFS.subPropertyOf):
+            subproperty[sub].add(sup)
+        for a, b in tbox.subject_objects(OWL.equivalentProperty):
+            subproperty[a].add(b)
+            subproperty[b].add(a)
+
+        self.superclasses = {c: s - {c} for c, s in _transitive_closure(subclass).items()}
+        self.superproperties = {p: s - {p} for p, s in _transitive_closure(subproperty).items()}
+
+        domains, ranges = defaultdict(set), defaultdict(set)
+        for prop, cls in tbox.subject_objects(RDFS.domain):
+            domains[prop].add(cls)
+        for prop, cls in tbox.subject_objects(RDFS.range):
+            ranges[prop].add(cls)
+        # Domains/ranges are inherited down the property hierarchy
+        for prop, supers in self.superproperties.items():
+            for sup in supers:
+                domains[prop] |= domains.get(sup, set())
+                ranges[prop] |= ranges.get(sup, set())
+        self.domains = {p: set(c) for p, c in domains.items() if c}
+        self.ranges = {p: set(c) for p, c in ranges.items() if c}
+
+        self.inverses = defaultdict(set)
+        for a, b in tbox.subject_objects(OWL.inverseOf):
+            self.inverses[a].add(b)
+            self.inverses[b].add(a)
+        self.symmetric = set(tbox.subjects(RDF.type, OWL.SymmetricProperty))
+        self.transitive = set(tbox.subjects(RDF.type, OWL.TransitiveProperty))
+
+    # Rules ---------------------------------------------------------------
+
+    def _consequences(self, triple: Triple, graph: Any) -> Iterable[Triple]:
+        s, p, o = triple
+        if p == RDF.type:
+            for sup in self.superclasses.get(o, ()):
+                yield s, RDF.type, sup
+            return
+
+        for sup in self.superproperties.get(p, ()):
+            yield s, sup, o
+        for cls in self.domains.get(p, ()):
+            yield s, RDF.type, cls
+        if not isinstance(o, Literal):
+            for cls in self.ranges.get(p, ()):
+                yield o, RDF.type, cls
+            for inverse in self.inverses.get(p, ()):
+                yield o, inverse, s
+            if p in self.symmetric:
+                yield o, p, s
+            if p in self.transitive:
+                # Join the new edge with existing ones on both sides
+                for z in graph.objects(o, p):
+                    yield s, p, z
+                for w in graph.subjects(p, s):
+                    yield w, p, o
+
+    def materialize(self, graph: Any, delta: Iterable[Triple], target: Any = None) -> List[Triple]:
+        """Derive everything that follows from ``delta`` and add it to ``target``
+
+        ``target`` defaults to ``graph``; pass a named graph to keep inferences
+        next to the statements they were derived from.
+        """
+        target = graph if target is None else target
+        inferred: List[Triple] = []
+        seen: Set[Triple] = set()
+        queue = deque(delta)
+        while queue:
+            for consequence in self._consequences(queue.popleft(), graph):
+                if consequence in seen or consequence in graph:
+                    continue
+                seen.add(consequence)
+                target.add(consequence)
+                inferred.append(consequence)
+                queue.append(consequence)
+        return inferred
+
+
+def create_reasoner(graph: Any, mode: Optional[str] = "incremental") -> Optional[IncrementalReasoner]:
+    """Reasoner for config.reasoning_mode ("incremental" or "off")"""
+    if mode != "incremental":
+        return None
+    tbox = tbox_triples(graph)
+    key = frozenset(tbox)
+    reasoner = _REASONERS.get(key)
+    if reasoner is None:
+        reasoner = IncrementalReasoner(tbox)
+    _remember(key, reasoner)
+    return reasoner
+
+
+def cache_reasoner(graph: Any, reasoner: IncrementalReasoner):
+    """Register a precompiled reasoner (e.g. from a snapshot) for the graph's TBox"""
+    _remember(frozenset(tbox_triples(graph)), reasoner)
+
+
+def _remember(key: frozenset, reasoner: IncrementalReasoner):
+    _REASONERS[key] = reasoner
+    _REASONERS.move_to_end(key)
+    while len(_REASONERS) > MAX_REASONERS:
+        _REASONERS.popitem(last=False)
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ============================================================
+# INDICATOR SERIES CACHE
+# ============================================================
+# Per symbol/interval history of indicator values, recorded bar
+# by bar while the incremental indicator state absorbs new bars.
+# The engine feeds it from the local bar store: each chart
+# request absorbs the stored bars the state has not seen (all of
+# them in a fresh process), and bars loaded through the engine's
+# _load_market_data are absorbed as they load. Charts read (and
+# zoom, and re-range) straight from these columns: indicators are
+# never recomputed, only the new bars are appended (a
+# still-forming last bar is overwritten until it closes).
+# ============================================================
+
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from indicator_state import IncrementalIndicatorState, RollingMean
+
+# Recorded per bar: indicator snapshot fields plus volume and return volatility
+SERIES_COLUMNS = (
+    "close", "volume", "sma_20", "sma_50", "sma_200", "ema_12", "ema_26",
+    "macd", "macd_signal", "macd_hist", "rsi", "stoch_k", "stoch_d",
+    "atr", "atr_pct", "adx", "plus_di", "minus_di", "mfi", "cci", "volatility"
+)
+
+DEFAULT_MAX_BARS = 50000
+DEFAULT_MAX_SERIES = 256
+VOLATILITY_WINDOW = 20
+
+
+class IndicatorSeries:
+    """Growable float32 columns (NaN until an indicator is warmed up) with epoch-ms timestamps"""
+
+    def __init__(self, max_bars: int = DEFAULT_MAX_BARS, capacity: int = 1024):
+        self.max_bars = max_bars
+        self.size = 0
+        self.t = np.empty(capacity, dtype=np.int64)
+        self.columns = {name: np.empty(capacity, dtype=np.float32) for name in SERIES_COLUMNS}
+        self._returns = RollingMean(VOLATILITY_WINDOW)
+        self._squared_returns = RollingMean(VOLATILITY_WINDOW)
+        self._prev_close: Optional[float] = None
+        # Volatility inputs from before the last row, while that row is a forming bar
+        self._before_forming: Optional[tuple] = None
+        self._lock = threading.Lock()
+
+    def record(self, state: Any, timestamp: Any, volume: float):
+        """Append the state's values after it absorbed one bar (update_from_frame's on_bar hook)
+
+        A row recorded from a forming bar (``state.forming``) is replaced by
+        whatever is recorded next: the same bar revised, or the closed bar.
+        """
+        with self._lock:
+            if self._before_forming is not None:
+                self._returns, self._squared_returns, self._prev_close = self._before_forming
+                self._before_forming = None
+                self.size -= 1
+            if getattr(state, "forming", False):
+                self._before_forming = (self._returns.copy(), self._squared_returns.copy(), self._prev_close)
+
+        values = state.snapshot()
+        close = values["close"]
+        if self._prev_close:
+            change = close / self._prev_close - 1
+            self._returns.update(change)
+            self._squared_returns.update(change * change)
+        self._prev_close = close
+
+        mean, mean_square = self._returns.value, self._squared_returns.value
+        values["volatility"] = (100 * math.sqrt(max(mean_square - mean * mean, 0.0))
+                                if mean is not None else None)
+        values["atr_pct"] = 100 * values["atr"] / close if values["atr"] is not None and close else None
+        values["volume"] = volume
+
+        with self._lock:
+            if self.size == len(self.t):
+                self._grow()
+            row = self.size
+            self.t[row] = pd.Timestamp(timestamp).value // 1_000_000
+            for name, column in self.columns.items():
+                value = values.get(name)
+                column[row] = np.nan if value is None else value
+            self.size += 1
+
+    def _grow(self):
+        if self.size >= self.max_bars:
+            # Keep the newest half; older history can be rebuilt by re-analysing
+            keep = self.max_bars // 2
+            self.t[:keep] = self.t[self.size - keep:self.size]
+            for column in self.columns.values():
+                column[:keep] = column[self.size - keep:self.size]
+            self.size = keep
+            return
+        capacity = min(len(self.t) * 2, self.max_bars)
+        self.t = np.resize(self.t, capacity)
+        self.columns = {name: np.resize(column, capacity) for name, column in self.columns.items()}
+
+    def window(self, start: Optional[Any] = None, end: Optional[Any] = None) -> Dict[str, np.ndarray]:
+        """Copies of the columns for ``start <= timestamp <= end`` (either bound optional)"""
+        with self._lock:
+            t = self.t[:self.size]
+            first = 0 if start is None else int(np.searchsorted(t, pd.Timestamp(start).value // 1_000_000, "left"))
+            stop = self.size if end is None else int(np.searchsorted(t, pd.Timestamp(end).value // 1_000_000, "right"))
+            window = {"t": t[first:stop].copy()}
+            window.update({name: column[first:stop].copy() for name, column in self.columns.items()})
+        return window
+
+
+class IndicatorSeriesCache:
+    """IndicatorSeries by (symbol, interval), alongside the incremental indicator states that fill them
+
+    Holds the ``max_series`` most recently used symbol/intervals; older ones
+    are dropped and rebuilt from the bars when next used.
+    """
+
+    def __init__(self, max_bars: int = DEFAULT_MAX_BARS, max_series: int = DEFAULT_MAX_SERIES):
+        self.max_bars = max_bars
+        self.max_series = max_series
+        self._series: "OrderedDict[Tuple[str, str], IndicatorSeries]" = OrderedDict()
+        self._states: Dict[Tuple[str, str], IncrementalIndicatorState] = {}
+        self._updating: Dict[Tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def series(self, symbol: str, interval: str) -> IndicatorSeries:
+        key = (symbol.upper(), interval)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = IndicatorSeries(self.max_bars)
+            self._touch(key)
+            return series
+
+    def cached(self, symbol: str, interval: str) -> bool:
+        """Whether any bar has been recorded for a symbol/interval in this process"""
+        with self._lock:
+            series = self._series.get((symbol.upper(), interval))
+        return series is not None and series.size > 0
+
+    def last_timestamp(self, symbol: str, interval: str) -> Optional[Any]:
+        """Newest committed bar of the symbol/interval's indicator state (None before any)"""
+        with self._lock:
+            state = self._states.get((symbol.upper(), interval))
+        return state.last_timestamp if state is not None else None
+
+    def discard(self, symbol: str, interval: str):
+        with self._lock:
+            self._series.pop((symbol.upper(), interval), None)
+            self._states.pop((symbol.upper(), interval), None)
+
+    def update(self, symbol: str, interval: str, bars: pd.DataFrame) -> Tuple[Dict[str, Any], int]:
+        """Absorb the bars not seen yet into the symbol/interval's indicator state, recording each one
+
+        Updates of one symbol/interval are serialized (an analysis and a chart
+        fill may race). Bars reaching back before the state's first bar (a
+        long period after a short one) replay the whole frame into a fresh
+        state and series. Returns the state's snapshot and how many bars were
+        absorbed.
+        """
+        key = (symbol.upper(), interval)
+        with self._lock:
+            updating = self._updating.setdefault(key, threading.Lock())
+        with updating:
+            with self._lock:
+                state = self._states.get(key)
+                if state is None or (len(bars) and state.first_timestamp is not None
+                                     and bars.index[0] < state.first_timestamp):
+                    state = self._states[key] = IncrementalIndicatorState()
+                    self._series[key] = IndicatorSeries(self.max_bars)
+                self._touch(key)
+                series = self._series[key]
+            new_bars = state.update_from_frame(bars, on_bar=series.record)
+            return state.snapshot(), new_bars
+
+    def _touch(self, key: Tuple[str, str]):
+        # Caller holds self._lock
+        self._series.move_to_end(key)
+        while len(self._series) > self.max_series:
+            evicted, _ = self._series.popitem(last=False)
+            self._states.pop(evicted, None)
+            self._updating.pop(evicted, None)
+
+    def window(self, symbol: str, interval: str, start: Optional[Any] = None, end: Optional[Any] = None,
+               width: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Cached columns for a time window, thinned to about ``width`` points (LTTB on close)"""
+        with self._lock:
+            series = self._series.get((symbol.upper(), interval))
+        if series is None:
+            return {"t": np.empty(0, dtype=np.int64), **{name: np.empty(0, dtype=np.float32) for name in SERIES_COLUMNS}}
+        columns = series.window(start, end)
+        if width and len(columns["t"]) > width:
+            from price_series import lttb_rows
+            rows = lttb_rows(columns["t"], columns["close"].astype(np.float64), width)
+            columns = {name: values[rows] for name, values in columns.items()}
+        return columns
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            series = list(self._series.values())
+        return {
+            "series": len(series),
+            "bars": sum(s.size for s in series),
+            "bytes": sum(s.t.nbytes + sum(c.nbytes for c in s.columns.values()) for s in series)
+        }
+
+
+def create_indicator_series_cache(config: Any = None) -> IndicatorSeriesCache:
+    """Indicator history cache bounded by config.indicator_series_max_bars per symbol/interval
+    and config.indicator_series_max_symbols symbol/intervals"""
+    return IndicatorSeriesCache(max_bars=int(getattr(config, "indicator_series_max_bars", DEFAULT_MAX_BARS)),
+                                max_series=int(getattr(config, "indicator_series_max_symbols", DEFAULT_MAX_SERIES)))
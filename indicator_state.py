@@ -0,0 +1,341 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ============================================================
+# INCREMENTAL INDICATOR STATE
+# ============================================================
+# Per-symbol technical indicator state that absorbs one bar at
+# a time in O(1), so real-time refreshes don't recompute the
+# whole history. The newest bar of a frame may still be forming:
+# it is applied to a provisional copy of the state, and only
+# committed once a later bar shows it has closed.
+# ============================================================
+
+import copy
+import math
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+
+
+class RollingMean:
+    """Simple moving average over a fixed window with a running sum
+
+    The sum is recomputed from the window once per ``window`` updates, so
+    rounding error from adding and subtracting cannot build up (amortized O(1)).
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.updates = 0
+
+    def update(self, value: float) -> Optional[float]:
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+        self.updates += 1
+        if self.updates % self.window == 0:
+            self.total = math.fsum(self.values)
+        return self.value
+
+    def copy(self) -> "RollingMean":
+        clone = copy.copy(self)
+        clone.values = self.values.copy()
+        return clone
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.total / self.window if len(self.values) == self.window else None
+
+
+class ExponentialMean:
+    """Exponential moving average seeded with the first observation"""
+
+    def __init__(self, span: int = None, alpha: float = None, min_periods: int = None):
+        self.alpha = alpha if alpha is not None else 2.0 / (span + 1)
+        self.min_periods = min_periods or span or 1
+        self.count = 0
+        self.current = None
+
+    def update(self, value: float) -> Optional[float]:
+        self.count += 1
+        if self.current is None:
+            self.current = value
+        else:
+            self.current = self.alpha * value + (1 - self.alpha) * self.current
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.current if self.count >= self.min_periods else None
+
+    def copy(self) -> "ExponentialMean":
+        return copy.copy(self)
+
+
+class WilderMean:
+    """Wilder smoothing: simple mean of the first window, then recursive"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.count = 0
+        self.current = 0.0
+
+    def update(self, value: float) -> Optional[float]:
+        self.count += 1
+        if self.count <= self.window:
+            self.current += (value - self.current) / self.count
+        else:
+            self.current = (self.current * (self.window - 1) + value) / self.window
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.current if self.count >= self.window else None
+
+    def copy(self) -> "WilderMean":
+        return copy.copy(self)
+
+
+class RollingExtremum:
+    """Rolling max (or min) over a window using a monotonic deque"""
+
+    def __init__(self, window: int, maximum: bool = True):
+        self.window = window
+        self.sign = 1.0 if maximum else -1.0
+        self.candidates = deque()  # (index, signed value), decreasing
+        self.index = 0
+
+    def update(self, value: float) -> Optional[float]:
+        signed = self.sign * value
+        while self.candidates and self.candidates[-1][1] <= signed:
+            self.candidates.pop()
+        self.candidates.append((self.index, signed))
+        if self.candidates[0][0] <= self.index - self.window:
+            self.candidates.popleft()
+        self.index += 1
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        if self.index < self.window:
+            return None
+        return self.sign * self.candidates[0][1]
+
+    def copy(self) -> "RollingExtremum":
+        clone = copy.copy(self)
+        clone.candidates = self.candidates.copy()
+        return clone
+
+
+class IncrementalIndicatorState:
+    """Technical indicator state for one symbol/interval, updated bar by bar"""
+
+    def __init__(self):
+        self.bars = 0
+        # Timestamps of the first and last committed (closed) bars
+        self.first_timestamp = None
+        self.last_timestamp = None
+        # Committed state plus the newest, possibly still forming, bar
+        self.provisional: Optional["IncrementalIndicatorState"] = None
+        self.forming = False
+        # (timestamp, high, low, close, volume) of the forming bar, committed if a later frame omits it
+        self.forming_bar: Optional[tuple] = None
+        self.prev_close = None
+        self.prev_high = None
+        self.prev_low = None
+        self.prev_typical = None
+        self.close = None
+
+        # Trend
+        self.sma_20 = RollingMean(20)
+        self.sma_50 = RollingMean(50)
+        self.sma_200 = RollingMean(200)
+        self.prev_sma_20 = None
+        self.prev_sma_50 = None
+        self.ema_12 = ExponentialMean(span=12)
+        self.ema_26 = ExponentialMean(span=26)
+        self.macd_signal = ExponentialMean(span=9)
+        self.macd = None
+
+        # Momentum
+        self.avg_gain = ExponentialMean(alpha=1 / 14, min_periods=14)
+        self.avg_loss = ExponentialMean(alpha=1 / 14, min_periods=14)
+        self.highest_high = RollingExtremum(14, maximum=True)
+        self.lowest_low = RollingExtremum(14, maximum=False)
+        self.stoch_d = RollingMean(3)
+        self.stoch_k = None
+
+        # Volatility / directional movement
+        self.atr = WilderMean(14)
+        self.plus_dm = WilderMean(14)
+        self.minus_dm = WilderMean(14)
+        self.adx = WilderMean(14)
+        self.plus_di = None
+        self.minus_di = None
+
+        # Volume-weighted / mean reversion
+        self.positive_flow = RollingMean(14)
+        self.negative_flow = RollingMean(14)
+        self.typical_prices = deque(maxlen=20)
+        self.typical_sma = RollingMean(20)
+
+    def update(self, high: float, low: float, close: float, volume: float = 0.0, timestamp: Any = None):
+        """Absorb one OHLCV bar"""
+        self.prev_sma_20 = self.sma_20.value
+        self.prev_sma_50 = self.sma_50.value
+        self.sma_20.update(close)
+        self.sma_50.update(close)
+        self.sma_200.update(close)
+
+        ema_fast = self.ema_12.update(close)
+        ema_slow = self.ema_26.update(close)
+        if ema_fast is not None and ema_slow is not None:
+            self.macd = ema_fast - ema_slow
+            self.macd_signal.update(self.macd)
+
+        if self.prev_close is not None:
+            change = close - self.prev_close
+            self.avg_gain.update(max(change, 0.0))
+            self.avg_loss.update(max(-change, 0.0))
+
+        highest = self.highest_high.update(high)
+        lowest = self.lowest_low.update(low)
+        if highest is not None and lowest is not None:
+            span = highest - lowest
+            self.stoch_k = 100 * (close - lowest) / span if span else 50.0
+            self.stoch_d.update(self.stoch_k)
+
+        if self.prev_close is not None:
+            true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+            up_move = high - self.prev_high
+            down_move = self.prev_low - low
+            atr = self.atr.update(true_range)
+            plus_dm = self.plus_dm.update(up_move if up_move > down_move and up_move > 0 else 0.0)
+            minus_dm = self.minus_dm.update(down_move if down_move > up_move and down_move > 0 else 0.0)
+            if atr:
+                self.plus_di = 100 * plus_dm / atr
+                self.minus_di = 100 * minus_dm / atr
+                di_sum = self.plus_di + self.minus_di
+                self.adx.update(100 * abs(self.plus_di - self.minus_di) / di_sum if di_sum else 0.0)
+
+        typical = (high + low + close) / 3
+        if self.prev_typical is not None:
+            money_flow = typical * volume
+            self.positive_flow.update(money_flow if typical > self.prev_typical else 0.0)
+            self.negative_flow.update(money_flow if typical < self.prev_typical else 0.0)
+        self.typical_prices.append(typical)
+        self.typical_sma.update(typical)
+
+        self.prev_close, self.prev_high, self.prev_low, self.prev_typical = close, high, low, typical
+        self.close = close
+        if self.first_timestamp is None:
+            self.first_timestamp = timestamp
+        self.last_timestamp = timestamp
+        self.bars += 1
+
+    def update_from_frame(self, df: pd.DataFrame,
+                          on_bar: Optional[Callable[["IncrementalIndicatorState", Any, float], None]] = None) -> int:
+        """Absorb the bars of an OHLCV frame that are newer than the last committed one
+
+        Every bar but the frame's last is committed. The last one may still be
+        forming, so it is applied to a fresh provisional copy of the committed
+        state each time (see snapshot()); a later frame revises it in place
+        until a newer bar arrives and it is committed with its final values. A
+        frame that starts after the forming bar (a live feed sends one bar at a
+        time) commits it with the values last seen.
+
+        ``on_bar(state, timestamp, volume)`` runs after each bar, e.g. to record
+        the indicator history (see indicator_series.py); for the forming bar it
+        receives the provisional copy, whose ``forming`` flag is set.
+        """
+        if self.last_timestamp is not None:
+            df = df[df.index > self.last_timestamp]
+        if df.empty:
+            return 0
+
+        volumes = df["volume"] if "volume" in df.columns else pd.Series(0.0, index=df.index)
+        rows = list(zip(df.index, df["high"], df["low"], df["close"], volumes))
+        if self.forming_bar is not None and rows[0][0] > self.forming_bar[0]:
+            rows.insert(0, self.forming_bar)
+        self.provisional = None
+        for timestamp, high, low, close, volume in rows[:-1]:
+            self.update(float(high), float(low), float(close), float(volume), timestamp)
+            if on_bar is not None:
+                on_bar(self, timestamp, float(volume))
+
+        timestamp, high, low, close, volume = rows[-1]
+        self.forming_bar = rows[-1]
+        provisional = self._fork()
+        provisional.forming = True
+        provisional.update(float(high), float(low), float(close), float(volume), timestamp)
+        self.provisional = provisional
+        if on_bar is not None:
+            on_bar(provisional, timestamp, float(volume))
+        return len(rows)
+
+    def _fork(self) -> "IncrementalIndicatorState":
+        """Copy of the committed state for a forming bar: scalars are shared, only the windows are copied"""
+        fork = copy.copy(self)
+        fork.provisional = fork.forming_bar = None
+        for name, value in vars(self).items():
+            if isinstance(value, (RollingMean, ExponentialMean, WilderMean, RollingExtremum)):
+                setattr(fork, name, value.copy())
+        fork.typical_prices = self.typical_prices.copy()
+        return fork
+
+    @property
+    def rsi(self) -> Optional[float]:
+        gain, loss = self.avg_gain.value, self.avg_loss.value
+        if gain is None or loss is None:
+            return None
+        return 100.0 if loss == 0 else 100 - 100 / (1 + gain / loss)
+
+    @property
+    def mfi(self) -> Optional[float]:
+        positive, negative = self.positive_flow.value, self.negative_flow.value
+        if positive is None or negative is None:
+            return None
+        return 100.0 if negative == 0 else 100 - 100 / (1 + positive / negative)
+
+    @property
+    def cci(self) -> Optional[float]:
+        mean = self.typical_sma.value
+        if mean is None:
+            return None
+        # Mean deviation over a fixed 20-bar window: constant cost per bar
+        mean_deviation = sum(abs(tp - mean) for tp in self.typical_prices) / len(self.typical_prices)
+        return (self.typical_prices[-1] - mean) / (0.015 * mean_deviation) if mean_deviation else 0.0
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        """Current indicator values, including a forming bar (None until enough bars have been seen)"""
+        if self.provisional is not None:
+            return self.provisional.snapshot()
+        macd_signal = self.macd_signal.value
+        return {
+            "close": self.close,
+            "sma_20": self.sma_20.value,
+            "sma_50": self.sma_50.value,
+            "sma_200": self.sma_200.value,
+            "prev_sma_20": self.prev_sma_20,
+            "prev_sma_50": self.prev_sma_50,
+            "ema_12": self.ema_12.value,
+            "ema_26": self.ema_26.value,
+            "macd": self.macd if macd_signal is not None else None,
+            "macd_signal": macd_signal,
+            "macd_hist": self.macd - macd_signal if macd_signal is not None else None,
+            "rsi": self.rsi,
+            "stoch_k": self.stoch_k if self.stoch_d.value is not None else None,
+            "stoch_d": self.stoch_d.value,
+            "atr": self.atr.value,
+            "adx": self.adx.value,
+            "plus_di": self.plus_di,
+            "minus_di": self.minus_di,
+            "mfi": self.mfi,
+            "cci": self.cci,
+            "bars": self.bars
+        }
@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ============================================================
+# INSTRUMENTATION
+# ============================================================
+# Stage spans, counters, gauges and latency histograms for the
+# analysis engine, kept in an in-process registry and exported
+# as Prometheus text or JSON (optionally over the Dash server)
+# ============================================================
+
+import functools
+import inspect
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Seconds; covers sub-millisecond stages up to multi-minute full-history runs
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Engine methods wrapped by instrument_engine() -> stage name
+ENGINE_STAGES = {
+    "_ontology_analysis": "ontology",
+    "_ml_analysis": "ml",
+    "_risk_analysis": "risk",
+    "_pattern_analysis": "pattern",
+    "_anomaly_analysis": "anomaly",
+    "_generate_comprehensive_report": "report"
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+logger = logging.getLogger(__name__)
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics)"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        running, result = 0, []
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            running += count
+            result.append((str(bound), running))
+        return result
+
+
+class MetricsRegistry:
+    """In-process metrics registry with pluggable event sinks"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self.histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self.sinks: List[Callable[[Dict[str, Any]], None]] = []
+
+    def add_sink(self, sink: Callable[[Dict[str, Any]], None]):
+        """Receive every metric event (e.g. to forward to a log or StatsD)"""
+        self.sinks.append(sink)
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0.0) + value
+        self._emit("counter", name, value, labels)
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self.gauges.setdefault(name, {})[_label_key(labels)] = value
+        self._emit("gauge", name, value, labels)
+
+    def observe(self, name: str, value: float, **labels):
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            key = _label_key(labels)
+            if key not in series:
+                series[key] = Histogram()
+            series[key].observe(value)
+        self._emit("histogram", name, value, labels)
+
+    @contextmanager
+    def span(self, stage: str, **labels):
+        """Time a block as a stage span; failures are counted and re-raised"""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc("stage_errors_total", stage=stage, **labels)
+            raise
+        finally:
+            self.observe("stage_duration_seconds", time.perf_counter() - start, stage=stage, **labels)
+
+    def _emit(self, kind: str, name: str, value: float, labels: Dict[str, Any]):
+        if not self.sinks:
+            return
+        event = {"type": kind, "name": name, "value": value, "labels": labels, "time": time.time()}
+        for sink in self.sinks:
+            try:
+                sink(event)
+            except Exception as e:
+                # Counted without emitting: a failing sink must not be fed its own failures
+                sink_name = getattr(sink, "__name__", type(sink).__name__)
+                with self._lock:
+                    series = self.counters.setdefault("metric_sink_errors_total", {})
+                    key = _label_key({"sink": sink_name})
+                    series[key] = failures = series.get(key, 0.0) + 1
+                if failures == 1:
+                    logger.warning("Metric sink %s failed (further failures are only counted): %s", sink_name, e)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+    # Export --------------------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "counters": {n: [{"labels": dict(k), "value": v} for k, v in s.items()]
+                             for n, s in self.counters.items()},
+                "gauges": {n: [{"labels": dict(k), "value": v} for k, v in s.items()]
+                           for n, s in self.gauges.items()},
+                "histograms": {n: [{"labels": dict(k), "count": h.count, "sum": h.total,
+                                    "buckets": dict(h.cumulative())} for k, h in s.items()]
+                               for n, s in self.histograms.items()}
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+    def to_prometheus(self, prefix: str = "eos_") -> str:
+        def fmt(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+            pairs = list(key) + ([extra] if extra else [])
+            if not pairs:
+                return ""
+            escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+            return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+        lines = []
+        with self._lock:
+            for name, series in self.counters.items():
+                lines.append(f"# TYPE {prefix}{name} counter")
+                lines.extend(f"{prefix}{name}{fmt(k)} {v}" for k, v in series.items())
+            for name, series in self.gauges.items():
+                lines.append(f"# TYPE {prefix}{name} gauge")
+                lines.extend(f"{prefix}{name}{fmt(k)} {v}" for k, v in series.items())
+            for name, series in self.histograms.items():
+                lines.append(f"# TYPE {prefix}{name} histogram")
+                for key, histogram in series.items():
+                    for bound, count in histogram.cumulative():
+                        lines.append(f"{prefix}{name}_bucket{fmt(key, ('le', bound))} {count}")
+                    lines.append(f"{prefix}{name}_sum{fmt(key)} {histogram.total}")
+                    lines.append(f"{prefix}{name}_count{fmt(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+# Default registry shared by the engine and dashboard
+metrics = MetricsRegistry()
+
+
+def timed_stage(stage: str, registry: MetricsRegistry = None):
+    """Decorator recording a sync or async function as a stage span"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with (registry or metrics).span(stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with (registry or metrics).span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _instrument_analyze_symbol(func, registry: MetricsRegistry):
+    """End-to-end latency per symbol/interval plus an error-result counter"""
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        bound = signature.bind_partial(*args, **kwargs)
+        bound.apply_defaults()
+        symbol = bound.arguments.get("symbol", "unknown")
+        interval = bound.arguments.get("interval", "default")
+        start = time.perf_counter()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception:
+            registry.inc("analysis_errors_total", interval=interval)
+            raise
+        registry.observe("analysis_latency_seconds", time.perf_counter() - start,
+                         symbol=symbol, interval=interval)
+        if isinstance(result, dict) and "error" in result:
+            registry.inc("analysis_errors_total", interval=interval)
+        else:
+            registry.inc("analyses_total", interval=interval)
+        return result
+    return wrapper
+
+
+def instrument_engine(engine_cls: type, registry: MetricsRegistry = None) -> type:
+    """Wrap the engine's stage methods with spans (methods that don't exist are skipped)"""
+    registry = registry or metrics
+    if getattr(engine_cls, "_instrumented", False):
+        return engine_cls
+
+    for method_name, stage in ENGINE_STAGES.items():
+        method = engine_cls.__dict__.get(method_name)
+        if callable(method):
+            setattr(engine_cls, method_name, timed_stage(stage, registry)(method))
+
+    analyze = engine_cls.__dict__.get("analyze_symbol")
+    if analyze is not None and inspect.iscoroutinefunction(analyze):
+        engine_cls.analyze_symbol = _instrument_analyze_symbol(analyze, registry)
+
+    engine_cls._instrumented = True
+    return engine_cls
+
+
+def register_metrics_routes(server: Any, registry: MetricsRegistry = None):
+    """Expose /metrics (Prometheus text) and /metrics.json on a Flask server"""
+    from flask import Response
+
+    registry = registry or metrics
+
+    @server.route("/metrics")
+    def prometheus_metrics():
+        return Response(registry.to_prometheus(), mimetype="text/plain; version=0.0.4")
+
+    @server.route("/metrics.json")
+    def json_metrics():
+        return Response(registry.to_json(), mimetype="application/json")
@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ============================================================
+# KNOWLEDGE SUMMARY COUNTERS
+# ============================================================
+# get_knowledge_summary() served from running counters that are
+# updated on insert and on run-graph expiry, instead of counting
+# the graph on every report. Statement totals come from the run
+# graphs' sizes as each run is written, so no report (and no
+# metrics scrape) counts the store. SPARQL used to (re)seed
+# counters from a persistent store is prepared once, on first use.
+# ============================================================
+
+import functools
+import inspect
+import re
+import threading
+from collections import defaultdict
+from typing import Any, Dict
+
+# Summary categories counted by the ontology's add_* methods
+CATEGORY_METHODS = {
+    "add_indicator": ("indicators",),
+    "add_ml_prediction": ("ml_predictions",),
+    "add_risk_assessment": ("risk_assessments",)
+}
+
+# add_* methods whose statement is also a signal when its label is directional
+# (what the signal index holds): method -> parameter carrying the label
+SIGNAL_PARAMETERS = {"add_indicator": "signal", "add_ml_prediction": "prediction"}
+
+# Class local names recognised when seeding counters from stored statements;
+# signals are seeded from the signal index's stored entries instead
+CATEGORY_CLASSES = {
+    "indicators": ("TechnicalIndicator", "Indicator"),
+    "ml_predictions": ("MLPrediction", "Prediction"),
+    "risk_assessments": ("RiskAssessment",)
+}
+
+# SPARQL templates, parsed and algebra-translated once on first use
+TEMPLATES = {
+    "instances_by_graph_and_class":
+        "SELECT ?g ?cls (COUNT(DISTINCT ?s) AS ?n) WHERE { GRAPH ?g { ?s a ?cls } } GROUP BY ?g ?cls",
+    "statements_by_graph": "SELECT ?g (COUNT(*) AS ?n) WHERE { GRAPH ?g { ?s ?p ?o } } GROUP BY ?g"
+}
+
+
+@functools.lru_cache(maxsize=None)
+def prepared(name: str) -> Any:
+    """Prepared query for a template (the SPARQL parser is only imported when one is needed)"""
+    from rdflib.plugins.sparql import prepareQuery
+    return prepareQuery(TEMPLATES[name])
+
+
+def _local_name(uri: Any) -> str:
+    return re.split(r"[#/:]", str(uri))[-1]
+
+
+class KnowledgeCounters:
+    """Category and statement counts per named graph with O(1) totals
+
+    "statements" sums the statements of each graph (as recorded when a run is
+    written, or seeded), so it is a count of quads rather than of distinct triples.
+    """
+
+    def __init__(self):
+        self.totals: Dict[str, int] = defaultdict(int)
+        self.by_graph: Dict[Any, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def increment(self, category: str, graph_id: Any = None, amount: int = 1):
+        with self._lock:
+            self.totals[category] += amount
+            self.by_graph[graph_id][category] += amount
+
+    def set_statements(self, graph_id: Any, statements: int):
+        """Record a graph's statement count (PartitionedGraph.run_written_hooks)"""
+        with self._lock:
+            counts = self.by_graph[graph_id]
+            self.totals["statements"] += statements - counts["statements"]
+            counts["statements"] = statements
+            total = self.totals["statements"]
+        self._publish(total)
+
+    def drop_graph(self, graph_id: Any):
+        """Subtract a removed graph's contributions"""
+        with self._lock:
+            for category, count in self.by_graph.pop(graph_id, {}).items():
+                self.totals[category] -= count
+            total = self.totals["statements"]
+        self._publish(total)
+
+    @staticmethod
+    def _publish(statements: int):
+        from instrumentation import metrics
+        metrics.set_gauge("ontology_statements", statements)
+
+    def seed(self, graph: Any):
+        """Recount categories and statements from the store (e.g. a persistent store after restart)"""
+        from ontology_index import mark_store
+
+        counts = defaultdict(lambda: defaultdict(int))
+        for graph_id, cls, n in graph.query(prepared("instances_by_graph_and_class")):
+            name = _local_name(cls)
+            for category, names in CATEGORY_CLASSES.items():
+                if name in names:
+                    counts[graph_id][category] = max(counts[graph_id][category], int(n))
+        for graph_id, n in graph.query(prepared("statements_by_graph")):
+            counts[graph_id]["statements"] = int(n)
+        store = mark_store(graph)
+        for graph_id, _, _ in (store.signal_marks() if store is not None else ()):
+            counts[graph_id]["signals"] += 1
+        with self._lock:
+            self.totals.clear()
+            self.by_graph.clear()
+            for graph_id, categories in counts.items():
+                for category, n in categories.items():
+                    self.totals[category] += n
+                    self.by_graph[graph_id][category] += n
+            total = self.totals["statements"]
+        self._publish(total)
+
+    def summary(self, signal_index: Any = None) -> Dict[str, int]:
+        totals = dict(self.totals)
+        pairs = signal_index.counts() if signal_index is not None else {}
+        return {
+            "total_statements": totals.get("statements", 0),
+            "indicators": totals.get("indicators", 0),
+            "signals": totals.get("signals", 0),
+            "ml_predictions": totals.get("ml_predictions", 0),
+            "risk_assessments": totals.get("risk_assessments", 0),
+            "contradictions": pairs.get("contradictions", 0),
+            "confirmations": pairs.get("confirmations", 0)
+        }
+
+
+def count_ontology_class(ontology_cls: type) -> type:
+    """Keep KnowledgeCounters on every ontology instance and serve get_knowledge_summary from them
+
+    Apply after partition_ontology_class, so the counters hook into the partitioned graph.
+    """
+    if getattr(ontology_cls, "_knowledge_counted", False):
+        return ontology_cls
+
+    def _counters(self) -> KnowledgeCounters:
+        counters = self.__dict__.get("knowledge_counters")
+        if counters is None:
+            counters = self.__dict__["knowledge_counters"] = KnowledgeCounters()
+            graph = getattr(self, "graph", None)
+            if hasattr(graph, "graph_removed_hooks"):
+                graph.graph_removed_hooks.append(counters.drop_graph)
+                graph.run_written_hooks.append(counters.set_statements)
+            if getattr(getattr(graph, "store", None), "transaction_aware", False):
+                counters.seed(graph)  # persistent store: count what is already there
+            elif graph is not None:
+                counters.set_statements(None, len(graph))  # the schema, counted once
+        return counters
+
+    def _wrap(method, categories, signal_parameter=None):
+        signature = inspect.signature(method)
+        if signal_parameter not in signature.parameters:
+            signal_parameter = None
+
+        @functools.wraps(method)
+        def counted(self, *args, **kwargs):
+            counters = _counters(self)  # seeded (if at all) before this statement lands
+            result = method(self, *args, **kwargs)
+            from ontology_index import signal_polarity
+            from ontology_partitions import active_run
+            run = active_run()
+            graph_id = run.identifier if run is not None else None
+            for category in categories:
+                counters.increment(category, graph_id)
+            if signal_parameter is not None:
+                arguments = signature.bind(self, *args, **kwargs).arguments
+                if signal_polarity(arguments.get(signal_parameter, "")):
+                    counters.increment("signals", graph_id)
+            return result
+        return counted
+
+    for name, categories in CATEGORY_METHODS.items():
+        method = ontology_cls.__dict__.get(name)
+        if method is not None:
+            setattr(ontology_cls, name, _wrap(method, categories, SIGNAL_PARAMETERS.get(name)))
+
+    original_init = ontology_cls.__init__
+
+    @functools.wraps(original_init)
+    def __init__(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        _counters(self)  # hooked in before the first run is written
+
+    ontology_cls.__init__ = __init__
+
+    def get_knowledge_summary(self) -> Dict[str, int]:
+        """Statement, category and signal-pair counts (running totals, O(1))"""
+        index = self.signal_index if hasattr(type(self), "signal_index") else None
+        return _counters(self).summary(index)
+
+    ontology_cls.get_knowledge_summary = get_knowledge_summary
+    ontology_cls.knowledge_counters = property(_counters)
+    ontology_cls._knowledge_counted = True
+    return ontology_cls
+
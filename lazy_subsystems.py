@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ============================================================
+# LAZY ENGINE SUBSYSTEMS
+# ============================================================
+# The engine's ML models, risk manager and real-time streamer
+# are constructed on first use rather than in its constructor,
+# so building the engine (dashboard, CLI scripts, benchmarks)
+# does not pay for model setup or a streaming client when
+# ml_enabled / real_time_enabled are off. Each subsystem is an
+# explicit factory bound to an engine attribute; a factory given
+# as "module:attribute" also defers importing that module (and
+# whatever heavy libraries it imports) until first use. A
+# subsystem whose config flag is off is never built.
+# ============================================================
+
+import functools
+import importlib
+import threading
+import time
+from typing import Any, Callable, Dict, Tuple
+
+# Engine attribute -> (config flag gating its use, factory called with the engine's config)
+SubsystemFactories = Dict[str, Tuple[str, Callable[[Any], Any]]]
+
+
+def import_factory(path: str) -> Callable[[Any], Any]:
+    """Factory for ``"module:attribute"`` that imports the module on its first call
+
+    The attribute (usually a class) is called with the engine's config.
+    """
+    module_name, _, attribute = path.partition(":")
+
+    def factory(config: Any) -> Any:
+        return getattr(importlib.import_module(module_name), attribute)(config)
+    factory.__name__ = attribute
+    return factory
+
+
+# Instance marker set while the wrapped engine constructor runs
+_CONSTRUCTING = "_constructing_subsystems"
+
+
+class SubsystemDisabled(AttributeError):
+    """A deferred subsystem was accessed while its config flag is off"""
+
+
+class LazySubsystem:
+    """Engine attribute whose value is built by ``factory(engine.config)`` on first access
+
+    The built object is stored in the instance's __dict__, so every later
+    access (and isinstance, bool, ...) sees the real subsystem. While the
+    config flag is off, access raises SubsystemDisabled (an AttributeError, so
+    ``getattr(engine, name, None)`` is None) and nothing is built.
+
+    Assigning the attribute after construction sets it directly, flag or not
+    (a test double, say). Assignments made by the engine constructor itself
+    are ignored: the factory stays in charge of building the subsystem.
+    """
+
+    def __init__(self, name: str, flag: str, factory: Callable[[Any], Any]):
+        self.name = name
+        self.flag = flag
+        self.factory = factory
+        self._lock = threading.Lock()
+
+    def __get__(self, engine: Any, owner: type = None) -> Any:
+        if engine is None:
+            return self
+        try:
+            return engine.__dict__[self.name]
+        except KeyError:
+            pass
+        if not self.enabled(engine):
+            raise SubsystemDisabled(f"{self.name} is disabled ({self.flag} is off)")
+        with self._lock:
+            if self.name not in engine.__dict__:
+                from instrumentation import metrics
+                started = time.perf_counter()
+                engine.__dict__[self.name] = self.factory(getattr(engine, "config", None))
+                metrics.observe("subsystem_load_seconds", time.perf_counter() - started, subsystem=self.name)
+        return engine.__dict__[self.name]
+
+    def __set__(self, engine: Any, value: Any):
+        if engine.__dict__.get(_CONSTRUCTING):
+            return
+        engine.__dict__[self.name] = value
+
+    def enabled(self, engine: Any) -> bool:
+        """Whether the config flag gating this subsystem is on"""
+        return bool(getattr(getattr(engine, "config", None), self.flag, True))
+
+    def loaded(self, engine: Any) -> bool:
+        return self.name in engine.__dict__
+
+
+def defer_subsystems(engine_cls: type, factories: SubsystemFactories) -> type:
+    """Give ``engine_cls`` a LazySubsystem attribute per entry of ``factories``
+
+    Objects the engine constructor assigns to these attributes are discarded
+    (it still pays for building them: leave them unset there); an assignment
+    after construction (a test double, say) takes the place of the factory.
+    """
+    if getattr(engine_cls, "_subsystems_deferred", False):
+        return engine_cls
+    for name, (flag, factory) in factories.items():
+        setattr(engine_cls, name, LazySubsystem(name, flag, factory))
+
+    constructor = engine_cls.__init__
+
+    @functools.wraps(constructor)
+    def __init__(self, *args, **kwargs):
+        outermost = _CONSTRUCTING not in self.__dict__
+        self.__dict__[_CONSTRUCTING] = True
+        try:
+            constructor(self, *args, **kwargs)
+        finally:
+            if outermost:
+                self.__dict__.pop(_CONSTRUCTING, None)
+
+    engine_cls.__init__ = __init__
+
+    def subsystem_status(self) -> Dict[str, Dict[str, bool]]:
+        """Which subsystems are enabled by config and which have been loaded"""
+        return {
+            name: {"enabled": subsystem.enabled(self), "loaded": subsystem.loaded(self)}
+            for name, subsystem in _subsystems(type(self)).items()
+        }
+
+    engine_cls.subsystem_status = subsystem_status
+    engine_cls._subsystems_deferred = True
+    return engine_cls
+
+
+def _subsystems(engine_cls: type) -> Dict[str, LazySubsystem]:
+    return {name: value for klass in reversed(engine_cls.__mro__)
+            for name, value in vars(klass).items() if isinstance(value, LazySubsystem)}
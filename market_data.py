@@ -0,0 +1,380 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ============================================================
+# MARKET DATA PROVIDERS
+# ============================================================
+# Pluggable sources of OHLCV history and live bars:
+#   - YahooQueryProvider: the production yahooquery path
+#   - SyntheticProvider:  deterministic generated bars for
+#                         benchmarks, load tests and offline runs
+#   - ReplayProvider:     replays stored histories at any speed
+# plus LiveBarFeed, which keeps the latest streamed bar per
+# symbol for the dashboard, and a local WebSocket stand-in
+# server for the streaming path
+# ============================================================
+
+import abc
+import asyncio
+import collections
+import json
+import logging
+import os
+import threading
+import zlib
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from bar_store import INTERVAL_LENGTHS, normalize_bars, utc_now, yahooquery_fetcher
+
+# Seconds between yahooquery polls for live bars (capped at the bar interval)
+DEFAULT_POLL_SECONDS = 15
+DEFAULT_LIVE_SYMBOLS = 50
+
+logger = logging.getLogger(__name__)
+
+SYNTHETIC_ANCHOR = datetime(2020, 1, 1)
+SYNTHETIC_BLOCK = 1024
+
+
+class MarketDataProvider(abc.ABC):
+    """Base interface for market data sources"""
+
+    name = "base"
+
+    @abc.abstractmethod
+    def fetch_history(self, symbol: str, start: Optional[datetime], end: Optional[datetime],
+                      interval: str = "1d") -> pd.DataFrame:
+        """OHLCV bars in [start, end) indexed by timestamp (naive UTC)"""
+
+    @abc.abstractmethod
+    def stream(self, symbols: List[str], interval: str = "1m") -> AsyncIterator[Dict[str, Any]]:
+        """Yield live bars as dicts (symbol, timestamp, open, high, low, close, volume)
+
+        A bar that is still forming may be yielded again with revised values.
+        """
+
+    def __call__(self, symbol: str, start: Optional[datetime], end: Optional[datetime],
+                 interval: str) -> pd.DataFrame:
+        # Providers double as BarStore fetchers
+        return self.fetch_history(symbol, start, end, interval)
+
+
+class YahooQueryProvider(MarketDataProvider):
+    """Bars from yahooquery; live bars are polled, as yahooquery has no push API"""
+
+    name = "yahoo"
+
+    def __init__(self, poll_seconds: float = DEFAULT_POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+
+    def fetch_history(self, symbol: str, start: Optional[datetime], end: Optional[datetime],
+                      interval: str = "1d") -> pd.DataFrame:
+        return yahooquery_fetcher(symbol, start, end, interval)
+
+    async def stream(self, symbols: List[str], interval: str = "1m") -> AsyncIterator[Dict[str, Any]]:
+        step = INTERVAL_LENGTHS.get(interval, timedelta(minutes=1))
+        delay = min(self.poll_seconds, step.total_seconds())
+        loop = asyncio.get_running_loop()
+        # Last message per symbol: the forming bar is re-sent only when it changes
+        sent: Dict[str, Dict[str, Any]] = {}
+        while True:
+            for symbol in symbols:
+                last = sent.get(symbol)
+                since = pd.Timestamp(last["timestamp"]).to_pydatetime() if last else utc_now() - 2 * step
+                bars = await loop.run_in_executor(None, self.fetch_history, symbol, since, None, interval)
+                for position in range(len(bars)):
+                    message = bar_to_message(symbol, bars.iloc[position:position + 1])
+                    if last is None or message["timestamp"] > last["timestamp"] or \
+                            (message["timestamp"] == last["timestamp"] and message != last):
+                        sent[symbol] = last = message
+                        yield message
+            await asyncio.sleep(delay)
+
+
+class SyntheticProvider(MarketDataProvider):
+    """Deterministic random-walk OHLCV generator
+
+    Bars are a pure function of (seed, symbol, interval, timestamp): the path is
+    built from fixed-size blocks, each a Brownian bridge between block levels, so
+    any window - or a tail fetched later - lines up with every other request.
+    """
+
+    name = "synthetic"
+
+    def __init__(self, seed: int = 42, start_price: float = 100.0, annual_volatility: float = 0.3,
+                 rate: float = 10.0, max_bars: int = 1_000_000):
+        self.seed = seed
+        self.start_price = start_price
+        self.annual_volatility = annual_volatility
+        self.rate = rate  # streamed bars per second per symbol
+        self.max_bars = max_bars
+        self._block_totals: Dict[tuple, float] = {}
+
+    # History -------------------------------------------------------------
+
+    def fetch_history(self, symbol: str, start: Optional[datetime], end: Optional[datetime],
+                      interval: str = "1d") -> pd.DataFrame:
+        step = INTERVAL_LENGTHS.get(interval, timedelta(days=1))
+        end = end or utc_now()
+        last = int((end - SYNTHETIC_ANCHOR) / step) - 1
+        first = int(np.ceil((start - SYNTHETIC_ANCHOR) / step)) if start is not None else last - self.max_bars + 1
+        first = max(first, last - self.max_bars + 1)
+        if last < first:
+            return normalize_bars(None)
+        return self.bars(symbol, first, last + 1, interval)
+
+    def bars(self, symbol: str, first: int, stop: int, interval: str = "1d") -> pd.DataFrame:
+        """Bars with indices [first, stop) counted in intervals from the anchor date"""
+        step = INTERVAL_LENGTHS.get(interval, timedelta(days=1))
+        sigma = self._bar_volatility(step)
+
+        log_close = self._log_path(symbol, interval, first - 1, stop, sigma)
+        close = self.start_price * np.exp(log_close[1:])
+        open_ = self.start_price * np.exp(log_close[:-1])
+
+        noise = self._block_draws(symbol, interval, "ohlc", first, stop, rows=3)
+        wick = np.abs(noise[:2]) * sigma * 0.5
+        high = np.maximum(open_, close) * (1 + wick[0])
+        low = np.minimum(open_, close) * (1 - wick[1])
+        volume = np.round(np.exp(13.0 + 0.4 * noise[2]))
+
+        index = pd.DatetimeIndex(
+            SYNTHETIC_ANCHOR + step * np.arange(first, stop), name="timestamp"
+        )
+        return pd.DataFrame({"open": open_, "high": high, "low": low, "close": close, "volume": volume}, index=index)
+
+    def _bar_volatility(self, step: timedelta) -> float:
+        return self.annual_volatility * np.sqrt(step / timedelta(days=365))
+
+    def _rng(self, symbol: str, interval: str, *parts: Any) -> np.random.Generator:
+        key = zlib.crc32(f"{symbol.upper()}|{interval}|{'|'.join(map(str, parts))}".encode())
+        return np.random.default_rng([self.seed, key])
+
+    def _block_draws(self, symbol: str, interval: str, kind: str, first: int, stop: int,
+                     rows: int = 1) -> np.ndarray:
+        """Standard normal draws for bars [first, stop), fixed per block"""
+        draws = np.empty((rows, stop - first))
+        for block in range(first // SYNTHETIC_BLOCK, (stop - 1) // SYNTHETIC_BLOCK + 1):
+            values = self._rng(symbol, interval, kind, block).standard_normal((rows, SYNTHETIC_BLOCK))
+            block_start = block * SYNTHETIC_BLOCK
+            lo, hi = max(first, block_start), min(stop, block_start + SYNTHETIC_BLOCK)
+            draws[:, lo - first:hi - first] = values[:, lo - block_start:hi - block_start]
+        return draws
+
+    def _block_total(self, symbol: str, interval: str, block: int, sigma: float) -> float:
+        key = (symbol.upper(), interval, block)
+        if key not in self._block_totals:
+            rng = self._rng(symbol, interval, "block", block)
+            self._block_totals[key] = float(rng.standard_normal() * sigma * np.sqrt(SYNTHETIC_BLOCK))
+        return self._block_totals[key]
+
+    def _block_level(self, symbol: str, interval: str, block: int, sigma: float) -> float:
+        if block >= 0:
+            return sum(self._block_total(symbol, interval, b, sigma) for b in range(block))
+        return -sum(self._block_total(symbol, interval, b, sigma) for b in range(block, 0))
+
+    def _log_path(self, symbol: str, interval: str, first: int, stop: int, sigma: float) -> np.ndarray:
+        """Log price (relative to start_price) of bars [first, stop)"""
+        path = np.empty(stop - first)
+        first_block, last_block = first // SYNTHETIC_BLOCK, (stop - 1) // SYNTHETIC_BLOCK
+        level = self._block_level(symbol, interval, first_block, sigma)
+
+        for block in range(first_block, last_block + 1):
+            total = self._block_total(symbol, interval, block, sigma)
+            steps = self._rng(symbol, interval, "path", block).standard_normal(SYNTHETIC_BLOCK) * sigma
+            # Brownian bridge: the block ends exactly at the next block level
+            walk = np.cumsum(steps)
+            bridge = walk - np.arange(1, SYNTHETIC_BLOCK + 1) / SYNTHETIC_BLOCK * (walk[-1] - total)
+
+            block_start = block * SYNTHETIC_BLOCK
+            lo, hi = max(first, block_start), min(stop, block_start + SYNTHETIC_BLOCK)
+            path[lo - first:hi - first] = level + bridge[lo - block_start:hi - block_start]
+            level += total
+
+        return path
+
+    # Streaming -----------------------------------------------------------
+
+    async def stream(self, symbols: List[str], interval: str = "1m") -> AsyncIterator[Dict[str, Any]]:
+        step = INTERVAL_LENGTHS.get(interval, timedelta(minutes=1))
+        index = int((utc_now() - SYNTHETIC_ANCHOR) / step)
+        while True:
+            for symbol in symbols:
+                yield bar_to_message(symbol, self.bars(symbol, index, index + 1, interval))
+            index += 1
+            await asyncio.sleep(1.0 / self.rate if self.rate else 0)
+
+
+class ReplayProvider(MarketDataProvider):
+    """Serves and replays stored histories (DataFrames or a BarStore)"""
+
+    name = "replay"
+
+    def __init__(self, histories: Optional[Dict[str, pd.DataFrame]] = None, store: Any = None,
+                 rate: float = 10.0):
+        self.histories = {symbol.upper(): normalize_bars(df) for symbol, df in (histories or {}).items()}
+        self.store = store
+        self.rate = rate
+
+    def _history(self, symbol: str, interval: str) -> pd.DataFrame:
+        if symbol.upper() in self.histories:
+            return self.histories[symbol.upper()]
+        if self.store is not None:
+            return self.store.read(symbol, interval)
+        return normalize_bars(None)
+
+    def fetch_history(self, symbol: str, start: Optional[datetime], end: Optional[datetime],
+                      interval: str = "1d") -> pd.DataFrame:
+        bars = self._history(symbol, interval)
+        if start is not None:
+            bars = bars[bars.index >= start]
+        if end is not None:
+            bars = bars[bars.index < end]
+        return bars
+
+    async def stream(self, symbols: List[str], interval: str = "1d") -> AsyncIterator[Dict[str, Any]]:
+        histories = {symbol: self._history(symbol, interval) for symbol in symbols}
+        for position in range(max((len(h) for h in histories.values()), default=0)):
+            for symbol, history in histories.items():
+                if position < len(history):
+                    yield bar_to_message(symbol, history.iloc[position:position + 1])
+            await asyncio.sleep(1.0 / self.rate if self.rate else 0)
+
+
+def bar_to_message(symbol: str, bar: pd.DataFrame) -> Dict[str, Any]:
+    """Convert a one-row OHLCV frame to a streaming message"""
+    row = bar.iloc[0]
+    return {
+        "symbol": symbol,
+        "timestamp": bar.index[0].isoformat(),
+        "open": float(row["open"]),
+        "high": float(row["high"]),
+        "low": float(row["low"]),
+        "close": float(row["close"]),
+        "volume": float(row["volume"])
+    }
+
+
+class LiveBarFeed:
+    """Latest live bar per subscribed symbol, streamed from a provider on a background loop
+
+    Subscriptions are kept for the most recent ``max_symbols`` symbols; a
+    change restarts the provider stream for the new set.
+    """
+
+    def __init__(self, provider: MarketDataProvider, interval: str = "1m",
+                 max_symbols: int = DEFAULT_LIVE_SYMBOLS):
+        self.provider = provider
+        self.interval = interval
+        self.max_symbols = max_symbols
+        self._symbols: "collections.OrderedDict[str, None]" = collections.OrderedDict()
+        self._latest: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pid: Optional[int] = None
+        self._task: Optional[Future] = None
+
+    def subscribe(self, symbols: List[str]):
+        """Stream these symbols (in addition to recent subscriptions)"""
+        symbols = [s.strip().upper() for s in symbols if s and s.strip()]
+        with self._lock:
+            added = [s for s in symbols if s not in self._symbols]
+            for symbol in symbols:
+                self._symbols[symbol] = None
+                self._symbols.move_to_end(symbol)
+            while len(self._symbols) > self.max_symbols:
+                self._latest.pop(self._symbols.popitem(last=False)[0], None)
+            if added or self._task is None or self._task.done() or self._pid != os.getpid():
+                self._restart()
+
+    def latest(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Most recent bar streamed for ``symbol``, if any"""
+        with self._lock:
+            return self._latest.get(symbol.strip().upper())
+
+    def stop(self):
+        with self._lock:
+            if self._task is not None:
+                self._task.cancel()
+                self._task = None
+
+    def _restart(self):
+        # Threads do not survive fork: each worker starts its own loop
+        if self._loop is None or self._pid != os.getpid():
+            self._loop, self._pid, self._task = asyncio.new_event_loop(), os.getpid(), None
+            threading.Thread(target=self._loop.run_forever, name="live-bars", daemon=True).start()
+        if self._task is not None:
+            self._task.cancel()
+        self._task = asyncio.run_coroutine_threadsafe(self._consume(list(self._symbols)), self._loop)
+
+    async def _consume(self, symbols: List[str]):
+        try:
+            async for message in self.provider.stream(symbols, self.interval):
+                with self._lock:
+                    if message["symbol"].upper() in self._symbols:
+                        self._latest[message["symbol"].upper()] = message
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # The next subscribe() restarts the stream
+            logger.warning("Live %s stream for %s failed: %s", self.provider.name, ", ".join(symbols), e)
+
+
+async def serve_websocket(provider: MarketDataProvider, host: str = "127.0.0.1", port: int = 8765,
+                          interval: str = "1m"):
+    """Local WebSocket stand-in for the live feed
+
+    Clients connect to ``ws://host:port/?symbols=AAPL,MSFT`` (point
+    ``SystemConfig.websocket_url`` here) and receive one JSON message per bar.
+    """
+    from aiohttp import web
+
+    async def handler(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        symbols = [s for s in request.query.get("symbols", "AAPL").split(",") if s]
+        async for message in provider.stream(symbols, request.query.get("interval", interval)):
+            if ws.closed:
+                break
+            await ws.send_str(json.dumps(message))
+        return ws
+
+    app = web.Application()
+    app.router.add_get("/", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+PROVIDERS = {
+    "yahoo": YahooQueryProvider,
+    "synthetic": SyntheticProvider,
+    "replay": ReplayProvider
+}
+
+
+def create_provider(config: Any = None) -> MarketDataProvider:
+    """Provider selected by config.data_provider or the MARKET_DATA_PROVIDER env var
+
+    ``replay`` serves the bar store at config.replay_store_path / REPLAY_STORE_PATH
+    (default: the engine's bar store path). Raises ValueError for unknown names.
+    """
+    name = getattr(config, "data_provider", None) or os.environ.get("MARKET_DATA_PROVIDER", "yahoo")
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown market data provider {name!r} (expected one of {', '.join(PROVIDERS)})")
+    if name == "synthetic":
+        return SyntheticProvider(seed=int(os.environ.get("SYNTHETIC_SEED", 42)),
+                                 rate=float(os.environ.get("SYNTHETIC_RATE", 10.0)))
+    if name == "replay":
+        from bar_store import BarStore
+        root = (getattr(config, "replay_store_path", None) or os.environ.get("REPLAY_STORE_PATH")
+                or getattr(config, "bar_store_path", "./data/bars"))
+        return ReplayProvider(store=BarStore(root, retention_days=None, offline=True),
+                              rate=float(os.environ.get("REPLAY_RATE", 10.0)))
+    return YahooQueryProvider(poll_seconds=float(os.environ.get("YAHOO_POLL_SECONDS", DEFAULT_POLL_SECONDS)))
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ============================================================
+# BULK ONTOLOGY INGESTION
+# ============================================================
+# Columnar indicator blocks (e.g. vectorized classifier output
+# for a whole universe) written to the ontology in one batch:
+# indicator statements are minted directly from the columns with
+# every URI and label interned once, each symbol gets its own run
+# graph, and the whole block reaches the store as one transaction.
+# The signal index and knowledge counters are fed as add_indicator
+# would feed them.
+# ============================================================
+
+import functools
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+from rdflib import RDF, Literal, Namespace, URIRef
+
+from signal_classification import decode, indicator_labels
+
+BLOCK_COLUMNS = ("symbol", "indicator", "value", "signal", "confidence")
+
+# Namespace of minted statements unless the graph binds the "stock" prefix
+STOCK = Namespace("urn:eos:stock#")
+
+# Statements minted per indicator row: node -> (predicate local name, column)
+INDICATOR_PROPERTIES = (
+    ("indicatorOf", "symbol"),
+    ("indicatorType", "indicator"),
+    ("hasValue", "value"),
+    ("hasSignal", "signal"),
+    ("hasConfidence", "confidence")
+)
+
+# Indicator name -> snapshot column holding its value
+VALUE_COLUMNS = {
+    "RSI": "rsi",
+    "MACD": "macd",
+    "STOCH": "stoch_k",
+    "ADX": "adx",
+    "MFI": "mfi",
+    "CCI": "cci"
+}
+
+
+def indicator_block(symbols: Union[str, Sequence[str]], columns: Dict[str, Any],
+                    classified: Dict[str, Tuple[np.ndarray, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Flatten classify_indicator_columns output into a columnar indicator block
+
+    ``columns`` and ``classified`` hold one value per symbol (scalars for a single
+    symbol, or arrays aligned with ``symbols`` for a universe).
+    """
+    symbols = np.atleast_1d(np.asarray(symbols, dtype=object))
+    parts = {name: [] for name in BLOCK_COLUMNS}
+
+    for name, (codes, confidence) in classified.items():
+        values = columns.get(VALUE_COLUMNS.get(name, name.lower()), columns.get("close"))
+        parts["symbol"].append(symbols)
+        parts["indicator"].append(np.full(len(symbols), name, dtype=object))
+        parts["value"].append(np.broadcast_to(np.asarray(values, dtype=np.float64), symbols.shape))
+        parts["signal"].append(np.atleast_1d(decode(np.asarray(codes), indicator_labels(name))))
+        parts["confidence"].append(np.broadcast_to(np.asarray(confidence, dtype=np.float64), symbols.shape))
+
+    if not classified:
+        return {name: np.empty(0, dtype=object if name in ("symbol", "indicator", "signal") else np.float64)
+                for name in BLOCK_COLUMNS}
+    return {name: np.concatenate(chunks) for name, chunks in parts.items()}
+
+
+@functools.lru_cache(maxsize=65536)
+def _uri(namespace: str, local: str) -> URIRef:
+    return URIRef(namespace + local)
+
+
+@functools.lru_cache(maxsize=4096)
+def _label(value: str) -> Literal:
+    return Literal(value)
+
+
+def _namespace(graph: Any) -> str:
+    bound = dict(graph.namespaces()).get("stock")
+    return str(bound) if bound is not None else str(STOCK)
+
+
+def mint_indicator_rows(block: Dict[str, Any], rows: np.ndarray, stamp: int, namespace: str,
+                        context: Any = None) -> Tuple[List[URIRef], List[tuple]]:
+    """Nodes and quads for some rows of a block (a None context is routed to the active run)"""
+    indicator_class = _uri(namespace, "TechnicalIndicator")
+    predicates = {column: _uri(namespace, name) for name, column in INDICATOR_PROPERTIES}
+    nodes, quads = [], []
+    for row in rows:
+        symbol, indicator = str(block["symbol"][row]), str(block["indicator"][row])
+        node = _uri(namespace, f"{symbol}_{indicator}_{stamp}_{row}")
+        objects = {
+            "symbol": _uri(namespace, symbol),
+            "indicator": _label(indicator),
+            "value": Literal(float(block["value"][row])),
+            "signal": _label(str(block["signal"][row])),
+            "confidence": Literal(float(block["confidence"][row]))
+        }
+        nodes.append(node)
+        quads.append((node, RDF.type, indicator_class, context))
+        quads.extend((node, predicates[column], objects[column], context) for _, column in INDICATOR_PROPERTIES)
+    return nodes, quads
+
+
+def add_indicator_block(ontology: Any, block: Dict[str, Any], skip_nan: bool = True,
+                        through_add_indicator: bool = False) -> List[Any]:
+    """Add every row of an indicator block in one transaction
+
+    Rows are grouped per symbol; outside an analysis run each symbol's rows go to
+    its own run graph, inside one they join the active run. Statements are minted
+    directly (see INDICATOR_PROPERTIES) unless ``through_add_indicator`` asks for
+    one add_indicator call per row.
+    """
+    from ontology_partitions import PartitionedGraph, active_run
+
+    graph = ontology.graph
+    partitioned = isinstance(graph, PartitionedGraph)
+    symbols = np.asarray(block["symbol"], dtype=object)
+    values = np.asarray(block["value"], dtype=np.float64)
+    keep = ~np.isnan(values) if skip_nan else np.ones(len(values), dtype=bool)
+    namespace = _namespace(graph)
+    # Fed here for minted rows, as the add_indicator wrappers feed them
+    index = ontology.signal_index if getattr(type(ontology), "signal_index", None) is not None else None
+    counters = ontology.knowledge_counters if getattr(type(ontology), "knowledge_counters", None) is not None else None
+
+    nodes = []
+    with graph.batch() if partitioned else nullcontext():
+        for symbol in dict.fromkeys(symbols[keep]):
+            rows = np.flatnonzero(keep & (symbols == symbol))
+            scope = graph.run(symbol) if partitioned and active_run() is None else nullcontext()
+            with scope:
+                if through_add_indicator:
+                    for row in rows:
+                        nodes.append(ontology.add_indicator(
+                            symbol, block["indicator"][row], float(values[row]),
+                            block["signal"][row], float(block["confidence"][row])
+                        ))
+                    continue
+                run = active_run()
+                stamp = int(run.created * 1e6) if run is not None else time.time_ns() // 1000
+                context = None if partitioned else graph
+                minted, quads = mint_indicator_rows(block, rows, stamp, namespace, context)
+                if index is not None:
+                    _index_rows(index, block, rows, minted, run, graph)
+                graph.addN(quads)
+                if counters is not None:
+                    _count_rows(counters, block, rows, run)
+                nodes.extend(minted)
+    return nodes
+
+
+def _index_rows(index: Any, block: Dict[str, Any], rows: np.ndarray, nodes: List[URIRef], run: Any, graph: Any):
+    """Record rows in the signal index (and their entries in a persistent store)"""
+    from ontology_index import entry_text, mark_store
+
+    marks = []
+    for node, row in zip(nodes, rows):
+        entry = index.record(node, str(block["symbol"][row]), str(block["indicator"][row]), str(block["signal"][row]),
+                             float(block["confidence"][row]), run.identifier if run is not None else None)
+        if entry is not None:
+            marks.append((entry.run, node, entry_text(entry)))
+    store = mark_store(graph)
+    if store is not None and marks:
+        store.add_signal_marks(marks)
+
+
+def _count_rows(counters: Any, block: Dict[str, Any], rows: np.ndarray, run: Any):
+    from knowledge_stats import CATEGORY_METHODS
+    from ontology_index import signal_polarity
+
+    graph_id = run.identifier if run is not None else None
+    for category in CATEGORY_METHODS["add_indicator"]:
+        counters.increment(category, graph_id, len(rows))
+    signals = sum(1 for row in rows if signal_polarity(block["signal"][row]))
+    if signals:
+        counters.increment("signals", graph_id, signals)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ============================================================
+# STREAMING ONTOLOGY EXPORT
+# ============================================================
+# Line-oriented serializations (N-Triples, N-Quads) produced in
+# fixed-size chunks straight from the store's triple iterator,
+# optionally gzip-compressed on the fly, so exporting a large
+# multi-symbol graph from the SQLite or compact store never
+# builds the whole document in memory. The in-memory rdflib store
+# cannot be iterated while it is written, so it is exported from
+# a copy of its statements.
+# ============================================================
+
+import zlib
+from contextlib import nullcontext
+from typing import Any, BinaryIO, Iterable, Iterator, Optional
+
+from rdflib import Dataset, Graph
+
+# Accepted format names -> canonical streaming format
+STREAM_FORMATS = {
+    "nt": "nt", "ntriples": "nt", "n-triples": "nt",
+    "nq": "nquads", "nquads": "nquads", "n-quads": "nquads"
+}
+
+# Document formats serialized whole by rdflib (one chunk)
+DOCUMENT_FORMATS = {
+    "turtle": "turtle", "ttl": "turtle", "xml": "xml", "pretty-xml": "pretty-xml",
+    "json-ld": "json-ld", "n3": "n3", "trig": "trig"
+}
+
+MEDIA_TYPES = {
+    "nt": "application/n-triples",
+    "nquads": "application/n-quads",
+    "turtle": "text/turtle",
+    "xml": "application/rdf+xml",
+    "pretty-xml": "application/rdf+xml",
+    "json-ld": "application/ld+json",
+    "n3": "text/n3",
+    "trig": "application/trig"
+}
+
+FILE_EXTENSIONS = {
+    "nt": "nt", "nquads": "nq", "turtle": "ttl", "xml": "rdf", "pretty-xml": "rdf",
+    "json-ld": "jsonld", "n3": "n3", "trig": "trig"
+}
+
+DEFAULT_CHUNK_STATEMENTS = 1000
+
+
+def stream_format(format: str) -> Optional[str]:
+    """Canonical streaming format name, or None for document formats (turtle, xml, ...)"""
+    return STREAM_FORMATS.get(str(format).lower())
+
+
+def export_format(format: str) -> str:
+    """Canonical name of an accepted export format; ValueError for anything else"""
+    name = str(format).lower()
+    canonical = STREAM_FORMATS.get(name) or DOCUMENT_FORMATS.get(name)
+    if canonical is None:
+        accepted = ", ".join(sorted(set(STREAM_FORMATS) | set(DOCUMENT_FORMATS)))
+        raise ValueError(f"Unsupported export format {format!r} (expected one of {accepted})")
+    return canonical
+
+
+def _statements(graph: Any, format: str) -> Iterable[tuple]:
+    """Triples (or quads with graph identifiers), read safely alongside writers
+
+    Stores that allow reads during writes (``concurrent_reads``: SQLite, compact)
+    are streamed from their iterator. Others (rdflib's in-memory store raises
+    "dictionary changed size" when written mid-iteration) are copied first,
+    under the graph's ``write_lock`` when it has one.
+    """
+    if format == "nquads" and hasattr(graph, "quads"):
+        def read():
+            return ((s, p, o, getattr(c, "identifier", c)) for s, p, o, c in graph.quads((None, None, None, None)))
+    else:
+        def read():
+            return graph.triples((None, None, None))
+    if getattr(getattr(graph, "store", None), "concurrent_reads", False):
+        return read()
+    with getattr(graph, "write_lock", None) or nullcontext():
+        return list(read())
+
+
+def _serialize_chunk(statements: list, format: str) -> bytes:
+    """One chunk of N-Triples/N-Quads lines through rdflib's serializer"""
+    if format == "nt":
+        chunk = Graph()
+        chunk.addN((s, p, o, chunk) for s, p, o in statements)
+    else:
+        chunk = Dataset()
+        for statement in statements:
+            chunk.add(statement if len(statement) == 4 and statement[3] is not None else statement[:3])
+    return chunk.serialize(format=format, encoding="utf-8").rstrip(b"\n") + b"\n"
+
+
+def iter_export(graph: Any, format: str = "nt", compress: bool = False,
+                chunk_statements: int = DEFAULT_CHUNK_STATEMENTS) -> Iterator[bytes]:
+    """Serialized graph as a sequence of UTF-8 (or gzip) byte chunks
+
+    N-Triples/N-Quads are streamed ``chunk_statements`` lines at a time; document
+    formats are serialized whole and arrive as a single chunk. Raises ValueError
+    (before anything is produced) for a format outside the accepted ones.
+    """
+    canonical = export_format(format)
+    return _export_chunks(graph, canonical, compress, chunk_statements)
+
+
+def _export_chunks(graph: Any, canonical: str, compress: bool, chunk_statements: int) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31: gzip container
+
+    def emit(data: bytes) -> bytes:
+        return compressor.compress(data) if compressor else data
+
+    if canonical in DOCUMENT_FORMATS.values():
+        chunk = emit(graph.serialize(format=canonical, encoding="utf-8"))
+        if chunk:
+            yield chunk
+    else:
+        statements = []
+        for statement in _statements(graph, canonical):
+            statements.append(statement)
+            if len(statements) >= chunk_statements:
+                chunk = emit(_serialize_chunk(statements, canonical))
+                statements.clear()
+                if chunk:
+                    yield chunk
+        if statements:
+            chunk = emit(_serialize_chunk(statements, canonical))
+            if chunk:
+                yield chunk
+
+    if compressor:
+        yield compressor.flush()
+
+
+def write_export(graph: Any, destination: BinaryIO, format: str = "nt", compress: bool = False,
+                 chunk_statements: int = DEFAULT_CHUNK_STATEMENTS) -> int:
+    """Stream an export into a binary file object; returns bytes written"""
+    written = 0
+    for chunk in iter_export(graph, format, compress, chunk_statements):
+        destination.write(chunk)
+        written += len(chunk)
+    return written
+
+
+def register_export_routes(server: Any, engine: Any):
+    """Expose /ontology/export on a Flask server, streamed without buffering
+
+    Query parameters: ``symbol`` (optional), ``format`` (nt, nquads, or one of
+    DOCUMENT_FORMATS; anything else is a 400) and ``gzip=1`` for a .gz download;
+    otherwise ``Accept-Encoding: gzip`` compresses the transfer (``gzip=0`` disables both).
+    """
+    import json
+
+    from flask import Response, request, stream_with_context
+
+    @server.route("/ontology/export")
+    def export_ontology():
+        symbol = request.args.get("symbol") or None
+        format = request.args.get("format", "nt")
+        as_file = request.args.get("gzip") == "1"
+        transfer = "gzip" not in request.args and "gzip" in request.headers.get("Accept-Encoding", "")
+        compress = as_file or transfer
+
+        try:
+            canonical = export_format(format)
+        except ValueError as e:
+            return Response(json.dumps({"error": str(e)}), status=400, mimetype="application/json")
+        chunks = engine.stream_ontology_graph(symbol=symbol, format=canonical, compress=compress)
+        response = Response(stream_with_context(chunks), mimetype=MEDIA_TYPES[canonical])
+        name = f"ontology-{symbol or 'all'}.{FILE_EXTENSIONS[canonical]}"
+        if as_file:
+            name += ".gz"
+            response.mimetype = "application/gzip"
+        elif transfer:
+            response.headers["Content-Encoding"] = "gzip"
+            response.headers["Vary"] = "Accept-Encoding"
+        response.headers["Content-Disposition"] = f'attachment; filename="{name}"'
+        response.headers["X-Accel-Buffering"] = "no"  # keep reverse proxies from buffering the stream
+        return response
@@ -0,0 +1,339 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ============================================================
+# ONTOLOGY SIGNAL INDEX
+# ============================================================
+# Secondary index over indicator and ML-prediction statements
+# keyed by (symbol, run graph, indicator family, polarity).
+# Contradictions and confirmations are read from the index for
+# one symbol's latest analysis run instead of scanning the graph;
+# a run's entries leave the index when retention drops its graph.
+# A persistent store also keeps each indexed statement's entry,
+# in a side table outside the RDF graphs (exports and statement
+# counts never see it), so the index is rebuilt after a restart.
+# ============================================================
+
+import functools
+import inspect
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BULLISH = 1
+BEARISH = -1
+
+INDICATOR_FAMILIES = {
+    "SMA": "trend", "EMA": "trend", "MACD": "trend", "ADX": "trend", "PSAR": "trend",
+    "RSI": "momentum", "STOCH": "momentum", "CCI": "momentum", "WILLR": "momentum", "ROC": "momentum",
+    "MFI": "volume", "OBV": "volume", "VWAP": "volume",
+    "ATR": "volatility", "BB": "volatility", "BOLLINGER": "volatility"
+}
+
+STRONG_CONFIDENCE = 0.7
+
+# Parameters read from the wrapped ontology methods (as documented in the README)
+INDICATOR_PARAMETERS = ("symbol", "indicator_type", "signal", "confidence")
+PREDICTION_PARAMETERS = ("symbol", "model_type", "prediction", "confidence")
+
+
+class IndexedSignal(NamedTuple):
+    node: Any
+    symbol: str
+    indicator: str
+    family: str
+    polarity: int
+    confidence: float
+    run: Any
+
+
+def signal_polarity(signal: str) -> int:
+    """+1 for labels containing "bullish", -1 for "bearish", else 0
+
+    The same reading of signal labels the engine's evidence extraction uses;
+    other labels (overbought, above, ...) carry no direction here.
+    """
+    label = str(signal).lower()
+    if "bullish" in label:
+        return BULLISH
+    if "bearish" in label:
+        return BEARISH
+    return 0
+
+
+def indicator_family(indicator_type: str) -> str:
+    """Family of an indicator type such as SMA_20, RSI or STOCH"""
+    name = str(indicator_type).upper()
+    for prefix in (name, name.split("_", 1)[0]):
+        if prefix in INDICATOR_FAMILIES:
+            return INDICATOR_FAMILIES[prefix]
+    return "other"
+
+
+def entry_text(entry: IndexedSignal) -> str:
+    """Stored form of an indexed signal: "symbol<TAB>indicator<TAB>family<TAB>polarity<TAB>confidence"""
+    return "\t".join((entry.symbol, entry.indicator, entry.family, str(entry.polarity), repr(entry.confidence)))
+
+
+def parse_entry(node: Any, value: Any, run: Any) -> Optional[IndexedSignal]:
+    """Inverse of entry_text (None for a malformed value)"""
+    try:
+        symbol, indicator, family, polarity, confidence = str(value).split("\t")
+        return IndexedSignal(node, symbol, indicator, family, int(polarity), float(confidence), run)
+    except ValueError:
+        return None
+
+
+def mark_store(graph: Any) -> Any:
+    """The graph's store if it keeps signal entries (SQLiteStore.add_signal_marks), else None"""
+    store = getattr(graph, "store", None)
+    return store if hasattr(store, "add_signal_marks") else None
+
+
+class _RunSignals:
+    """Entries and running pair counts of one symbol's run"""
+
+    def __init__(self):
+        self.buckets: Dict[Tuple[str, int], List[IndexedSignal]] = defaultdict(list)
+        self.polarity_counts: Dict[int, int] = defaultdict(int)
+        self.strong_counts: Dict[Tuple[int, str], int] = defaultdict(int)
+        self.contradictions = 0
+        self.confirmations = 0
+
+
+class SignalIndex:
+    """Signals bucketed by (symbol, run, family, polarity)
+
+    ``totals`` holds the contradiction/confirmation counts of every symbol's
+    latest run, so re-running an analysis replaces a symbol's contribution
+    instead of adding to it.
+    """
+
+    def __init__(self, strong_confidence: float = STRONG_CONFIDENCE):
+        self.strong_confidence = strong_confidence
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self._signals: Dict[Tuple[str, Any], _RunSignals] = {}
+        # Runs with entries per symbol, in the order they were first seen (latest last)
+        self._runs: Dict[str, List[Any]] = {}
+        self.totals = {"contradictions": 0, "confirmations": 0}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(entries) for run in self._signals.values() for entries in run.buckets.values())
+
+    def record(self, node: Any, symbol: str, indicator: str, signal: str, confidence: float,
+               run: Any = None, family: Optional[str] = None,
+               polarity: Optional[int] = None) -> Optional[IndexedSignal]:
+        """Index a directional statement of a run (``polarity`` defaults to signal_polarity); neutral ones are ignored"""
+        polarity = signal_polarity(signal) if polarity is None else polarity
+        if not polarity:
+            return None
+        entry = IndexedSignal(node, symbol.upper(), indicator, family or indicator_family(indicator),
+                              polarity, float(confidence), run)
+        with self._lock:
+            self._add(entry)
+        return entry
+
+    def _add(self, entry: IndexedSignal):
+        runs = self._runs.setdefault(entry.symbol, [])
+        if entry.run not in runs:
+            if runs:
+                self._count_totals(self._signals[(entry.symbol, runs[-1])], -1)
+            runs.append(entry.run)
+            self._signals[(entry.symbol, entry.run)] = _RunSignals()
+        signals = self._signals[(entry.symbol, entry.run)]
+        latest = runs[-1] == entry.run
+        if latest:
+            self._count_totals(signals, -1)
+        self._count_pairs(signals, entry)
+        if latest:
+            self._count_totals(signals, 1)
+        signals.buckets[(entry.family, entry.polarity)].append(entry)
+
+    def _count_pairs(self, signals: _RunSignals, entry: IndexedSignal):
+        """Update a run's contradiction/confirmation counts for a new entry"""
+        polarity = entry.polarity
+        signals.contradictions += signals.polarity_counts[-polarity]
+        if entry.confidence >= self.strong_confidence:
+            signals.confirmations += (signals.strong_counts[(polarity, "")]
+                                      - signals.strong_counts[(polarity, entry.indicator)])
+            signals.strong_counts[(polarity, "")] += 1
+            signals.strong_counts[(polarity, entry.indicator)] += 1
+        signals.polarity_counts[polarity] += 1
+
+    def _count_totals(self, signals: _RunSignals, sign: int):
+        self.totals["contradictions"] += sign * signals.contradictions
+        self.totals["confirmations"] += sign * signals.confirmations
+
+    def drop_run(self, run: Any):
+        """Forget a run's entries (PartitionedGraph.graph_removed_hooks)"""
+        with self._lock:
+            for symbol in [s for s, runs in self._runs.items() if run in runs]:
+                runs = self._runs[symbol]
+                if runs[-1] == run:
+                    self._count_totals(self._signals[(symbol, run)], -1)
+                    if len(runs) > 1:
+                        self._count_totals(self._signals[(symbol, runs[-2])], 1)
+                runs.remove(run)
+                del self._signals[(symbol, run)]
+                if not runs:
+                    del self._runs[symbol]
+
+    def rebuild(self, graph: Any) -> int:
+        """Re-index the entries the graph's store keeps (default graph first, then run graphs oldest first)
+
+        Entries of run graphs that are not in the store (a batch that never
+        got written) are skipped.
+        """
+        store = mark_store(graph)
+        marks = defaultdict(list)
+        for run, node, value in (store.signal_marks() if store is not None else ()):
+            marks[run].append((node, value))
+        runs = [None]
+        if hasattr(graph, "run_graphs"):
+            runs.extend(run.identifier for symbol_runs in graph.run_graphs().values() for run in symbol_runs)
+        entries = [entry for run in runs for node, value in marks.get(run, ())
+                   for entry in [parse_entry(node, value, run)] if entry is not None]
+        with self._lock:
+            self._clear()
+            for entry in entries:
+                self._add(entry)
+        return len(entries)
+
+    def latest_run(self, symbol: str) -> Any:
+        with self._lock:
+            runs = self._runs.get(symbol.upper())
+            return runs[-1] if runs else None
+
+    def _select(self, symbol: str, run: Any, family: Optional[str], polarity: Optional[int]) -> List[IndexedSignal]:
+        runs = self._runs.get(symbol)
+        if not runs:
+            return []
+        signals = self._signals.get((symbol, runs[-1] if run is None else run))
+        if signals is None:
+            return []
+        return [entry for (fam, pol), entries in signals.buckets.items()
+                if (family is None or fam == family) and (polarity is None or pol == polarity)
+                for entry in entries]
+
+    def signals(self, symbol: str, run: Any = None, family: Optional[str] = None,
+                polarity: Optional[int] = None) -> List[IndexedSignal]:
+        """Signals for one symbol in a run (default: its latest)"""
+        with self._lock:
+            return self._select(symbol.upper(), run, family, polarity)
+
+    def contradictions(self, symbol: Optional[str] = None, family: Optional[str] = None,
+                       run: Any = None) -> List[Tuple[Any, Any, float]]:
+        """Bullish/bearish statement pairs with strength min(confidence)"""
+        result = []
+        with self._lock:
+            for sym in self._symbols(symbol):
+                bullish = self._select(sym, run, family, BULLISH)
+                bearish = self._select(sym, run, family, BEARISH)
+                result.extend((a.node, b.node, min(a.confidence, b.confidence)) for a in bullish for b in bearish)
+        return result
+
+    def confirmations(self, symbol: Optional[str] = None, family: Optional[str] = None,
+                      run: Any = None) -> List[Tuple[Any, Any, float]]:
+        """Pairs of strong same-direction signals from different indicators"""
+        result = []
+        with self._lock:
+            for sym in self._symbols(symbol):
+                for polarity in (BULLISH, BEARISH):
+                    strong = [e for e in self._select(sym, run, family, polarity)
+                              if e.confidence >= self.strong_confidence]
+                    for i, a in enumerate(strong):
+                        result.extend((a.node, b.node, min(a.confidence, b.confidence))
+                                      for b in strong[i + 1:] if b.indicator != a.indicator)
+        return result
+
+    def counts(self, symbol: Optional[str] = None) -> Dict[str, int]:
+        """Contradiction/confirmation counts of the latest run(s), without building pairs"""
+        with self._lock:
+            if symbol is None:
+                return dict(self.totals)
+            runs = self._runs.get(symbol.upper())
+            signals = self._signals[(symbol.upper(), runs[-1])] if runs else _RunSignals()
+            return {"contradictions": signals.contradictions, "confirmations": signals.confirmations}
+
+    def _symbols(self, symbol: Optional[str]) -> List[str]:
+        return [symbol.upper()] if symbol else list(self._runs)
+
+
+def index_ontology_class(ontology_cls: type) -> type:
+    """Maintain a SignalIndex on every instance of the ontology class
+
+    add_indicator/add_ml_prediction feed the index (and, on a persistent
+    store, keep each entry beside the graph), and detect_contradictions / find_confirmations
+    answer from it, optionally scoped to one symbol. Arguments are read by the
+    parameter names the README documents; a method whose signature lacks them
+    is left unwrapped.
+    """
+    if getattr(ontology_cls, "_signal_indexed", False):
+        return ontology_cls
+
+    def _index(self) -> SignalIndex:
+        index = self.__dict__.get("signal_index")
+        if index is None:
+            index = self.__dict__["signal_index"] = SignalIndex()
+            graph = getattr(self, "graph", None)
+            if hasattr(graph, "graph_removed_hooks"):
+                graph.graph_removed_hooks.append(index.drop_run)
+            if mark_store(graph) is not None:
+                index.rebuild(graph)  # persistent store: index what is already there
+        return index
+
+    def _wrap(method, parameters, prefix="", family=None):
+        signature = inspect.signature(method)
+        missing = [name for name in parameters if name not in signature.parameters]
+        if missing:
+            logger.warning("%s.%s has no %s parameter(s); its statements are not indexed",
+                           ontology_cls.__name__, method.__name__, ", ".join(missing))
+            return method
+        symbol_name, indicator_name, signal_name, confidence_name = parameters
+
+        @functools.wraps(method)
+        def indexed(self, *args, **kwargs):
+            index = _index(self)  # rebuilt (if at all) before this statement lands
+            node = method(self, *args, **kwargs)
+            arguments = signature.bind(self, *args, **kwargs)
+            arguments.apply_defaults()
+            values = arguments.arguments
+            from ontology_partitions import active_run
+            run = active_run()
+            entry = index.record(node, values[symbol_name], f"{prefix}{values[indicator_name]}",
+                                 values[signal_name], values[confidence_name],
+                                 run.identifier if run is not None else None, family=family)
+            store = mark_store(self.graph)
+            if entry is not None and node is not None and store is not None:
+                store.add_signal_marks([(entry.run, node, entry_text(entry))])
+            return node
+        return indexed
+
+    add_indicator = ontology_cls.__dict__.get("add_indicator")
+    if add_indicator is not None:
+        ontology_cls.add_indicator = _wrap(add_indicator, INDICATOR_PARAMETERS)
+
+    add_prediction = ontology_cls.__dict__.get("add_ml_prediction")
+    if add_prediction is not None:
+        ontology_cls.add_ml_prediction = _wrap(add_prediction, PREDICTION_PARAMETERS, prefix="ML_", family="ml")
+
+    def detect_contradictions(self, symbol: Optional[str] = None) -> List[Tuple[Any, Any, float]]:
+        """Opposing signals in the latest run (one symbol, or every symbol)"""
+        return _index(self).contradictions(symbol)
+
+    def find_confirmations(self, symbol: Optional[str] = None) -> List[Tuple[Any, Any, float]]:
+        """Strong agreeing signals in the latest run (one symbol, or every symbol)"""
+        return _index(self).confirmations(symbol)
+
+    ontology_cls.detect_contradictions = detect_contradictions
+    ontology_cls.find_confirmations = find_confirmations
+    ontology_cls.signal_index = property(_index)
+    ontology_cls._signal_indexed = True
+    return ontology_cls
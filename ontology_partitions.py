@@ -0,0 +1,387 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ============================================================
+# PARTITIONED ONTOLOGY GRAPH
+# ============================================================
+# Per-symbol, per-run named graphs on an rdflib Dataset. Schema
+# triples stay in the default graph; statements added while an
+# analysis run is active go to that run's graph, so old runs can
+# be dropped whole by time- and count-based retention.
+# ============================================================
+
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import quote, unquote
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from rdflib import Dataset, Graph, URIRef
+
+RUN_GRAPH_PREFIX = "urn:eos:run:"
+DEFAULT_MAX_RUNS_PER_SYMBOL = 3
+COMPACT_EVERY_RUNS = 100
+
+# Named graph of the analysis run executing in the current task/thread
+_active_run: contextvars.ContextVar = contextvars.ContextVar("eos_active_run", default=None)
+# Quads collected by PartitionedGraph.batch() in the current task/thread
+_pending_quads: contextvars.ContextVar = contextvars.ContextVar("eos_pending_quads", default=None)
+# Runs that ended inside that batch; their retention/compaction waits until it is written
+_batched_runs: contextvars.ContextVar = contextvars.ContextVar("eos_batched_runs", default=None)
+
+
+def active_run() -> Optional["RunGraph"]:
+    """Run graph receiving statements in the current task/thread, if any"""
+    return _active_run.get()
+
+
+@dataclass
+class RunGraph:
+    identifier: URIRef
+    symbol: str
+    created: float
+    graph: Any = None
+
+
+class PartitionedGraph(Dataset):
+    """Dataset whose triples are routed to the active run's named graph
+
+    Reads (len, triples, SPARQL, serialize) see the union of all graphs, so code
+    written against a plain Graph keeps working.
+    """
+
+    def __init__(self, store: Any = "default", retention_days: Optional[float] = 365,
+                 max_runs_per_symbol: Optional[int] = DEFAULT_MAX_RUNS_PER_SYMBOL):
+        super().__init__(store=store, default_union=True)
+        self.retention_days = retention_days
+        self.max_runs_per_symbol = max_runs_per_symbol
+        # Called with the time cutoff so side indexes can expire alongside the graphs
+        self.retention_hooks: List[Callable[[float], None]] = []
+        # Called with the identifier of every run graph dropped by retention or compaction
+        self.graph_removed_hooks: List[Callable[[Any], None]] = []
+        # Called with (identifier, statement count) once a run's statements are in the store
+        self.run_written_hooks: List[Callable[[Any, int], None]] = []
+        self._runs_since_compaction = 0
+        self._active: set = set()
+        self._runs: Optional[Dict[str, List[RunGraph]]] = None
+        # IncrementalReasoner materializing each run's consequences when it ends
+        self.reasoner: Any = None
+        self._active_lock = threading.Lock()
+        # Held by every write, so readers of stores that cannot be iterated during
+        # writes (rdflib's in-memory store) can copy statements under it
+        self.write_lock = threading.RLock()
+
+    @classmethod
+    def from_graph(cls, graph: Any, **kwargs) -> "PartitionedGraph":
+        """Wrap an existing graph, keeping its triples (the schema) in the default graph"""
+        partitioned = cls(**kwargs)
+        for prefix, namespace in graph.namespaces():
+            partitioned.bind(prefix, namespace, override=True)
+        default = partitioned.default_graph_context
+        Dataset.addN(partitioned, ((s, p, o, default) for s, p, o in graph.triples((None, None, None))))
+        partitioned._commit_if_transactional()
+        return partitioned
+
+    @property
+    def default_graph_context(self) -> Any:
+        # rdflib 7 renamed default_context to default_graph; read the attribute both share
+        default = getattr(self, "_default_context", None)
+        return default if default is not None else self.__dict__["default_context"]
+
+    # Routing -------------------------------------------------------------
+
+    def add(self, triple_or_quad):
+        run = _active_run.get()
+        if len(triple_or_quad) == 3:
+            context = self._run_graph(run) if run is not None else self.default_graph_context
+            triple_or_quad = (*triple_or_quad, context)
+        buffer = _pending_quads.get()
+        if buffer is not None:
+            buffer.append(triple_or_quad)
+            return self
+        with self.write_lock:
+            return super().add(triple_or_quad)
+
+    def addN(self, quads):
+        run = _active_run.get()
+        if run is not None:
+            target = self._run_graph(run)
+            default_id = self.default_graph_context.identifier
+            quads = ((s, p, o, target if c is None or getattr(c, "identifier", c) == default_id else c)
+                     for s, p, o, c in quads)
+        buffer = _pending_quads.get()
+        if buffer is not None:
+            buffer.extend(quads)
+            return self
+        with self.write_lock:
+            return super().addN(quads)
+
+    def remove(self, triple_or_quad):
+        with self.write_lock:
+            return super().remove(triple_or_quad)
+
+    def remove_graph(self, g):
+        with self.write_lock:
+            return super().remove_graph(g)
+
+    @contextmanager
+    def batch(self):
+        """Collect statements added in the block and write them as one transaction
+
+        Statements become visible when the block exits; if it raises, they are discarded.
+        Retention and compaction for runs that end inside the block wait until it is
+        written, so they never see (and drop) a run whose statements are still buffered.
+        """
+        if _pending_quads.get() is not None:
+            yield _pending_quads.get()  # nested: the outer batch writes
+            return
+        buffer: List[tuple] = []
+        ended: List[RunGraph] = []
+        token, runs_token = _pending_quads.set(buffer), _batched_runs.set(ended)
+        try:
+            yield buffer
+        except BaseException:
+            # Runs that ended in the block were never written: forget them (and what hooks counted)
+            with self._active_lock:
+                known = self._known_runs()
+                for run in ended:
+                    if run in known.get(run.symbol, ()):
+                        known[run.symbol].remove(run)
+            for run in ended:
+                self._drop_run_graph(run)
+            raise
+        finally:
+            _pending_quads.reset(token)
+            _batched_runs.reset(runs_token)
+        # Straight to the store: contexts are resolved once here instead of per quad
+        with self.write_lock:
+            self.store.addN((s, p, o, c if isinstance(c, Graph) else self.get_context(c)) for s, p, o, c in buffer)
+        self._commit_if_transactional()
+        for run in ended:
+            self._after_run(run)
+
+    def _run_graph(self, run: RunGraph) -> Any:
+        if run.graph is None:
+            run.graph = self.graph(run.identifier)
+        return run.graph
+
+    @contextmanager
+    def run(self, symbol: str):
+        """Route statements added inside the block to a new named graph for this run"""
+        created = time.time()
+        identifier = URIRef(f"{RUN_GRAPH_PREFIX}{quote(symbol.upper(), safe='')}:{int(created * 1e6)}")
+        run = RunGraph(identifier, symbol.upper(), created)
+        with self._active_lock:
+            self._active.add(identifier)
+            self._known_runs().setdefault(run.symbol, []).append(run)
+        token = _active_run.set(run)
+        try:
+            yield run
+            if self.reasoner is not None:
+                self._reason_over_run(run)
+        finally:
+            _active_run.reset(token)
+            with self._active_lock:
+                self._active.discard(identifier)
+            ended = _batched_runs.get()
+            if ended is not None:
+                ended.append(run)
+            else:
+                self._after_run(run)
+
+    def _reason_over_run(self, run: RunGraph):
+        """Materialize consequences of this run's statements (stored and still batched)"""
+        delta = list(run.graph.triples((None, None, None))) if run.graph is not None else []
+        buffer = _pending_quads.get()
+        if buffer:
+            delta.extend(quad[:3] for quad in buffer if quad[3] is run.graph)
+        if delta:
+            # Inferences are routed (and batched) like any other statement of the run
+            self.reasoner.materialize(self, delta, target=self)
+
+    def _commit_if_transactional(self):
+        if getattr(self.store, "transaction_aware", False):
+            self.commit()
+
+    # Retention -----------------------------------------------------------
+
+    def run_graphs(self, symbol: Optional[str] = None) -> Dict[str, List[RunGraph]]:
+        """Run graphs in the store by symbol, oldest first
+
+        Read from the store rather than kept in memory, so runs written by other
+        processes sharing a persistent store (or before a restart) are included.
+        """
+        runs: Dict[str, List[RunGraph]] = {}
+        for context in self.store.contexts():
+            identifier = getattr(context, "identifier", context)
+            name = str(identifier)
+            if not name.startswith(RUN_GRAPH_PREFIX):
+                continue
+            encoded_symbol, _, micros = name[len(RUN_GRAPH_PREFIX):].rpartition(":")
+            run_symbol = unquote(encoded_symbol)
+            if symbol is None or run_symbol == symbol.upper():
+                runs.setdefault(run_symbol, []).append(RunGraph(identifier, run_symbol, int(micros) / 1e6))
+        for symbol_runs in runs.values():
+            symbol_runs.sort(key=lambda run: run.created)
+        return runs
+
+    def _known_runs(self) -> Dict[str, List[RunGraph]]:
+        # Loaded from the store on first use and at each compaction; kept current locally
+        if self._runs is None:
+            self._runs = self.run_graphs()
+        return self._runs
+
+    def _after_run(self, run: RunGraph):
+        if self.run_written_hooks:
+            statements = len(run.graph) if run.graph is not None else 0
+            for hook in self.run_written_hooks:
+                hook(run.identifier, statements)
+        self.apply_retention(run.symbol)
+        self._runs_since_compaction += 1
+        if self._runs_since_compaction >= COMPACT_EVERY_RUNS:
+            self.compact()
+        self._commit_if_transactional()
+
+    def apply_retention(self, symbol: Optional[str] = None, now: Optional[float] = None) -> int:
+        """Drop run graphs past the age limit or beyond the per-symbol run count (runs still in progress are kept)"""
+        now = now or time.time()
+        cutoff = now - self.retention_days * 86400 if self.retention_days else None
+        with self._active_lock:
+            active = set(self._active)
+
+        expired = []
+        with self._active_lock:
+            known = self._known_runs()
+            for run_symbol in ([symbol.upper()] if symbol else list(known)):
+                runs = known.get(run_symbol, [])
+                keep = [r for r in runs if cutoff is None or r.created >= cutoff or r.identifier in active]
+                finished = [r for r in keep if r.identifier not in active]
+                if self.max_runs_per_symbol and len(finished) > self.max_runs_per_symbol:
+                    # Runs in progress are left out of the count: only the oldest finished runs go
+                    trimmed = {r.identifier for r in finished[:-self.max_runs_per_symbol]}
+                    keep = [r for r in keep if r.identifier not in trimmed]
+                kept = {r.identifier for r in keep}
+                expired.extend(r for r in runs if r.identifier not in kept)
+                if keep:
+                    known[run_symbol] = keep
+                else:
+                    known.pop(run_symbol, None)
+
+        for run in expired:
+            self._drop_run_graph(run)
+        if cutoff is not None:
+            for hook in self.retention_hooks:
+                hook(cutoff)
+        return len(expired)
+
+    def _drop_run_graph(self, run: RunGraph):
+        self.remove_graph(self.graph(run.identifier))
+        for hook in self.graph_removed_hooks:
+            hook(run.identifier)
+
+    def compact(self) -> Dict[str, int]:
+        """Apply retention to every symbol and drop empty run graphs"""
+        before = len(self)
+        with self._active_lock:
+            self._runs = None  # pick up runs written by other processes
+        dropped = self.apply_retention()
+        with self._active_lock:
+            active = set(self._active)
+        with self._active_lock:
+            empty = [run for runs in self._known_runs().values() for run in runs
+                     if run.identifier not in active and len(self.graph(run.identifier)) == 0]
+            for run in empty:
+                self._runs[run.symbol].remove(run)
+        for run in empty:
+            self._drop_run_graph(run)
+        dropped += len(empty)
+        self._runs_since_compaction = 0
+        self._commit_if_transactional()
+        return {"graphs_dropped": dropped, "statements_before": before, "statements_after": len(self)}
+
+    def run_graph(self, identifier: Any) -> Optional[Graph]:
+        """Named graph of a run by its identifier, or None if it was never written or has expired"""
+        identifier = URIRef(str(identifier))
+        if not identifier.startswith(RUN_GRAPH_PREFIX):
+            return None
+        symbol = unquote(identifier[len(RUN_GRAPH_PREFIX):].rpartition(":")[0])
+        with self._active_lock:
+            run = next((r for r in self._known_runs().get(symbol, ()) if r.identifier == identifier), None)
+        if run is not None and run.graph is not None:
+            return run.graph
+        # Loaded from the store, or written by another process since: probe that one graph
+        # (without adding it to the store, as self.graph() would)
+        graph = Graph(store=self.store, identifier=identifier)
+        return graph if next(iter(graph.triples((None, None, None))), None) is not None else None
+
+    def symbol_graph(self, symbol: str) -> Graph:
+        """Statements of a symbol's retained run graphs, copied into one plain Graph"""
+        subgraph = Graph()
+        for prefix, namespace in self.namespaces():
+            subgraph.bind(prefix, namespace)
+        for run in self.run_graphs(symbol).get(symbol.upper(), []):
+            with self.write_lock:
+                subgraph.addN((s, p, o, subgraph) for s, p, o in self.graph(run.identifier))
+        return subgraph
+
+    def partition_summary(self) -> Dict[str, Any]:
+        """Run graphs and statement counts per symbol"""
+        return {
+            symbol: {"runs": len(runs), "statements": sum(len(self.graph(r.identifier)) for r in runs)}
+            for symbol, runs in self.run_graphs().items()
+        }
+
+
+def partition_ontology_class(ontology_cls: type, retention_days: Optional[float] = 365,
+                             max_runs_per_symbol: Optional[int] = DEFAULT_MAX_RUNS_PER_SYMBOL,
+                             store_factory: Optional[Callable[[], Any]] = None,
+                             reasoning_mode: Optional[str] = None) -> type:
+    """Give every ontology instance a PartitionedGraph in place of its plain Graph
+
+    store_factory returns the rdflib store to use (None keeps the in-memory store);
+    reasoning_mode "incremental" materializes OWL-RL consequences at the end of each run.
+    """
+    if getattr(ontology_cls, "_partitioned", False):
+        return ontology_cls
+
+    original_init = ontology_cls.__init__
+
+    @functools.wraps(original_init)
+    def __init__(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        graph = getattr(self, "graph", None)
+        if graph is not None and not isinstance(graph, PartitionedGraph):
+            store = store_factory() if store_factory else None
+            self.graph = PartitionedGraph.from_graph(
+                graph, store=store if store is not None else "default",
+                retention_days=retention_days, max_runs_per_symbol=max_runs_per_symbol
+            )
+            if reasoning_mode == "incremental":
+                from incremental_reasoning import create_reasoner
+                self.graph.reasoner = create_reasoner(self.graph, reasoning_mode)
+
+    ontology_cls.__init__ = __init__
+    ontology_cls._partitioned = True
+    return ontology_cls
+
+
+def scope_analysis_runs(engine_cls: type) -> type:
+    """Run each analyze_symbol call inside its own named graph"""
+    analyze = engine_cls.__dict__.get("analyze_symbol")
+    if analyze is None or getattr(engine_cls, "_run_scoped", False):
+        return engine_cls
+
+    @functools.wraps(analyze)
+    async def analyze_symbol(self, symbol, *args, **kwargs):
+        graph = getattr(getattr(self, "ontology", None), "graph", None)
+        if not isinstance(graph, PartitionedGraph):
+            return await analyze(self, symbol, *args, **kwargs)
+        with graph.run(symbol):
+            return await analyze(self, symbol, *args, **kwargs)
+
+    engine_cls.analyze_symbol = analyze_symbol
+    engine_cls._run_scoped = True
+    return engine_cls
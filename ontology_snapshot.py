@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ============================================================
+# ONTOLOGY SNAPSHOT
+# ============================================================
+# Binary snapshot of a freshly built ontology (schema graph and
+# the rest of its constructor state) plus the compiled TBox
+# reasoner. Later processes unpickle it instead of rebuilding;
+# with gunicorn --preload the master loads it once, freezes the
+# heap and the workers share those pages copy-on-write.
+# ============================================================
+
+import functools
+import gc
+import hashlib
+import inspect
+import os
+import pickle
+import sys
+import tempfile
+from typing import Any, Dict, Optional
+
+import rdflib
+
+SNAPSHOT_VERSION = 1
+
+
+def snapshot_fingerprint(ontology_cls: type, *parts: Any) -> str:
+    """Hash of everything a snapshot depends on: code, library versions and constructor arguments"""
+    digest = hashlib.sha256()
+    digest.update(f"{SNAPSHOT_VERSION}|{sys.version}|{rdflib.__version__}|{ontology_cls.__qualname__}".encode())
+    try:
+        import owlrl
+        digest.update(getattr(owlrl, "__version__", "owlrl").encode())
+    except ImportError:
+        pass
+    import incremental_reasoning
+    for source in (inspect.getsourcefile(ontology_cls), incremental_reasoning.__file__):
+        try:
+            with open(source, "rb") as f:
+                digest.update(f.read())
+        except (OSError, TypeError):
+            digest.update(str(source).encode())
+    for part in parts:
+        digest.update(repr(part).encode())
+    return digest.hexdigest()
+
+
+def load_snapshot(path: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+    """Snapshot payload, or None if missing, stale or unreadable"""
+    try:
+        with open(path, "rb") as f:
+            header = pickle.load(f)
+            if not isinstance(header, dict) or header.get("fingerprint") != fingerprint:
+                return None
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, TypeError):
+        return None
+
+
+def write_snapshot(path: str, fingerprint: str, payload: Dict[str, Any]):
+    """Write atomically (temp file + rename) so concurrent workers never read a partial snapshot"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+    try:
+        with os.fdopen(handle, "wb") as f:
+            # Small header first: a stale snapshot is rejected without unpickling the body
+            pickle.dump({"fingerprint": fingerprint, "version": SNAPSHOT_VERSION}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+def snapshot_ontology_class(ontology_cls: type, path: Optional[str],
+                            reasoning_mode: Optional[str] = None) -> type:
+    """Restore ontology instances from a snapshot at ``path`` instead of running __init__
+
+    The first construction (or any after the code or libraries change) runs the
+    real constructor and writes the snapshot; state that cannot be pickled simply
+    disables it. Must be applied before partition_ontology_class, which wraps the
+    resulting __init__.
+    """
+    if not path or getattr(ontology_cls, "_snapshotted", False):
+        return ontology_cls
+
+    original_init = ontology_cls.__init__
+
+    @functools.wraps(original_init)
+    def __init__(self, *args, **kwargs):
+        from incremental_reasoning import cache_reasoner, create_reasoner
+        from instrumentation import metrics
+
+        fingerprint = snapshot_fingerprint(ontology_cls, args, sorted(kwargs.items()), reasoning_mode)
+        payload = load_snapshot(path, fingerprint)
+        if payload is not None:
+            self.__dict__.update(payload["state"])
+            if payload.get("reasoner") is not None:
+                cache_reasoner(self.graph, payload["reasoner"])
+            metrics.inc("ontology_snapshot_total", result="hit")
+            return
+
+        original_init(self, *args, **kwargs)
+        payload = {"state": dict(self.__dict__), "reasoner": None}
+        if reasoning_mode == "incremental" and getattr(self, "graph", None) is not None:
+            payload["reasoner"] = create_reasoner(self.graph, reasoning_mode)
+        try:
+            write_snapshot(path, fingerprint, payload)
+            metrics.inc("ontology_snapshot_total", result="miss")
+        except (OSError, pickle.PicklingError, TypeError, AttributeError):
+            metrics.inc("ontology_snapshot_total", result="error")
+
+    ontology_cls.__init__ = __init__
+    ontology_cls._snapshotted = True
+    return ontology_cls
+
+
+def snapshot_path(config: Any = None) -> Optional[str]:
+    """config.ontology_snapshot_path / ONTOLOGY_SNAPSHOT_PATH (None disables snapshots)"""
+    return getattr(config, "ontology_snapshot_path", None) or os.environ.get("ONTOLOGY_SNAPSHOT_PATH")
+
+
+def freeze_for_fork():
+    """Move everything built so far out of the cyclic GC's reach
+
+    Under gunicorn --preload the collector would otherwise write to (and so copy)
+    every shared page of the snapshot the master loaded. Called from the
+    ``pre_fork`` hook in gunicorn.conf.py, never at import: a process that does
+    not fork would only stop collecting its own garbage.
+    """
+    if hasattr(gc, "freeze"):
+        gc.collect()
+        gc.freeze()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ============================================================
+# PRICE SERIES FOR CHARTS
+# ============================================================
+# Server-side decimation of stored OHLCV bars down to roughly
+# one point per pixel of the chart, so long histories ("max" at
+# 1m) reach the browser as a few thousand points. Candles are
+# re-aggregated per bucket (open/high/low/close/volume stay
+# exact for the bucket); line views keep each bucket's extremes
+# (min/max) or its most salient point (LTTB). Series ship as
+# JSON columns or a packed little-endian binary block.
+# ============================================================
+
+import json
+import struct
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_WIDTH = 1000
+MAX_WIDTH = 10000
+METHODS = ("ohlc", "minmax", "lttb")
+
+# Column -> dtype of the binary encoding (prices as float32: ample for a chart)
+BINARY_DTYPES = {"t": "<f8", "open": "<f4", "high": "<f4", "low": "<f4", "close": "<f4", "volume": "<f4"}
+BINARY_MEDIA_TYPE = "application/vnd.eos.columns"
+
+
+def _timestamps_ms(index: pd.Index) -> np.ndarray:
+    return np.asarray(index.values.astype("datetime64[ms]").astype(np.int64))
+
+
+def _columns(bars: pd.DataFrame, rows: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    t = _timestamps_ms(bars.index)
+    columns = {"t": t, **{name: bars[name].to_numpy(dtype=np.float64) for name in BINARY_DTYPES if name != "t"}}
+    return columns if rows is None else {name: values[rows] for name, values in columns.items()}
+
+
+def aggregate_ohlc(bars: pd.DataFrame, buckets: int) -> Dict[str, np.ndarray]:
+    """Merge consecutive bars into ``buckets`` candles (first open, max high, min low, last close, summed volume)"""
+    n = len(bars)
+    if n <= buckets:
+        return _columns(bars)
+    starts = np.linspace(0, n, buckets + 1).astype(np.int64)[:-1]
+    ends = np.append(starts[1:], n) - 1
+    columns = _columns(bars)
+    return {
+        "t": columns["t"][starts],
+        "open": columns["open"][starts],
+        "high": np.maximum.reduceat(columns["high"], starts),
+        "low": np.minimum.reduceat(columns["low"], starts),
+        "close": columns["close"][ends],
+        "volume": np.add.reduceat(columns["volume"], starts)
+    }
+
+
+def minmax_rows(values: np.ndarray, buckets: int) -> np.ndarray:
+    """Indices of each bucket's minimum and maximum, in order (about 2 * buckets rows)"""
+    n = len(values)
+    if n <= 2 * buckets:
+        return np.arange(n)
+    size = -(-n // buckets)
+    padded = np.full(size * buckets, np.nan)
+    padded[:n] = values
+    blocks = padded.reshape(buckets, size)
+    valid = ~np.all(np.isnan(blocks), axis=1)
+    offsets = np.arange(buckets)[valid] * size
+    lows = offsets + np.nanargmin(blocks[valid], axis=1)
+    highs = offsets + np.nanargmax(blocks[valid], axis=1)
+    return np.unique(np.concatenate([lows, highs, [0, n - 1]]))
+
+
+def lttb_rows(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of ``threshold`` visually representative points"""
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = x.astype(np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    # Bucket averages are the third triangle vertex; they do not depend on earlier picks
+    sums_x, sums_y = np.add.reduceat(x[:-1], edges[:-1]), np.add.reduceat(y[:-1], edges[:-1])
+    counts = np.diff(edges)
+    means_x, means_y = sums_x / counts, sums_y / counts
+
+    rows = np.empty(threshold, dtype=np.int64)
+    rows[0], rows[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_x = means_x[bucket + 1] if bucket + 1 < len(means_x) else x[-1]
+        next_y = means_y[bucket + 1] if bucket + 1 < len(means_y) else y[-1]
+        px, py = x[previous], y[previous]
+        areas = np.abs((px - next_x) * (y[start:stop] - py) - (px - x[start:stop]) * (next_y - py))
+        previous = start + int(np.argmax(areas))
+        rows[bucket + 1] = previous
+    return rows
+
+
+def decimate(bars: pd.DataFrame, width: int = DEFAULT_WIDTH, method: str = "ohlc") -> Dict[str, np.ndarray]:
+    """Columns (``t`` in epoch ms plus OHLCV) of at most about ``width`` points"""
+    width = max(3, min(int(width), MAX_WIDTH))
+    if method == "ohlc":
+        return aggregate_ohlc(bars, width)
+    closes = bars["close"].to_numpy(dtype=np.float64)
+    if method == "minmax":
+        return _columns(bars, minmax_rows(closes, width // 2))
+    if method == "lttb":
+        return _columns(bars, lttb_rows(_timestamps_ms(bars.index), closes, width))
+    raise ValueError(f"Unknown decimation method {method!r} (expected one of {', '.join(METHODS)})")
+
+
+def parse_timestamp(value: Any) -> Optional[pd.Timestamp]:
+    """``value`` (ISO string, datetime, ...) as a naive UTC Timestamp, the stored bars' convention
+
+    Raises ValueError for anything that is not a timestamp.
+    """
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    try:
+        timestamp = pd.Timestamp(value)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid timestamp {value!r}") from e
+    if pd.isna(timestamp):
+        raise ValueError(f"Invalid timestamp {value!r}")
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert("UTC").tz_localize(None)
+    return timestamp
+
+
+def window(bars: pd.DataFrame, start: Optional[Any] = None, end: Optional[Any] = None) -> pd.DataFrame:
+    """Bars with ``start <= timestamp <= end`` (either bound optional, any timezone)"""
+    start, end = parse_timestamp(start), parse_timestamp(end)
+    if start is not None:
+        bars = bars[bars.index >= start]
+    if end is not None:
+        bars = bars[bars.index <= end]
+    return bars
+
+
+def encode_json(columns: Dict[str, np.ndarray], **meta: Any) -> str:
+    """Columnar JSON: ``{"columns": {"t": [...], "open": [...], ...}, **meta}``"""
+    return json.dumps({**meta, "points": len(columns["t"]),
+                       "columns": {name: values.tolist() for name, values in columns.items()}})
+
+
+def encode_binary(columns: Dict[str, np.ndarray], **meta: Any) -> bytes:
+    """uint32 header length, JSON header (padded to 8 bytes), then each column's raw bytes
+
+    The header lists ``[name, dtype, offset, length]`` per column; offsets are
+    relative to the end of the header and 8-byte aligned, so a browser can wrap
+    them directly in Float64Array / Float32Array views.
+    """
+    layout, blocks, offset = [], [], 0
+    for name, values in columns.items():
+        dtype = BINARY_DTYPES.get(name, "<f8")
+        block = np.ascontiguousarray(values, dtype=dtype).tobytes()
+        layout.append([name, dtype, offset, len(values)])
+        blocks.append(block + b"\0" * (-len(block) % 8))
+        offset += len(blocks[-1])
+    header = json.dumps({**meta, "points": len(columns["t"]), "columns": layout}).encode()
+    header += b" " * (-(len(header) + 4) % 8)
+    return struct.pack("<I", len(header)) + header + b"".join(blocks)
+
+
+def decode_binary(payload: bytes) -> Dict[str, Any]:
+    """Inverse of encode_binary: header fields plus numpy columns"""
+    (length,) = struct.unpack_from("<I", payload)
+    header = json.loads(payload[4:4 + length])
+    body = memoryview(payload)[4 + length:]
+    header["columns"] = {
+        name: np.frombuffer(body, dtype=dtype, count=count, offset=offset)
+        for name, dtype, offset, count in header["columns"]
+    }
+    return header
+
+
+def register_price_routes(server: Any, engine: Any):
+    """Expose /prices/<symbol> on a Flask server
+
+    Query parameters: ``period`` and ``interval`` (as for analysis), optional
+    ``start``/``end`` (ISO timestamps, for zoomed views; offsets such as ``Z``
+    are converted to UTC), ``width`` (target points, default 1000), ``method``
+    (ohlc, minmax or lttb) and ``format`` (json, or binary for the packed
+    column layout of encode_binary). Malformed parameters get a 400.
+    """
+    from flask import Response, request
+
+    @server.route("/prices/<symbol>")
+    def price_series(symbol):
+        try:
+            series = engine.price_series(
+                symbol,
+                period=request.args.get("period", "1y"),
+                interval=request.args.get("interval", "1d"),
+                width=int(request.args.get("width", DEFAULT_WIDTH)),
+                method=request.args.get("method", "ohlc"),
+                start=parse_timestamp(request.args.get("start")),
+                end=parse_timestamp(request.args.get("end"))
+            )
+        except ValueError as e:
+            return Response(json.dumps({"error": str(e)}), status=400, mimetype="application/json")
+
+        columns = series.pop("columns")
+        if request.args.get("format") == "binary":
+            return Response(encode_binary(columns, **series), mimetype=BINARY_MEDIA_TYPE)
+        return Response(encode_json(columns, **series), mimetype="application/json")
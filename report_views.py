@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ============================================================
+# DASHBOARD REPORT VIEWS
+# ============================================================
+# Splits an analysis report into the small per-panel slices the
+# dashboard renders. The split happens once on the server when a
+# job finishes; the browser parses one payload and hands every
+# panel callback only the fields it displays.
+# ============================================================
+
+from typing import Any, Dict, List, Optional
+
+# Panel -> dotted report paths it renders (nesting is kept in the slice);
+# "request" holds the job's symbol/period/interval/mode
+PANEL_FIELDS: Dict[str, List[str]] = {
+    "metrics": [
+        "market_context.market_state", "market_context.trend_direction",
+        "risk_assessment.risk_score", "overall_score", "overall_recommendation"
+    ],
+    "main-chart": [
+        "symbol", "request.period", "request.interval",
+        "market_context.support_levels", "market_context.resistance_levels"
+    ],
+    "indicators": ["symbol", "request.period", "request.interval"],
+    "ontology": [
+        "market_context.market_state", "market_context.trend_direction",
+        "market_context.volatility_regime", "market_context.volume_profile",
+        "market_context.support_levels", "market_context.resistance_levels"
+    ],
+    "ml": [
+        "ml_analysis.prediction", "ml_analysis.confidence", "ml_analysis.recommendation",
+        "anomaly_detection.is_anomaly", "anomaly_detection.anomaly_score"
+    ],
+    "risk": [
+        "risk_assessment.risk_score", "risk_assessment.position_size",
+        "risk_assessment.stop_loss", "risk_assessment.take_profit"
+    ],
+    "recommendations": ["overall_recommendation", "risk_assessment.recommendations"],
+    "knowledge": ["knowledge_summary"]
+}
+
+
+def slice_report(report: Dict[str, Any], paths: List[str]) -> Dict[str, Any]:
+    """Copy of ``report`` holding only ``paths``; missing paths are left out"""
+    view: Dict[str, Any] = {}
+    for path in paths:
+        *parents, leaf = path.split(".")
+        source = report
+        for key in parents:
+            source = source.get(key) if isinstance(source, dict) else None
+        if isinstance(source, dict) and leaf in source:
+            target = view
+            for key in parents:
+                target = target.setdefault(key, {})
+            target[leaf] = source[leaf]
+    return view
+
+
+def report_views(report: Dict[str, Any], request: Optional[Dict[str, str]] = None) -> Dict[str, Dict[str, Any]]:
+    """Per-panel slices of an analysis report, keyed like PANEL_FIELDS"""
+    if request is not None:
+        report = dict(report, request=request)
+    return {panel: slice_report(report, paths) for panel, paths in PANEL_FIELDS.items()}
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ============================================================
+# VECTORIZED SIGNAL CLASSIFICATION
+# ============================================================
+# NumPy counterparts of the engine's _classify_* helpers. Each
+# classifier labels arrays of any shape (a single history or a
+# symbols x bars matrix) and returns integer codes into its label
+# table plus a confidence array, matching the scalar rules exactly
+# ============================================================
+
+from typing import Dict, Tuple
+
+import numpy as np
+
+MA_LABELS = ("below", "strong_above", "above", "strong_below")
+ADX_LABELS = ("weak", "very_strong", "strong", "moderate")
+RSI_LABELS = ("neutral", "extremely_overbought", "overbought", "extremely_oversold", "oversold")
+MACD_LABELS = ("neutral", "strong_bullish", "bullish", "strong_bearish", "bearish")
+STOCHASTIC_LABELS = ("neutral", "overbought", "oversold", "bullish_cross", "bearish_cross")
+MFI_LABELS = RSI_LABELS
+CCI_LABELS = ("neutral", "overbought", "oversold")
+
+Classification = Tuple[np.ndarray, np.ndarray]
+
+
+def _select(conditions, codes, confidences, default_code: int, default_confidence) -> Classification:
+    """Apply ordered if/elif rules: the first matching condition wins"""
+    code = np.select(conditions, codes, default=default_code).astype(np.int8)
+    confidence = np.select(conditions, confidences, default=default_confidence).astype(np.float64)
+    return code, confidence
+
+
+def classify_ma_signal(current: np.ndarray, ma_value: np.ndarray, threshold: float = 0.02) -> Classification:
+    """Classify price vs moving average relationship
+
+    Where the scalar rule raised ZeroDivisionError on a zero moving average,
+    the deviation is taken as +/-inf: strong_above/strong_below with
+    confidence 1.0 (below with NaN confidence when the price is zero too).
+    """
+    current = np.asarray(current, dtype=np.float64)
+    ma_value = np.asarray(ma_value, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        deviation = (current - ma_value) / ma_value
+    return _select(
+        [deviation > threshold, deviation > 0, deviation < -threshold],
+        [1, 2, 3],
+        [np.minimum(deviation * 2, 1.0), deviation * 1.5, np.minimum(np.abs(deviation) * 2, 1.0)],
+        0, np.abs(deviation) * 1.5
+    )
+
+
+def classify_adx(value: np.ndarray) -> Classification:
+    """Classify ADX strength"""
+    value = np.asarray(value, dtype=np.float64)
+    return _select([value > 40, value > 25, value > 20], [1, 2, 3], [0.95, 0.8, 0.6], 0, 0.4)
+
+
+def classify_rsi(value: np.ndarray) -> Classification:
+    """Classify RSI signal"""
+    value = np.asarray(value, dtype=np.float64)
+    return _select(
+        [value > 80, value > 70, value < 20, value < 30],
+        [1, 2, 3, 4],
+        [0.95, 0.8, 0.95, 0.8],
+        0, 0.5
+    )
+
+
+def classify_macd(macd: np.ndarray, signal: np.ndarray, hist: np.ndarray) -> Classification:
+    """Classify MACD signal"""
+    macd = np.asarray(macd, dtype=np.float64)
+    signal = np.asarray(signal, dtype=np.float64)
+    strong = np.abs(np.asarray(hist, dtype=np.float64)) > 0.02
+    bullish = (macd > signal) & (macd > 0)
+    bearish = (macd < signal) & (macd < 0)
+    return _select(
+        [bullish & strong, bullish, bearish & strong, bearish],
+        [1, 2, 3, 4],
+        [0.85, 0.6, 0.85, 0.6],
+        0, 0.4
+    )
+
+
+def classify_stochastic(k: np.ndarray, d: np.ndarray) -> Classification:
+    """Classify Stochastic signal"""
+    k = np.asarray(k, dtype=np.float64)
+    d = np.asarray(d, dtype=np.float64)
+    return _select(
+        [(k > 80) & (d > 80), (k < 20) & (d < 20), (k > d) & (k < 50), (k < d) & (k > 50)],
+        [1, 2, 3, 4],
+        [0.8, 0.8, 0.7, 0.7],
+        0, 0.5
+    )
+
+
+def classify_mfi(value: np.ndarray) -> Classification:
+    """Classify MFI signal (similar to RSI)"""
+    return classify_rsi(value)
+
+
+def classify_cci(value: np.ndarray) -> Classification:
+    """Classify CCI signal"""
+    value = np.asarray(value, dtype=np.float64)
+    return _select([value > 100, value < -100], [1, 2], [0.7, 0.7], 0, 0.5)
+
+
+# Classifier registry: name -> (function, label table)
+CLASSIFIERS = {
+    "ma": (classify_ma_signal, MA_LABELS),
+    "adx": (classify_adx, ADX_LABELS),
+    "rsi": (classify_rsi, RSI_LABELS),
+    "macd": (classify_macd, MACD_LABELS),
+    "stochastic": (classify_stochastic, STOCHASTIC_LABELS),
+    "mfi": (classify_mfi, MFI_LABELS),
+    "cci": (classify_cci, CCI_LABELS)
+}
+
+
+# Indicator name (as produced by classify_indicator_columns) -> label table
+INDICATOR_LABELS = {
+    "RSI": RSI_LABELS,
+    "MACD": MACD_LABELS,
+    "STOCH": STOCHASTIC_LABELS,
+    "ADX": ADX_LABELS,
+    "MFI": MFI_LABELS,
+    "CCI": CCI_LABELS
+}
+
+
+def indicator_labels(name: str) -> Tuple[str, ...]:
+    """Label table for an indicator name such as SMA_50, RSI or STOCH"""
+    if name.startswith(("SMA_", "EMA_")):
+        return MA_LABELS
+    return INDICATOR_LABELS[name]
+
+
+def decode(codes: np.ndarray, labels: Tuple[str, ...]) -> np.ndarray:
+    """Map integer signal codes back to their string labels"""
+    return np.asarray(labels, dtype=object)[codes]
+
+
+def classify_indicator_columns(columns: Dict[str, np.ndarray]) -> Dict[str, Classification]:
+    """Classify every available indicator column of a history or universe matrix
+
+    ``columns`` uses the indicator snapshot names (``close``, ``sma_50``, ``rsi``,
+    ``macd``/``macd_signal``/``macd_hist``, ``stoch_k``/``stoch_d``, ``adx``, ``mfi``,
+    ``cci``...); all arrays must share one shape.
+    """
+    results = {}
+    close = columns.get("close")
+
+    for name in ("sma_20", "sma_50", "sma_200", "ema_12", "ema_26"):
+        if close is not None and name in columns:
+            results[name.upper()] = classify_ma_signal(close, columns[name])
+
+    if "rsi" in columns:
+        results["RSI"] = classify_rsi(columns["rsi"])
+    if {"macd", "macd_signal", "macd_hist"} <= columns.keys():
+        results["MACD"] = classify_macd(columns["macd"], columns["macd_signal"], columns["macd_hist"])
+    if {"stoch_k", "stoch_d"} <= columns.keys():
+        results["STOCH"] = classify_stochastic(columns["stoch_k"], columns["stoch_d"])
+    if "adx" in columns:
+        results["ADX"] = classify_adx(columns["adx"])
+    if "mfi" in columns:
+        results["MFI"] = classify_mfi(columns["mfi"])
+    if "cci" in columns:
+        results["CCI"] = classify_cci(columns["cci"])
+
+    return results
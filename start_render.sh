@@ -7,12 +7,22 @@ echo "🚀 Starting Enhanced Ontology Dashboard on Render..."
 # Set the port from environment variable or default to 8050
 PORT=${PORT:-8050}
 
+# Persist the knowledge graph across worker restarts; all workers share this file
+export ONTOLOGY_STORE_PATH=${ONTOLOGY_STORE_PATH:-./data/ontology.db}
+# Restore the built schema from a snapshot instead of rebuilding it on every start
+export ONTOLOGY_SNAPSHOT_PATH=${ONTOLOGY_SNAPSHOT_PATH:-./data/ontology_snapshot.pkl}
+
+# Each open /jobs/<id>/events stream holds a worker thread for up to 15 s; cap them
+# per worker so the remaining threads keep serving pages and callbacks
+export MAX_JOB_STREAMS=${MAX_JOB_STREAMS:-4}
+
 # Start the dashboard
 gunicorn enhanced_dashboard:server \
+    --config gunicorn.conf.py \
     --bind 0.0.0.0:$PORT \
     --workers 2 \
     --worker-class gthread \
-    --threads 2 \
+    --threads 8 \
     --timeout 120 \
     --keep-alive 5 \
     --max-requests 1000 \
@@ -0,0 +1,55 @@
+import os
+import sys
+
+# The modules live at the repository root rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+from rdflib import RDF, Graph, Literal, Namespace
+
+from knowledge_stats import count_ontology_class
+from ontology_index import index_ontology_class
+from ontology_partitions import partition_ontology_class
+
+EX = Namespace("http://example.org/stock#")
+
+
+@pytest.fixture
+def ohlcv_bars():
+    """Factory for ``n`` daily random-walk OHLCV bars from 2024-01-01"""
+    def bars(n, seed=1):
+        rng = np.random.default_rng(seed)
+        close = 100 + np.cumsum(rng.normal(0, 1, n))
+        index = pd.date_range("2024-01-01", periods=n, freq="D")
+        return pd.DataFrame({"open": close, "high": close + 1, "low": close - 1, "close": close,
+                             "volume": rng.uniform(1e5, 2e5, n)}, index=index)
+    return bars
+
+
+@pytest.fixture
+def ontology_class():
+    """Factory for an ontology stand-in with the README's add_indicator signature, wrapped like the
+    engine's EnhancedStockOntologyGraph (keyword arguments go to partition_ontology_class)"""
+    def make(**partition_kwargs):
+        counter = itertools.count()
+
+        class Ontology:
+            def __init__(self):
+                self.graph = Graph()
+                self.graph.add((EX.TechnicalIndicator, RDF.type, EX.Class))
+
+            def add_indicator(self, symbol, indicator_type, value, signal, confidence=1.0):
+                node = EX[f"{symbol}_{indicator_type}_{next(counter)}"]
+                self.graph.add((node, RDF.type, EX.TechnicalIndicator))
+                self.graph.add((node, EX.hasValue, Literal(value)))
+                return node
+
+        index_ontology_class(Ontology)
+        partition_ontology_class(Ontology, retention_days=None, **partition_kwargs)
+        count_ontology_class(Ontology)
+        return Ontology
+    return make
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+
+from analysis_cache import AnalysisCache, MemoryCacheBackend, cache_analysis_results, make_cache_key
+
+
+class FailingBackend(MemoryCacheBackend):
+    def get(self, key, stats):
+        raise ConnectionError("redis down")
+
+    def set(self, key, value, ttl, stats):
+        raise ConnectionError("redis down")
+
+
+class Engine:
+    """Engine stand-in with the engine's cache helpers"""
+
+    def __init__(self):
+        self.result_cache = AnalysisCache()
+        self.runs = []
+
+    def _get_cached_result(self, symbol, period, interval):
+        return self.result_cache.get(make_cache_key(symbol, period, interval))
+
+    def _cache_results(self, symbol, report, period, interval):
+        if "error" not in report:
+            self.result_cache.set(make_cache_key(symbol, period, interval), report)
+
+    async def analyze_symbol(self, symbol, period="1y", interval="1d"):
+        self.runs.append((symbol, period, interval))
+        return {"symbol": symbol, "interval": interval}
+
+
+cache_analysis_results(Engine)
+
+
+def test_memory_backend_returns_copies():
+    cache = AnalysisCache()
+    report = {"symbol": "AAPL", "market_context": {"levels": [1, 2]}}
+    cache.set("analysis:AAPL", report)
+    report["market_context"]["levels"].append(3)
+
+    first = cache.get("analysis:AAPL")
+    first["market_context"]["levels"].append(4)
+    assert cache.get("analysis:AAPL")["market_context"]["levels"] == [1, 2]
+
+
+def test_records_are_not_counted_as_report_lookups():
+    cache = AnalysisCache()
+    cache.set_record("job:1", {"status": "queued"})
+    assert cache.get_record("job:1") == {"status": "queued"}
+    assert cache.get_record("job:2") is None
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["sets"]) == (0, 0, 0)
+
+
+def test_backend_errors_are_logged(caplog):
+    cache = AnalysisCache(FailingBackend())
+    with caplog.at_level(logging.WARNING, logger="analysis_cache"):
+        cache.set("analysis:AAPL", {"symbol": "AAPL"})
+        assert cache.get("analysis:AAPL") is None
+    assert len([r for r in caplog.records if "redis down" in r.getMessage()]) == 2
+    assert cache.get_stats()["sets"] == 0
+
+
+def test_analyze_symbol_reads_the_cache_per_period_and_interval():
+    engine = Engine()
+
+    async def run():
+        await engine.analyze_symbol("AAPL", "1y", "1d")
+        await engine.analyze_symbol("AAPL", "1y", "1d")
+        minute = await engine.analyze_symbol("AAPL", "1y", interval="1m")
+        await engine.analyze_symbol("AAPL")
+        return minute
+
+    assert asyncio.run(run())["interval"] == "1m"
+    assert engine.runs == [("AAPL", "1y", "1d"), ("AAPL", "1y", "1m")]
+    stats = engine.result_cache.get_stats()
+    assert (stats["hits"], stats["misses"]) == (2, 2)
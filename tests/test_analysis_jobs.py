@@ -0,0 +1,183 @@
+import asyncio
+import threading
+
+import pytest
+
+from analysis_jobs import AnalysisSlots, JobExecutor
+
+
+class SlowEngine:
+    """Counts how many analyses overlap, across every loop that calls it"""
+
+    def __init__(self, limit):
+        self.analysis_slots = AnalysisSlots(limit)
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    async def analyze_symbol(self, symbol, period="1y", interval="1d"):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.02)
+        with self._lock:
+            self.active -= 1
+        return {"symbol": symbol}
+
+    async def analyze_batch(self, symbols):
+        async def bounded(symbol):
+            async with self.analysis_slots:
+                return await self.analyze_symbol(symbol)
+        return await asyncio.gather(*(bounded(symbol) for symbol in symbols))
+
+    def _error_result(self, symbol, error):
+        return {"symbol": symbol, "error": error}
+
+
+def test_slots_bound_analyses_across_event_loops():
+    engine = SlowEngine(2)
+
+    threads = [threading.Thread(target=asyncio.run, args=(engine.analyze_batch([f"S{i}" for i in range(6)]),))
+               for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert engine.peak == 2
+    assert engine.analysis_slots.stats() == {"active": 0, "waiting": 0, "limit": 2}
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    slots = AnalysisSlots(1)
+
+    async def run():
+        await slots.acquire()
+        waiter = asyncio.ensure_future(slots.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        slots.release()
+        await asyncio.sleep(0)
+        # The slot is free again and can be taken without waiting
+        await asyncio.wait_for(slots.acquire(), timeout=1)
+        slots.release()
+
+    asyncio.run(run())
+    assert slots.stats()["active"] == 0
+
+
+def test_executor_jobs_and_batches_share_the_engine_slots():
+    engine = SlowEngine(2)
+    executor = JobExecutor(engine)
+    assert executor.slots is engine.analysis_slots
+
+    job_ids = [executor.submit("session", f"J{i}", "1y", "1d") for i in range(4)]
+    asyncio.run(engine.analyze_batch([f"B{i}" for i in range(4)]))
+    for job_id in job_ids:
+        record = executor.wait("session", job_id, "queued", timeout=2)
+        while record["status"] not in ("done", "error"):
+            record = executor.wait("session", job_id, record["status"], timeout=2)
+        assert record["status"] == "done"
+    assert engine.peak == 2
+
+
+def finished(executor, job_id, session="session", attempts=3):
+    record = executor.wait(session, job_id, "queued", timeout=2)
+    for _ in range(attempts):
+        if record["status"] in ("done", "error"):
+            break
+        record = executor.wait(session, job_id, record["status"], timeout=2)
+    return record
+
+
+class FailingStore:
+    def set_record(self, key, record, ttl=None):
+        raise ConnectionError("store down")
+
+    def get_record(self, key):
+        raise ConnectionError("store down")
+
+
+def test_a_failing_presenter_marks_the_job_failed():
+    def present(report, request):
+        raise ValueError("cannot slice")
+
+    executor = JobExecutor(SlowEngine(1), present=present)
+    record = finished(executor, executor.submit("session", "AAPL", "1y", "1d"))
+    assert record["status"] == "error"
+    assert "cannot slice" in record["result"]["error"]
+    assert executor.stats()["in_flight"] == 0
+
+
+def test_reports_are_presented_off_the_event_loop():
+    threads = []
+
+    def present(report, request):
+        threads.append(threading.current_thread().name)
+        return {"views": report, "request": request}
+
+    executor = JobExecutor(SlowEngine(1), present=present)
+    record = finished(executor, executor.submit("session", "aapl", "1y", "1d"))
+    assert record["status"] == "done"
+    assert record["result"] == {"views": {"symbol": "AAPL"},
+                                "request": {"symbol": "AAPL", "period": "1y", "interval": "1d", "mode": "full"}}
+    assert threads and threads[0] != "analysis-jobs"
+
+
+def test_a_failing_job_store_does_not_strand_the_job():
+    executor = JobExecutor(SlowEngine(1), store=FailingStore())
+    job_id = executor.submit("session", "AAPL", "1y", "1d")
+    record = finished(executor, job_id)
+    assert record["status"] == "done"
+    assert executor.status("other-session", job_id) is None
+
+
+def test_job_events_read_the_session_from_a_cookie():
+    flask = pytest.importorskip("flask")
+    from analysis_jobs import SESSION_COOKIE, register_job_routes
+
+    executor = JobExecutor(SlowEngine(1))
+    server = flask.Flask(__name__)
+    register_job_routes(server, executor)
+    client = server.test_client()
+
+    client.get("/jobs/unknown/events")
+    cookie = client.get_cookie(SESSION_COOKIE)
+    assert cookie is not None and cookie.http_only
+    job_id = executor.submit(cookie.value, "AAPL", "1y", "1d")
+    finished(executor, job_id, cookie.value)
+
+    body = client.get(f"/jobs/{job_id}/events?session=ignored").get_data(as_text=True)
+    assert "event: result" in body
+
+
+def test_results_are_streamed_as_strict_json():
+    import json
+    import numpy as np
+    import pandas as pd
+
+    class NumericEngine(SlowEngine):
+        async def analyze_symbol(self, symbol, period="1y", interval="1d"):
+            return {"symbol": symbol, "score": np.float32(0.5), "count": np.int64(3), "flag": np.bool_(True),
+                    "rsi": float("nan"), "levels": np.array([1.0, np.inf]), "at": pd.Timestamp("2024-01-02"),
+                    "missing": pd.NaT}
+
+    executor = JobExecutor(NumericEngine(1))
+    job_id = executor.submit("session", "AAPL", "1y", "1d")
+    finished(executor, job_id)
+    event = [chunk for chunk in executor.events("session", job_id) if chunk.startswith("event: result")][0]
+    result = json.loads(event.split("data: ", 1)[1], parse_constant=lambda name: pytest.fail(name))
+    assert result == {"symbol": "AAPL", "score": 0.5, "count": 3, "flag": True, "rsi": None,
+                      "levels": [1.0, None], "at": "2024-01-02T00:00:00", "missing": None}
+
+
+def test_streams_beyond_the_budget_are_told_to_retry():
+    executor = JobExecutor(SlowEngine(1))
+    executor.max_streams = 1
+    job_id = executor.submit("session", "AAPL", "1y", "1d")
+    held = executor.events("session", job_id, duration=0.5)
+    assert next(held) == "retry: 1000\n\n"
+
+    assert list(executor.events("session", job_id)) == ["retry: 3000\n\n"]
+    held.close()
+    assert executor.stats()["streams"] == 0
+    assert any(chunk.startswith("event: result") for chunk in executor.events("session", job_id))
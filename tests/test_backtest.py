@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import DEFAULT_WEIGHTS, effective_weights, run_backtest, run_universe, score_history
+
+
+def trending(n=600, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.002, 0.01, n)))
+    index = pd.date_range("2020-01-01", periods=n, freq="B")
+    return pd.DataFrame({"open": close, "high": close * 1.01, "low": close * 0.99, "close": close,
+                         "volume": rng.uniform(1e6, 2e6, n)}, index=index)
+
+
+def test_weights_are_renormalized_without_ml():
+    weights = effective_weights(ml=False)
+    assert weights["ml"] == 0.0
+    assert sum(weights.values()) == pytest.approx(sum(DEFAULT_WEIGHTS.values()))
+    assert weights["ontology"] / weights["risk"] == pytest.approx(DEFAULT_WEIGHTS["ontology"] / DEFAULT_WEIGHTS["risk"])
+    assert effective_weights(ml=True) == DEFAULT_WEIGHTS
+
+
+def test_score_without_ml_reaches_strong_buy():
+    signals = score_history(trending(2520))
+    # With the ML term scored as zero the overall score could never pass 0.7
+    assert signals["overall_score"].max() > 0.7
+    assert (signals["recommendation"] == "strong_buy").any()
+
+
+def test_ml_confidence_is_threaded_through():
+    df = trending()
+    baseline = run_backtest("T", df).signals["overall_score"]
+    confident = run_backtest("T", df, ml_confidence=np.ones(len(df))).signals["overall_score"]
+    doubtful = run_backtest("T", df, ml_confidence=np.zeros(len(df))).signals["overall_score"]
+    assert (confident.dropna() > doubtful.dropna()).all()
+    assert not np.allclose(baseline.dropna(), doubtful.dropna())
+
+    results = run_universe({"A": df, "B": df}, processes=1, ml_confidence={"A": np.ones(len(df))})
+    np.testing.assert_allclose(results["A"].signals["overall_score"], confident)
+    np.testing.assert_allclose(results["B"].signals["overall_score"], baseline)
+
+    with pytest.raises(ValueError):
+        run_backtest("T", df, ml_confidence=np.ones(3))
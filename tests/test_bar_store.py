@@ -0,0 +1,92 @@
+import json
+import multiprocessing
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from bar_store import BarStore, period_start, utc_now
+
+
+def daily_bars(end, days=30, close=100.0):
+    index = pd.date_range(end=end, periods=days, freq="D")
+    values = np.full(days, close)
+    return pd.DataFrame({"open": values, "high": values + 1, "low": values - 1, "close": values,
+                         "volume": np.full(days, 1000.0)}, index=index)
+
+
+class Fetcher:
+    def __init__(self, close):
+        self.close = close
+        self.calls = []
+
+    def __call__(self, symbol, start, end, interval):
+        self.calls.append((start, end))
+        return daily_bars(utc_now().replace(hour=0, minute=0, second=0, microsecond=0), close=self.close)
+
+
+def age_update(root, seconds):
+    path = root / "1d" / "AAPL" / "meta.json"
+    meta = json.loads(path.read_text())
+    meta["updated"] = (pd.Timestamp(meta["updated"]) - timedelta(seconds=seconds)).isoformat()
+    path.write_text(json.dumps(meta))
+
+
+def test_todays_candle_is_refetched_after_the_ttl(tmp_path):
+    fetcher = Fetcher(100.0)
+    store = BarStore(tmp_path, fetcher=fetcher, refresh_seconds=60)
+    store.get_bars("AAPL", "1mo", "1d")
+
+    # Today's candle moves; within the TTL the stored bars are served
+    fetcher.close = 105.0
+    assert store.get_bars("AAPL", "1mo", "1d")["close"].iloc[-1] == 100.0
+    assert len(fetcher.calls) == 1
+
+    age_update(tmp_path, 61)
+    assert store.get_bars("AAPL", "1mo", "1d")["close"].iloc[-1] == 105.0
+    assert len(fetcher.calls) == 2
+
+
+def test_times_are_utc(tmp_path):
+    now = utc_now()
+    assert abs(period_start("1d") - (now - timedelta(days=1))) < timedelta(seconds=5)
+    store = BarStore(tmp_path, fetcher=Fetcher(100.0))
+    store.get_bars("AAPL", "1mo", "1d")
+    meta = json.loads((tmp_path / "1d" / "AAPL" / "meta.json").read_text())
+    assert pd.Timestamp(meta["updated"]).tzinfo is not None
+    assert abs(store._retention_cutoff() - (now - timedelta(days=365))) < timedelta(seconds=5)
+
+
+def _rewrite(root, rounds):
+    store = BarStore(root, offline=True, retention_days=None)
+    for i in range(rounds):
+        store.write("AAPL", "1d", daily_bars("2024-06-30", close=100.0 + i))
+
+
+def test_reads_survive_concurrent_writers_in_other_processes(tmp_path):
+    store = BarStore(tmp_path, offline=True, retention_days=None)
+    store.write("AAPL", "1d", daily_bars("2024-06-30"))
+
+    context = multiprocessing.get_context("fork")
+    writers = [context.Process(target=_rewrite, args=(tmp_path, 40)) for _ in range(2)]
+    for writer in writers:
+        writer.start()
+    try:
+        while any(writer.is_alive() for writer in writers):
+            assert len(store.read("AAPL", "1d")) == 30
+    finally:
+        for writer in writers:
+            writer.join()
+    assert all(writer.exitcode == 0 for writer in writers)
+    assert len([p for p in (tmp_path / "1d" / "AAPL").iterdir() if p.is_dir()]) == 1
+
+
+def test_reads_map_only_the_requested_window(tmp_path):
+    store = BarStore(tmp_path, retention_days=None, offline=True)
+    bars = daily_bars(pd.Timestamp("2024-03-31"), days=90)
+    store.write("AAPL", "1d", bars)
+
+    window = store.read("AAPL", "1d", pd.Timestamp("2024-03-01"), pd.Timestamp("2024-03-10"))
+    assert list(window.index) == list(bars.loc["2024-03-01":"2024-03-10"].index)
+    assert len(store.read("AAPL", "1d", start=pd.Timestamp("2025-01-01"))) == 0
+    assert store.stored("AAPL", "1d") and not store.stored("MSFT", "1d")
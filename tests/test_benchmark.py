@@ -0,0 +1,24 @@
+import json
+import sys
+
+import benchmark
+
+
+def test_benchmark_runs_on_standalone_modules_without_psutil(monkeypatch, tmp_path):
+    monkeypatch.setitem(sys.modules, "psutil", None)  # import psutil raises ImportError
+    assert "enhanced_ontology_system" not in sys.modules
+
+    output = tmp_path / "results.json"
+    assert benchmark.main(["--bars", "300", "--symbols", "2", "--output", str(output)]) == 0
+
+    results = json.loads(output.read_text())
+    (scenario,) = results["scenarios"]
+    assert scenario["symbols"] == 2
+    assert set(scenario["stages"]) == set(benchmark.STAGES)
+    assert scenario["peak_rss_mb"] > 0
+    assert "enhanced_ontology_system" not in sys.modules
+
+
+def test_rss_falls_back_without_psutil(monkeypatch):
+    monkeypatch.setitem(sys.modules, "psutil", None)
+    assert benchmark.rss_bytes() > 0
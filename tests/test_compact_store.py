@@ -0,0 +1,47 @@
+from collections import Counter
+
+from rdflib import Dataset, Literal, Namespace, URIRef
+from rdflib.namespace import XSD
+
+import compact_store
+from compact_store import CompactStore
+
+EX = Namespace("http://example.org/stock#")
+G1, G2 = URIRef("urn:eos:run:AAPL:1"), URIRef("urn:eos:run:AAPL:2")
+
+
+def quads(dataset):
+    return Counter(dataset.quads((None, None, None, None)))
+
+
+def test_union_view_groups_each_triple_with_every_graph(monkeypatch):
+    monkeypatch.setattr(compact_store, "TRIPLE_CHUNK_ROWS", 3)
+    compact, memory = Dataset(store=CompactStore()), Dataset()
+    for dataset in (compact, memory):
+        for i in range(20):
+            graph = dataset.get_context(G1 if i < 10 else G2)
+            dataset.addN([(EX[f"s{i % 4}"], EX.rsi, Literal(i % 3), graph),
+                          (EX[f"s{i % 4}"], EX.close, Literal(float(i % 5), datatype=XSD.double), graph),
+                          (EX[f"s{i % 4}"], EX.signal, Literal("bullish"), graph)])
+    assert quads(compact) == quads(memory)
+
+    union = list(compact.store.triples((None, None, None)))
+    assert len(union) == len(compact.store)
+    graphs = {triple: sorted(g.identifier for g in contexts) for triple, contexts in union}
+    assert graphs[(EX.s1, EX.rsi, Literal(1))] == [G1, G2]
+
+
+def test_triples_stream_in_chunks_and_survive_writes(monkeypatch):
+    monkeypatch.setattr(compact_store, "TRIPLE_CHUNK_ROWS", 10)
+    store = CompactStore()
+    expected = {(EX[f"s{i}"], EX.rsi, Literal(i)) for i in range(100)}
+    store.addN((*triple, G1) for triple in expected)
+
+    triples = store.triples((None, None, None), G1)
+    seen = {next(triples)[0]}
+    # Removing most rows compacts the store and renumbers every term
+    store.remove((None, None, None), G1)
+    store.addN((EX.MSFT, EX.rsi, Literal(i + 1000), G2) for i in range(compact_store.TAIL_ROWS + 10))
+    store.remove((EX.MSFT, None, None), G2)
+    seen.update(triple for triple, _ in triples)
+    assert seen == expected
@@ -0,0 +1,99 @@
+import pytest
+from rdflib import Graph, Literal, Namespace, OWL, RDF, RDFS
+
+import incremental_reasoning
+from incremental_reasoning import IncrementalReasoner, create_reasoner, tbox_triples
+
+owlrl = pytest.importorskip("owlrl")
+
+EX = Namespace("http://example.org/stock#")
+
+TBOX = [
+    # cax-sco (with an equivalent class)
+    (EX.TechStock, RDFS.subClassOf, EX.Stock), (EX.Stock, RDFS.subClassOf, EX.Asset),
+    (EX.Equity, OWL.equivalentClass, EX.Stock),
+    # prp-spo1, prp-dom, prp-rng (inherited down the property hierarchy)
+    (EX.hasMomentum, RDFS.subPropertyOf, EX.hasIndicator),
+    (EX.hasIndicator, RDFS.domain, EX.Asset), (EX.hasIndicator, RDFS.range, EX.Indicator),
+    (EX.closePrice, RDFS.domain, EX.Asset),
+    # prp-inv, prp-symp, prp-trp
+    (EX.indicatorOf, OWL.inverseOf, EX.hasIndicator),
+    (EX.confirms, RDF.type, OWL.SymmetricProperty), (EX.confirms, RDF.type, OWL.ObjectProperty),
+    (EX.leads, RDF.type, OWL.TransitiveProperty), (EX.leads, RDF.type, OWL.ObjectProperty),
+]
+FIRST_RUN = [
+    (EX.AAPL, RDF.type, EX.TechStock), (EX.AAPL, EX.hasMomentum, EX.RSI_AAPL),
+    (EX.RSI_AAPL, EX.confirms, EX.MACD_AAPL), (EX.MSFT, EX.leads, EX.AAPL),
+    (EX.NVDA, EX.leads, EX.AMD), (EX.XOM, EX.closePrice, Literal(101.5)),
+]
+# Joins the first run's transitive chains and reuses its individuals
+SECOND_RUN = [(EX.AAPL, EX.leads, EX.NVDA), (EX.MACD_AAPL, EX.indicatorOf, EX.MSFT), (EX.XOM, RDF.type, EX.Equity)]
+INDIVIDUALS = {EX.AAPL, EX.RSI_AAPL, EX.MACD_AAPL, EX.MSFT, EX.NVDA, EX.AMD, EX.XOM}
+
+
+def graph_of(*triples):
+    graph = Graph()
+    for triple in triples:
+        graph.add(triple)
+    return graph
+
+
+def abox(graph):
+    """Statements about individuals in the example vocabulary (what the covered rules derive)"""
+    return {(s, p, o) for s, p, o in graph if s in INDIVIDUALS and p != OWL.sameAs
+            and not (p == RDF.type and not str(o).startswith(str(EX)))}
+
+
+def full_closure(*triples):
+    graph = graph_of(*triples)
+    owlrl.DeductiveClosure(owlrl.OWLRL_Semantics, axiomatic_triples=False, datatype_axioms=False).expand(graph)
+    return abox(graph)
+
+
+def test_materialized_runs_match_full_owlrl_closure():
+    graph = graph_of(*TBOX, *FIRST_RUN)
+    reasoner = IncrementalReasoner.from_graph(graph)
+    reasoner.materialize(graph, FIRST_RUN)
+    assert abox(graph) == full_closure(*TBOX, *FIRST_RUN)
+
+    # The second run only derives from its own statements, joining with what is stored
+    for triple in SECOND_RUN:
+        graph.add(triple)
+    inferred = reasoner.materialize(graph, SECOND_RUN)
+    assert abox(graph) == full_closure(*TBOX, *FIRST_RUN, *SECOND_RUN)
+    assert (EX.MSFT, EX.leads, EX.AMD) in inferred and (EX.MSFT, EX.hasIndicator, EX.MACD_AAPL) in inferred
+    assert (EX.AAPL, RDF.type, EX.Asset) not in inferred
+
+
+def test_inferences_can_go_to_a_separate_target():
+    graph, target = graph_of(*TBOX, *FIRST_RUN), Graph()
+    inferred = IncrementalReasoner.from_graph(graph).materialize(graph, FIRST_RUN, target=target)
+    assert set(target) == set(inferred)
+    assert (EX.AAPL, RDF.type, EX.Asset) in target and (EX.AAPL, RDF.type, EX.Asset) not in graph
+
+
+def test_create_reasoner_compiles_each_tbox_once(monkeypatch):
+    monkeypatch.setattr(incremental_reasoning, "_REASONERS", incremental_reasoning.OrderedDict())
+    compiled = []
+    compile_tbox = IncrementalReasoner._compile
+    monkeypatch.setattr(IncrementalReasoner, "_compile", lambda self, tbox: (compiled.append(len(tbox)),
+                                                                             compile_tbox(self, tbox)))
+    first = create_reasoner(graph_of(*TBOX, *FIRST_RUN))
+    # Same schema, different data: the compiled reasoner is shared
+    assert create_reasoner(graph_of(*TBOX, *SECOND_RUN)) is first
+    assert len(compiled) == 1
+    assert create_reasoner(graph_of(*TBOX), mode="off") is None
+
+
+def test_compiled_reasoners_are_bounded(monkeypatch):
+    monkeypatch.setattr(incremental_reasoning, "_REASONERS", incremental_reasoning.OrderedDict())
+    monkeypatch.setattr(incremental_reasoning, "MAX_REASONERS", 2)
+    schemas = [graph_of((EX[f"Class{i}"], RDFS.subClassOf, EX.Asset)) for i in range(3)]
+    first = create_reasoner(schemas[0])
+    create_reasoner(schemas[1])
+    assert create_reasoner(schemas[0]) is first
+    create_reasoner(schemas[2])
+
+    assert len(incremental_reasoning._REASONERS) == 2
+    assert frozenset(tbox_triples(schemas[1])) not in incremental_reasoning._REASONERS
+    assert create_reasoner(schemas[0]) is first
@@ -0,0 +1,95 @@
+import threading
+
+import numpy as np
+
+from bar_store import BarStore
+from indicator_series import IndicatorSeriesCache
+
+
+def test_concurrent_updates_absorb_each_bar_once(ohlcv_bars):
+    df = ohlcv_bars(300)
+    expected = IndicatorSeriesCache()
+    expected.update("AAPL", "1d", df)
+
+    cache = IndicatorSeriesCache()
+    barrier = threading.Barrier(8)
+
+    def load(rows):
+        barrier.wait()
+        cache.update("aapl", "1d", df.iloc[:rows])
+
+    threads = [threading.Thread(target=load, args=(rows,)) for rows in (300, 150, 300, 200, 300, 250, 100, 300)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.cached("AAPL", "1d") and not cache.cached("AAPL", "1h")
+    window, reference = cache.window("AAPL", "1d"), expected.window("AAPL", "1d")
+    assert len(window["t"]) == 300
+    for name, column in window.items():
+        np.testing.assert_array_equal(column, reference[name])
+
+
+def test_update_reports_new_bars_and_discard_starts_over(ohlcv_bars):
+    df = ohlcv_bars(120)
+    cache = IndicatorSeriesCache()
+    snapshot, absorbed = cache.update("AAPL", "1d", df.iloc[:100])
+    assert absorbed == 100
+    # The 20 new bars, plus the previously forming last bar now closed
+    assert cache.update("AAPL", "1d", df)[1] == 21
+
+    cache.discard("AAPL", "1d")
+    assert not cache.cached("AAPL", "1d")
+    assert cache.update("AAPL", "1d", df.iloc[:100]) == (snapshot, 100)
+    assert len(cache.window("AAPL", "1d")["t"]) == 100
+
+
+def test_longer_history_after_a_short_load_is_replayed(ohlcv_bars):
+    df = ohlcv_bars(1260)
+    cache = IndicatorSeriesCache()
+    cache.update("AAPL", "1d", df.iloc[-22:])
+
+    snapshot, absorbed = cache.update("AAPL", "1d", df)
+    expected = IndicatorSeriesCache()
+    assert absorbed == 1260
+    assert snapshot == expected.update("AAPL", "1d", df)[0]
+    assert snapshot["sma_200"] is not None
+    assert len(cache.window("AAPL", "1d")["t"]) == 1260
+    assert cache.last_timestamp("AAPL", "1d") == df.index[-2]
+
+
+def test_least_recently_used_series_are_evicted(ohlcv_bars):
+    df = ohlcv_bars(30)
+    cache = IndicatorSeriesCache(max_series=2)
+    for symbol in ("AAPL", "MSFT"):
+        cache.update(symbol, "1d", df)
+    cache.update("AAPL", "1d", df)
+    cache.update("NVDA", "1d", df)
+
+    assert cache.cached("AAPL", "1d") and cache.cached("NVDA", "1d")
+    assert not cache.cached("MSFT", "1d") and cache.last_timestamp("MSFT", "1d") is None
+    assert cache.stats()["series"] == 2
+
+
+def test_stored_bars_fill_and_advance_without_fetching(tmp_path, ohlcv_bars):
+    df = ohlcv_bars(60)
+    BarStore(tmp_path, fetcher=lambda *args: df.iloc[:50].tz_localize("UTC"),
+             retention_days=None).get_bars("AAPL", "max", "1d")
+
+    def offline(*args):
+        raise AssertionError("chart fill must not fetch")
+
+    # Another worker: same bar files, empty indicator cache
+    store, cache = BarStore(tmp_path, fetcher=offline, retention_days=None), IndicatorSeriesCache()
+    assert cache.last_timestamp("AAPL", "1d") is None
+    cache.update("AAPL", "1d", store.read("AAPL", "1d"))
+    assert cache.last_timestamp("AAPL", "1d") == df.index[48]
+
+    # Newer bars land in the store; only those past the last committed bar are read
+    store.write("AAPL", "1d", df.iloc[50:])
+    since = cache.last_timestamp("AAPL", "1d")
+    assert cache.update("AAPL", "1d", store.read("AAPL", "1d", start=since))[1] == 11
+    window = cache.window("AAPL", "1d", start="2024-02-01")
+    assert len(window["t"]) == 29
+    np.testing.assert_allclose(window["close"], df["close"].iloc[31:].to_numpy(np.float32))
@@ -0,0 +1,82 @@
+import numpy as np
+
+from indicator_series import IndicatorSeries
+from indicator_state import IncrementalIndicatorState, RollingMean
+
+
+def replayed(df):
+    state, series = IncrementalIndicatorState(), IndicatorSeries()
+    state.update_from_frame(df, on_bar=series.record)
+    return state, series
+
+
+def test_forming_bar_is_revised_not_absorbed_twice(ohlcv_bars):
+    df = ohlcv_bars(60)
+    state, series = IncrementalIndicatorState(), IndicatorSeries()
+    state.update_from_frame(df, on_bar=series.record)
+
+    # The last (forming) bar trades on: same timestamp, new values
+    revised = df.copy()
+    revised.iloc[-1, revised.columns.get_loc("close")] += 5
+    revised.iloc[-1, revised.columns.get_loc("high")] += 5
+    assert state.update_from_frame(revised, on_bar=series.record) == 1
+
+    expected_state, expected_series = replayed(revised)
+    assert state.snapshot() == expected_state.snapshot()
+    assert state.last_timestamp == df.index[-2]
+    assert series.size == expected_series.size == 60
+    for name, column in series.window().items():
+        np.testing.assert_array_equal(column, expected_series.window()[name])
+
+
+def test_forming_bar_is_committed_once_a_newer_bar_arrives(ohlcv_bars):
+    df = ohlcv_bars(61)
+    state, series = IncrementalIndicatorState(), IndicatorSeries()
+    partial = df.iloc[:60].copy()
+    partial.iloc[-1, partial.columns.get_loc("close")] -= 3
+    state.update_from_frame(partial, on_bar=series.record)
+    state.update_from_frame(df, on_bar=series.record)
+
+    expected_state, expected_series = replayed(df)
+    assert state.snapshot() == expected_state.snapshot()
+    assert state.last_timestamp == df.index[-2]
+    np.testing.assert_array_equal(series.window()["t"], expected_series.window()["t"])
+    np.testing.assert_allclose(series.window()["volatility"], expected_series.window()["volatility"])
+
+
+def test_unchanged_frame_absorbs_nothing_new(ohlcv_bars):
+    df = ohlcv_bars(30)
+    state, _ = replayed(df)
+    before = state.snapshot()
+    assert state.update_from_frame(df) == 1  # only the forming bar is re-applied
+    assert state.snapshot() == before
+
+
+def test_bars_fed_one_at_a_time_match_a_replay(ohlcv_bars):
+    # A live feed sends only the newest bar: the previous forming bar must still be committed
+    df = ohlcv_bars(80)
+    state = IncrementalIndicatorState()
+    for i in range(len(df)):
+        state.update_from_frame(df.iloc[i:i + 1])
+
+    expected, _ = replayed(df)
+    assert state.snapshot() == expected.snapshot()
+    assert state.last_timestamp == df.index[-2] and state.first_timestamp == df.index[0]
+
+
+def test_forming_bar_leaves_the_committed_windows_alone(ohlcv_bars):
+    df = ohlcv_bars(40)
+    state, _ = replayed(df)
+    committed = (list(state.sma_20.values), list(state.highest_high.candidates), list(state.typical_prices))
+
+    state.update_from_frame(df.iloc[-1:].assign(close=500.0, high=501.0))
+    assert state.snapshot()["close"] == 500.0
+    assert (list(state.sma_20.values), list(state.highest_high.candidates), list(state.typical_prices)) == committed
+
+
+def test_rolling_mean_does_not_accumulate_rounding_error():
+    mean = RollingMean(3)
+    mean.update(1e17)
+    for value in (1.0, 2.0, 3.0, 4.0, 5.0, 6.0):
+        mean.update(value)
+    assert mean.value == 5.0
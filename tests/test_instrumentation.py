@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from analysis_cache import cache_analysis_results
+from instrumentation import Histogram, MetricsRegistry, instrument_engine, timed_stage
+
+
+def value(registry, kind, name, **labels):
+    return {tuple(sorted(entry["labels"].items())): entry for entry in registry.to_dict()[kind][name]}[
+        tuple(sorted((k, str(v)) for k, v in labels.items()))]
+
+
+def test_spans_time_stages_and_count_failures():
+    registry = MetricsRegistry()
+    with registry.span("ontology", symbol="AAPL"):
+        pass
+    with pytest.raises(ValueError):
+        with registry.span("ml", symbol="AAPL"):
+            raise ValueError("model")
+
+    assert value(registry, "histograms", "stage_duration_seconds", stage="ontology", symbol="AAPL")["count"] == 1
+    assert value(registry, "histograms", "stage_duration_seconds", stage="ml", symbol="AAPL")["count"] == 1
+    assert value(registry, "counters", "stage_errors_total", stage="ml", symbol="AAPL")["value"] == 1
+    assert "ontology" not in str(registry.to_dict()["counters"])
+
+
+def test_counters_and_gauges_accumulate_per_label_set():
+    registry = MetricsRegistry()
+    registry.inc("cache_requests_total", result="hit")
+    registry.inc("cache_requests_total", 2, result="hit")
+    registry.inc("cache_requests_total", result="miss")
+    registry.set_gauge("graph_statements", 10)
+    registry.set_gauge("graph_statements", 7)
+
+    assert value(registry, "counters", "cache_requests_total", result="hit")["value"] == 3
+    assert value(registry, "counters", "cache_requests_total", result="miss")["value"] == 1
+    assert value(registry, "gauges", "graph_statements")["value"] == 7
+
+
+def test_histogram_buckets_are_cumulative_with_inclusive_bounds():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for observation in (0.05, 0.1, 0.5, 1.0, 3.0):
+        histogram.observe(observation)
+    assert histogram.cumulative() == [("0.1", 2), ("1.0", 4), ("+Inf", 5)]
+    assert histogram.count == 5 and histogram.total == pytest.approx(4.65)
+
+
+def test_prometheus_text_escapes_label_values():
+    registry = MetricsRegistry()
+    registry.inc("analyses_total", interval="1d")
+    registry.observe("analysis_latency_seconds", 0.2, symbol='A"B\\C\nD', interval="1d")
+    text = registry.to_prometheus()
+
+    assert "# TYPE eos_analyses_total counter\neos_analyses_total{interval=\"1d\"} 1.0\n" in text
+    labels = 'interval="1d",symbol="A\\"B\\\\C\\nD"'
+    assert f'eos_analysis_latency_seconds_bucket{{{labels},le="0.25"}} 1' in text
+    assert f'eos_analysis_latency_seconds_bucket{{{labels},le="0.1"}} 0' in text
+    assert f"eos_analysis_latency_seconds_count{{{labels}}} 1" in text
+    # One sample per line: the newline in the label value must not split it
+    assert all(line.startswith(("# TYPE eos_", "eos_")) for line in text.splitlines())
+
+
+def test_failing_sinks_are_counted_not_swallowed(caplog):
+    registry = MetricsRegistry()
+    events = []
+
+    def broken(event):
+        raise ConnectionError("statsd down")
+    registry.add_sink(broken)
+    registry.add_sink(events.append)
+
+    registry.inc("analyses_total")
+    registry.inc("analyses_total")
+    assert value(registry, "counters", "metric_sink_errors_total", sink="broken")["value"] == 2
+    assert [event["name"] for event in events] == ["analyses_total", "analyses_total"]
+    assert sum("statsd down" in record.getMessage() for record in caplog.records) == 1
+
+
+def test_timed_stage_wraps_async_functions():
+    registry = MetricsRegistry()
+
+    @timed_stage("pattern", registry)
+    async def detect():
+        return "patterns"
+    assert asyncio.run(detect()) == "patterns"
+    assert value(registry, "histograms", "stage_duration_seconds", stage="pattern")["count"] == 1
+
+
+def test_cache_hits_reach_the_latency_histogram():
+    class Engine:
+        def __init__(self):
+            self.cache, self.runs = {}, 0
+
+        def _get_cached_result(self, symbol, period, interval):
+            return self.cache.get((symbol, period, interval))
+
+        def _cache_results(self, symbol, report, period, interval):
+            self.cache[(symbol, period, interval)] = report
+
+        async def analyze_symbol(self, symbol, period="1y", interval="1d"):
+            self.runs += 1
+            return {"symbol": symbol}
+
+    registry = MetricsRegistry()
+    instrument_engine(cache_analysis_results(Engine), registry)
+    engine = Engine()
+    for _ in range(3):
+        asyncio.run(engine.analyze_symbol("AAPL"))
+
+    assert engine.runs == 1
+    assert value(registry, "histograms", "analysis_latency_seconds", symbol="AAPL", interval="1d")["count"] == 3
+    assert value(registry, "counters", "analyses_total", interval="1d")["value"] == 3
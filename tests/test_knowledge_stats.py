@@ -0,0 +1,45 @@
+from instrumentation import metrics
+from triple_store import SQLiteStore
+
+
+def analyse(ontology, symbol="AAPL"):
+    with ontology.graph.run(symbol):
+        ontology.add_indicator(symbol, "MACD", 1.2, "bullish", 0.9)
+        ontology.add_indicator(symbol, "EMA", 101, "bearish", 0.8)
+        ontology.add_indicator(symbol, "RSI", 75, "overbought", 0.9)
+
+
+def test_signals_are_counted_apart_from_indicators(ontology_class):
+    ontology = ontology_class()()
+    analyse(ontology)
+    summary = ontology.get_knowledge_summary()
+    assert summary["indicators"] == 3
+    assert summary["signals"] == 2  # the RSI label has no direction
+    assert summary["contradictions"] == 1
+
+
+def test_statement_total_follows_runs_without_counting_the_graph(monkeypatch, ontology_class):
+    ontology = ontology_class(max_runs_per_symbol=1)()
+    for _ in range(3):
+        analyse(ontology)
+        analyse(ontology, "MSFT")
+    expected = len(ontology.graph)
+
+    monkeypatch.setattr(type(ontology.graph), "__len__", lambda self: 1 / 0)
+    summary = ontology.get_knowledge_summary()
+    assert summary["total_statements"] == expected
+    assert summary["indicators"] == 6
+    assert summary["contradictions"] == 2
+    assert metrics.gauges["ontology_statements"][()] == expected
+
+
+def test_counters_are_seeded_from_a_persistent_store(tmp_path, ontology_class):
+    path = str(tmp_path / "ontology.db")
+    Ontology = ontology_class(store_factory=lambda: SQLiteStore(path))
+    first = Ontology()
+    analyse(first)
+    analyse(first, "MSFT")
+    before = first.get_knowledge_summary()
+    first.graph.close()
+
+    assert Ontology().get_knowledge_summary() == before
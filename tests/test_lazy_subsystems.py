@@ -0,0 +1,101 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+from types import SimpleNamespace
+
+import pytest
+
+from benchmark import IMPORT_MODULES
+from lazy_subsystems import LazySubsystem, SubsystemDisabled, defer_subsystems, import_factory
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET_SECONDS = 5.0
+HEAVY_MODULES = ("sklearn", "tensorflow", "owlrl", "dash", "plotly", "redis", "yahooquery", "psutil")
+
+
+class Model:
+    built = 0
+
+    def __init__(self, config):
+        Model.built += 1
+        self.config = config
+
+    def __bool__(self):
+        return False
+
+
+def engine_class(factories):
+    class Engine:
+        def __init__(self, config):
+            self.config = config
+    return defer_subsystems(Engine, factories)
+
+
+def test_subsystems_are_built_on_first_access_and_then_are_the_real_object():
+    Model.built = 0
+    Engine = engine_class({"model": ("ml_enabled", Model)})
+    engine = Engine(SimpleNamespace(ml_enabled=True))
+    assert engine.subsystem_status() == {"model": {"enabled": True, "loaded": False}}
+    assert Model.built == 0 and isinstance(Engine.model, LazySubsystem)
+
+    assert isinstance(engine.model, Model) and not engine.model
+    assert engine.model is engine.model and Model.built == 1
+    assert engine.subsystem_status()["model"]["loaded"]
+
+
+def test_disabled_subsystems_are_never_built():
+    Engine = engine_class({"model": ("ml_enabled", lambda config: pytest.fail("factory called"))})
+    engine = Engine(SimpleNamespace(ml_enabled=False))
+    with pytest.raises(SubsystemDisabled):
+        engine.model
+    assert getattr(engine, "model", None) is None
+    assert engine.subsystem_status() == {"model": {"enabled": False, "loaded": False}}
+
+
+def test_constructor_assignments_are_ignored_and_later_ones_replace_the_factory():
+    Model.built = 0
+
+    class Engine:
+        def __init__(self, config):
+            self.config = config
+            self.model = "eagerly built"
+    defer_subsystems(Engine, {"model": ("ml_enabled", Model)})
+
+    engine = Engine(SimpleNamespace(ml_enabled=True))
+    assert not engine.subsystem_status()["model"]["loaded"]
+    assert isinstance(engine.model, Model) and Model.built == 1
+
+    engine = Engine(SimpleNamespace(ml_enabled=False))
+    engine.model = "double"
+    assert engine.model == "double"
+
+
+def test_import_factory_imports_its_module_on_first_use(tmp_path, monkeypatch):
+    (tmp_path / "heavy_subsystem.py").write_text(textwrap.dedent("""
+        class Streamer:
+            def __init__(self, config):
+                self.config = config
+    """))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    Engine = engine_class({"streamer": ("real_time_enabled", import_factory("heavy_subsystem:Streamer"))})
+    engine = Engine("config")
+    assert "heavy_subsystem" not in sys.modules
+    assert engine.streamer.config == "config"
+    assert "heavy_subsystem" in sys.modules
+
+
+@pytest.mark.parametrize("module", IMPORT_MODULES + ("knowledge_stats", "lazy_subsystems", "compact_store"))
+def test_pipeline_modules_import_within_budget_without_heavy_libraries(module):
+    script = textwrap.dedent(f"""
+        import json, sys, time
+        started = time.perf_counter()
+        import {module}
+        print(json.dumps({{"seconds": time.perf_counter() - started,
+                           "heavy": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+    """)
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True, cwd=ROOT)
+    result = json.loads(output.stdout)
+    assert result["heavy"] == []
+    assert result["seconds"] < IMPORT_BUDGET_SECONDS
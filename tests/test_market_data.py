@@ -0,0 +1,73 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bar_store import BarStore, utc_now
+from market_data import (
+    LiveBarFeed, MarketDataProvider, ReplayProvider, SyntheticProvider, YahooQueryProvider, create_provider
+)
+
+
+def test_base_provider_is_abstract():
+    with pytest.raises(TypeError):
+        MarketDataProvider()
+
+
+def test_unknown_provider_names_raise():
+    with pytest.raises(ValueError, match="polygon"):
+        create_provider(SimpleNamespace(data_provider="polygon"))
+
+
+def test_replay_provider_serves_the_bar_store(tmp_path):
+    index = pd.date_range("2024-01-01", periods=5, freq="D")
+    bars = pd.DataFrame({"open": 1.0, "high": 2.0, "low": 0.5, "close": np.arange(5.0), "volume": 10.0}, index=index)
+    BarStore(tmp_path, retention_days=None, offline=True).write("AAPL", "1d", bars)
+
+    provider = create_provider(SimpleNamespace(data_provider="replay", bar_store_path=str(tmp_path)))
+    assert isinstance(provider, ReplayProvider)
+    assert provider.fetch_history("AAPL", None, None, "1d")["close"].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+
+class PolledYahoo(YahooQueryProvider):
+    """yahooquery stand-in: the forming bar's close moves between polls"""
+
+    def __init__(self):
+        super().__init__(poll_seconds=0)
+        self.close = 100.0
+
+    def fetch_history(self, symbol, start, end, interval="1d"):
+        now = pd.Timestamp(utc_now()).floor("min")
+        index = pd.DatetimeIndex([now - pd.Timedelta(minutes=1), now])
+        self.close += 1
+        return pd.DataFrame({"open": 1.0, "high": 200.0, "low": 0.5, "close": [99.0, self.close],
+                             "volume": 1.0}, index=index)
+
+
+def test_yahoo_stream_polls_and_revises_the_forming_bar():
+    async def first(n):
+        messages = []
+        async for message in PolledYahoo().stream(["AAPL"], "1m"):
+            messages.append(message)
+            if len(messages) == n:
+                return messages
+
+    messages = asyncio.run(first(4))
+    assert [m["close"] for m in messages] == [99.0, 101.0, 102.0, 103.0]
+    assert messages[1]["timestamp"] == messages[2]["timestamp"]
+
+
+def test_live_feed_streams_subscribed_symbols():
+    feed = LiveBarFeed(SyntheticProvider(rate=200), interval="1m")
+    try:
+        feed.subscribe(["aapl"])
+        deadline = time.monotonic() + 5
+        while feed.latest("AAPL") is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert feed.latest("AAPL")["symbol"] == "AAPL"
+        assert feed.latest("MSFT") is None
+    finally:
+        feed.stop()
@@ -0,0 +1,76 @@
+import numpy as np
+from rdflib import Graph
+
+from ontology_bulk import STOCK, add_indicator_block, indicator_block
+from ontology_partitions import COMPACT_EVERY_RUNS
+from signal_classification import classify_indicator_columns
+
+
+def universe_block(symbols):
+    rng = np.random.default_rng(7)
+    columns = {"rsi": rng.uniform(10, 90, len(symbols)),
+               "macd": rng.normal(0, 1, len(symbols)), "macd_signal": rng.normal(0, 1, len(symbols)),
+               "macd_hist": rng.normal(0, 1, len(symbols))}
+    return indicator_block(symbols, columns, classify_indicator_columns(columns))
+
+
+def test_blocks_larger_than_the_compaction_interval_keep_every_run(ontology_class):
+    symbols = [f"SYN{i:03d}" for i in range(COMPACT_EVERY_RUNS + 50)]
+    ontology = ontology_class()()
+    block = universe_block(symbols)
+    assert len(block["symbol"]) == 2 * len(symbols)
+
+    nodes = add_indicator_block(ontology, block)
+    assert len(nodes) == 300
+    assert ontology.knowledge_counters.totals["indicators"] == 300
+    runs = ontology.graph.run_graphs()
+    assert len(runs) == len(symbols)
+    assert all(len(ontology.graph.graph(r.identifier)) >= 12 for r in runs["SYN000"])
+
+    # MACD labels are directional: every symbol's latest run is indexed
+    directional = sum(1 for signal in block["signal"] if "bullish" in signal or "bearish" in signal)
+    assert len(ontology.signal_index) == directional
+
+
+def test_add_indicator_path_keeps_every_run_too(ontology_class):
+    symbols = [f"SYN{i:03d}" for i in range(COMPACT_EVERY_RUNS + 50)]
+    ontology = ontology_class()()
+    add_indicator_block(ontology, universe_block(symbols), through_add_indicator=True)
+    assert ontology.knowledge_counters.totals["indicators"] == 300
+    assert len(ontology.graph.run_graphs()) == len(symbols)
+
+
+def test_minted_statements_share_interned_terms(ontology_class):
+    ontology = ontology_class()()
+    add_indicator_block(ontology, universe_block(["AAPL", "MSFT"]))
+    graph = ontology.graph
+    nodes = list(graph.subjects(STOCK.indicatorOf, STOCK.AAPL))
+    assert {str(label) for node in nodes for label in graph.objects(node, STOCK.indicatorType)} == {"RSI", "MACD"}
+    # One RSI label object shared by both symbols' statements
+    rsi = [label for _, _, label in graph.triples((None, STOCK.indicatorType, None)) if str(label) == "RSI"]
+    assert len(rsi) == 2 and rsi[0] is rsi[1]
+
+
+def test_failed_batch_leaves_no_phantom_runs(ontology_class):
+    ontology = ontology_class()()
+    graph = ontology.graph
+    try:
+        with graph.batch():
+            with graph.run("AAPL"):
+                ontology.add_indicator("AAPL", "MACD", 1.2, "bullish", 0.9)
+            raise RuntimeError("abort")
+    except RuntimeError:
+        pass
+    assert graph._known_runs().get("AAPL", []) == []
+    assert ontology.knowledge_counters.totals["indicators"] == 0
+    assert len(ontology.signal_index) == 0
+    assert graph.run_graphs() == {}
+
+
+def test_plain_graph_receives_minted_statements():
+    class Plain:
+        graph = Graph()
+
+    nodes = add_indicator_block(Plain(), universe_block(["AAPL"]))
+    assert len(nodes) == 2
+    assert len(Plain.graph) == 12
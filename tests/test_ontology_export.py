@@ -0,0 +1,89 @@
+import gzip
+import sys
+import threading
+import time
+import types
+
+import pytest
+from rdflib import Dataset, Graph, Literal, Namespace, URIRef
+
+import ontology_export
+from ontology_export import export_format, iter_export
+from ontology_partitions import PartitionedGraph
+from triple_store import SQLiteStore
+
+EX = Namespace("http://example.org/stock#")
+
+
+def lines(payload: bytes):
+    return sorted(line for line in payload.decode().splitlines() if line.strip())
+
+
+def populated(store="default", symbols=("AAPL", "MSFT")):
+    graph = PartitionedGraph(store=store, retention_days=None, max_runs_per_symbol=None)
+    graph.add((EX.Stock, EX.label, Literal("schema")))
+    for symbol in symbols:
+        with graph.run(symbol):
+            for i in range(30):
+                graph.add((EX[symbol], EX[f"p{i}"], Literal(i)))
+    return graph
+
+
+def test_chunks_match_rdflibs_own_serialization():
+    graph = populated()
+    for format in ("nt", "nquads"):
+        streamed = b"".join(iter_export(graph, format, chunk_statements=7))
+        assert lines(streamed) == lines(graph.serialize(format=format, encoding="utf-8"))
+    compressed = b"".join(iter_export(graph, "nt", compress=True, chunk_statements=7))
+    assert lines(gzip.decompress(compressed)) == lines(graph.serialize(format="nt", encoding="utf-8"))
+
+
+def test_private_rdflib_helpers_are_not_used():
+    source = open(ontology_export.__file__).read()
+    assert "_nt_row" not in source and "_nq_row" not in source
+
+
+def test_unknown_formats_are_rejected_before_streaming():
+    with pytest.raises(ValueError):
+        iter_export(Graph(), "html")
+    assert export_format("N-Triples") == "nt"
+    assert export_format("ttl") == "turtle"
+
+
+def test_memory_store_export_survives_concurrent_writes():
+    # rdflib's in-memory store lists a triple's contexts from a dict that a
+    # writer adding the same triple to another run resizes underneath it
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    graph = PartitionedGraph(retention_days=None, max_runs_per_symbol=None)
+    triple = (EX.AAPL, EX.price, Literal(1))
+    graph.addN((*triple, graph.get_context(URIRef(f"urn:run:{i}"))) for i in range(2000))
+    stop = threading.Event()
+
+    def write():
+        i = 2000
+        while not stop.is_set():
+            graph.add((*triple, graph.get_context(URIRef(f"urn:run:{i}"))))
+            i += 1
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        deadline = time.monotonic() + 1
+        while time.monotonic() < deadline:
+            for _ in iter_export(graph, "nquads", chunk_statements=500):
+                pass
+    finally:
+        stop.set()
+        writer.join()
+        sys.setswitchinterval(switch_interval)
+
+
+def test_sqlite_store_is_streamed_from_its_cursor(tmp_path):
+    store = SQLiteStore()
+    store.open(str(tmp_path / "kg.db"))
+    graph = populated(store)
+    statements = ontology_export._statements(graph, "nt")
+    assert isinstance(statements, types.GeneratorType)
+    streamed = b"".join(iter_export(graph, "nt", chunk_statements=10))
+    assert len(lines(streamed)) == 61
@@ -0,0 +1,82 @@
+from ontology_index import SignalIndex, index_ontology_class
+from triple_store import SQLiteStore
+
+
+def analyse(ontology, symbol="AAPL"):
+    with ontology.graph.run(symbol) as run:
+        ontology.add_indicator(symbol, "MACD", 1.2, "strong_bullish", 0.9)
+        ontology.add_indicator(symbol, "STOCH", 80, "bullish_cross", 0.8)
+        ontology.add_indicator(symbol, "EMA", 101, "bearish", 0.75)
+        ontology.add_indicator(symbol, "RSI", 75, "overbought", 0.9)  # no direction: not indexed
+    return run
+
+
+def test_rerunning_an_analysis_does_not_grow_counts(ontology_class):
+    ontology = ontology_class(max_runs_per_symbol=10)()
+    for _ in range(5):
+        analyse(ontology)
+        assert ontology.signal_index.counts("AAPL") == {"contradictions": 2, "confirmations": 1}
+        assert len(ontology.detect_contradictions("AAPL")) == 2
+        assert len(ontology.find_confirmations("AAPL")) == 1
+    analyse(ontology, "MSFT")
+    assert ontology.signal_index.totals == {"contradictions": 4, "confirmations": 2}
+
+
+def test_dropped_run_graphs_leave_the_index(ontology_class):
+    ontology = ontology_class(max_runs_per_symbol=2)()
+    runs = [analyse(ontology) for _ in range(4)]
+    index = ontology.signal_index
+    assert len(index) == 2 * 3  # only the two retained runs
+    assert index.latest_run("AAPL") == runs[-1].identifier
+
+    index.drop_run(runs[-1].identifier)
+    assert index.latest_run("AAPL") == runs[-2].identifier
+    assert index.totals == {"contradictions": 2, "confirmations": 1}
+    index.drop_run(runs[-2].identifier)
+    assert index.totals == {"contradictions": 0, "confirmations": 0}
+    assert index.signals("AAPL") == []
+
+
+def test_index_is_rebuilt_from_a_persistent_store(tmp_path, ontology_class):
+    path = str(tmp_path / "ontology.db")
+    Ontology = ontology_class(store_factory=lambda: SQLiteStore(path))
+    first = Ontology()
+    analyse(first)
+    analyse(first, "MSFT")
+    expected = first.signal_index.contradictions("AAPL")
+    first.graph.close()
+
+    reopened = Ontology()
+    assert reopened.signal_index.totals == {"contradictions": 4, "confirmations": 2}
+    assert sorted(reopened.detect_contradictions("AAPL")) == sorted(expected)
+
+
+def test_stored_entries_stay_out_of_the_graph_and_leave_with_their_run(tmp_path, ontology_class):
+    path = str(tmp_path / "ontology.db")
+    ontology = ontology_class(store_factory=lambda: SQLiteStore(path), max_runs_per_symbol=1)()
+    analyse(ontology)
+    run = analyse(ontology)
+
+    assert len(ontology.graph.graph(run.identifier)) == 4 * 2  # type and value of each indicator
+    assert "signal-index" not in ontology.graph.serialize(format="nquads")
+    marks = list(ontology.graph.store.signal_marks())
+    assert len(marks) == 3 and {graph for graph, _, _ in marks} == {run.identifier}
+
+
+def test_methods_without_the_documented_parameters_are_not_wrapped(caplog):
+    class Ontology:
+        def add_indicator(self, ticker, kind, value, label):
+            return None
+
+    original = Ontology.add_indicator
+    index_ontology_class(Ontology)
+    assert Ontology.add_indicator is original
+    assert "not indexed" in caplog.text
+
+
+def test_polarity_comes_from_bullish_and_bearish_labels_only():
+    index = SignalIndex()
+    assert index.record("a", "AAPL", "RSI", "oversold", 0.9) is None
+    assert index.record("b", "AAPL", "SMA_20", "strong_above", 0.9) is None
+    assert index.record("c", "AAPL", "MACD", "bullish", 0.9).polarity == 1
+    assert index.record("d", "AAPL", "RSI", "oversold", 0.9, polarity=1).polarity == 1
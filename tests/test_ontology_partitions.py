@@ -0,0 +1,87 @@
+from contextlib import ExitStack
+
+from rdflib import Graph, Literal, Namespace
+
+from ontology_partitions import PartitionedGraph, active_run
+from triple_store import SQLiteStore
+
+EX = Namespace("http://example.org/stock#")
+
+
+def partitioned(**kwargs):
+    schema = Graph()
+    schema.bind("ex", EX)
+    schema.add((EX.Stock, EX.label, Literal("schema")))
+    return PartitionedGraph.from_graph(schema, **kwargs)
+
+
+def test_run_handle_resolves_to_that_runs_graph_only():
+    graph = partitioned()
+    with graph.run("AAPL") as first:
+        graph.add((EX.AAPL, EX.rsi, Literal(30)))
+        assert active_run() is first
+    with graph.run("AAPL"):
+        graph.add((EX.AAPL, EX.rsi, Literal(70)))
+
+    resolved = graph.run_graph(str(first.identifier))
+    assert set(resolved) == {(EX.AAPL, EX.rsi, Literal(30))}
+
+
+def test_expired_or_foreign_handles_do_not_resolve():
+    graph = partitioned(max_runs_per_symbol=1)
+    with graph.run("AAPL") as first:
+        graph.add((EX.AAPL, EX.rsi, Literal(30)))
+    with graph.run("AAPL"):
+        graph.add((EX.AAPL, EX.rsi, Literal(70)))
+
+    assert graph.run_graph(str(first.identifier)) is None
+    assert graph.run_graph("AAPL@12") is None
+    # Resolving must not create an empty graph for the identifier
+    assert graph.run_graph(str(first.identifier)) is None
+
+
+def test_handles_resolve_without_listing_the_store_contexts(tmp_path, monkeypatch):
+    path = str(tmp_path / "ontology.db")
+    graph = PartitionedGraph(store=SQLiteStore(path))
+    other_worker = PartitionedGraph(store=SQLiteStore(path))
+    with graph.run("AAPL") as local:
+        graph.add((EX.AAPL, EX.rsi, Literal(30)))
+    with other_worker.run("AAPL") as remote:  # after graph loaded its runs
+        other_worker.add((EX.AAPL, EX.rsi, Literal(70)))
+
+    monkeypatch.setattr(SQLiteStore, "contexts", lambda self, triple=None: 1 / 0)
+    assert set(graph.run_graph(str(local.identifier))) == {(EX.AAPL, EX.rsi, Literal(30))}
+    assert set(graph.run_graph(str(remote.identifier))) == {(EX.AAPL, EX.rsi, Literal(70))}
+    assert graph.run_graph(str(local.identifier).replace("AAPL", "MSFT")) is None
+
+
+def test_symbol_graph_holds_only_that_symbols_runs():
+    graph = partitioned()
+    with graph.run("AAPL"):
+        graph.add((EX.AAPL, EX.rsi, Literal(30)))
+    with graph.run("MSFT"):
+        graph.add((EX.MSFT, EX.rsi, Literal(50)))
+
+    assert set(graph.symbol_graph("aapl")) == {(EX.AAPL, EX.rsi, Literal(30))}
+
+
+def test_count_retention_never_drops_a_run_in_progress():
+    graph = partitioned(max_runs_per_symbol=3)
+    for rsi in range(4):
+        with graph.run("AAPL"):
+            graph.add((EX.AAPL, EX.rsi, Literal(rsi)))
+    finished = graph.run_graphs("AAPL")["AAPL"]
+    assert len(finished) == 3
+
+    with ExitStack() as runs:
+        live = []
+        for interval, rsi in (("1d", 30), ("1h", 40), ("5m", 50), ("1m", 60)):
+            live.append(runs.enter_context(graph.run("AAPL")))
+            graph.add((EX.AAPL, EX[f"rsi_{interval}"], Literal(rsi)))
+
+        assert graph.apply_retention("AAPL") == 0
+        for run in finished + live:
+            assert len(graph.run_graph(str(run.identifier))) == 1
+
+    # Once they end, the count limit applies to them as well
+    assert [run.identifier for run in graph.run_graphs("AAPL")["AAPL"]] == [run.identifier for run in live[-3:]]
@@ -0,0 +1,27 @@
+import gc
+import os
+import runpy
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def server(preload):
+    return SimpleNamespace(cfg=SimpleNamespace(preload_app=preload))
+
+
+def test_gc_is_frozen_only_by_the_gunicorn_pre_fork_hook(monkeypatch):
+    frozen = []
+    monkeypatch.setattr(gc, "freeze", lambda: frozen.append(True))
+    hooks = runpy.run_path(os.path.join(ROOT, "gunicorn.conf.py"))
+
+    hooks["pre_fork"](server(preload=False), worker=None)
+    assert frozen == []
+    hooks["pre_fork"](server(preload=True), worker=None)
+    assert frozen == [True]
+
+
+def test_importing_the_engine_does_not_freeze_the_gc():
+    source = open(os.path.join(ROOT, "enhanced_ontology_system.py")).read()
+    assert "freeze_for_fork" not in source
+    assert "gunicorn.conf.py" in open(os.path.join(ROOT, "start_render.sh")).read()
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from price_series import parse_timestamp, window
+
+
+def bars(days=10):
+    index = pd.date_range("2024-01-01", periods=days, freq="D")
+    values = np.arange(days, dtype=float)
+    return pd.DataFrame({"open": values, "high": values, "low": values, "close": values,
+                         "volume": values}, index=index)
+
+
+def test_timestamps_are_normalized_to_naive_utc():
+    assert parse_timestamp("2024-01-03T00:00:00Z") == pd.Timestamp("2024-01-03")
+    assert parse_timestamp("2024-01-03T02:00:00+02:00") == pd.Timestamp("2024-01-03")
+    assert parse_timestamp(None) is None and parse_timestamp("") is None
+    for bad in ("yesterday-ish", "NaT", object()):
+        with pytest.raises(ValueError):
+            parse_timestamp(bad)
+
+
+def test_window_accepts_timezone_aware_bounds():
+    visible = window(bars(), "2024-01-03T00:00:00Z", pd.Timestamp("2024-01-05", tz="UTC"))
+    assert list(visible["close"]) == [2.0, 3.0, 4.0]
+
+
+def test_route_answers_400_for_malformed_bounds():
+    flask = pytest.importorskip("flask")
+    from price_series import register_price_routes
+
+    class Engine:
+        def price_series(self, symbol, **kwargs):
+            self.kwargs = kwargs
+            return {"symbol": symbol, "bars": 0, "columns": {"t": np.zeros(0, dtype=np.int64)}}
+
+    engine, server = Engine(), flask.Flask(__name__)
+    register_price_routes(server, engine)
+    client = server.test_client()
+    assert client.get("/prices/AAPL?start=not-a-date").status_code == 400
+    assert client.get("/prices/AAPL?start=2024-01-03T00:00:00Z").status_code == 200
+    assert engine.kwargs["start"] == pd.Timestamp("2024-01-03")
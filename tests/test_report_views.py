@@ -0,0 +1,38 @@
+from report_views import PANEL_FIELDS, report_views, slice_report
+
+REPORT = {
+    "symbol": "AAPL",
+    "overall_score": 0.4,
+    "market_context": {"market_state": "bull", "trend_direction": "up", "support_levels": [180.0]},
+    "risk_assessment": {"risk_score": 0.3, "recommendations": ["trim"], "stop_loss": None},
+    "ml_analysis": "unavailable"
+}
+
+
+def test_nested_paths_keep_their_nesting():
+    view = slice_report(REPORT, ["symbol", "market_context.market_state", "risk_assessment.stop_loss"])
+    assert view == {"symbol": "AAPL", "market_context": {"market_state": "bull"},
+                    "risk_assessment": {"stop_loss": None}}
+
+
+def test_missing_paths_are_left_out():
+    view = slice_report(REPORT, ["overall_recommendation", "market_context.volatility_regime",
+                                 "ml_analysis.prediction", "anomaly_detection.is_anomaly"])
+    assert view == {}
+
+
+def test_slices_share_values_but_not_the_report_structure():
+    view = slice_report(REPORT, ["market_context.support_levels"])
+    view["market_context"]["added"] = True
+    assert "added" not in REPORT["market_context"]
+
+
+def test_request_is_merged_without_touching_the_report():
+    request = {"symbol": "AAPL", "period": "6mo", "interval": "1h", "mode": "full"}
+    views = report_views(REPORT, request)
+    assert set(views) == set(PANEL_FIELDS)
+    assert views["main-chart"] == {"symbol": "AAPL", "request": {"period": "6mo", "interval": "1h"},
+                                   "market_context": {"support_levels": [180.0]}}
+    assert views["ml"] == {}
+    assert "request" not in REPORT
+    assert "request" not in report_views(REPORT)["indicators"]
@@ -0,0 +1,126 @@
+import math
+
+import numpy as np
+import pytest
+
+from signal_classification import CLASSIFIERS, decode
+
+
+# The engine's original scalar rules, which the vectorized classifiers must reproduce
+def ma_rule(current, ma_value, threshold=0.02):
+    deviation = (current - ma_value) / ma_value
+    if deviation > threshold:
+        return "strong_above", min(deviation * 2, 1.0)
+    elif deviation > 0:
+        return "above", deviation * 1.5
+    elif deviation < -threshold:
+        return "strong_below", min(abs(deviation) * 2, 1.0)
+    else:
+        return "below", abs(deviation) * 1.5
+
+
+def adx_rule(value):
+    if value > 40:
+        return "very_strong", 0.95
+    elif value > 25:
+        return "strong", 0.8
+    elif value > 20:
+        return "moderate", 0.6
+    return "weak", 0.4
+
+
+def rsi_rule(value):
+    if value > 80:
+        return "extremely_overbought", 0.95
+    elif value > 70:
+        return "overbought", 0.8
+    elif value < 20:
+        return "extremely_oversold", 0.95
+    elif value < 30:
+        return "oversold", 0.8
+    return "neutral", 0.5
+
+
+def macd_rule(macd, signal, hist):
+    if macd > signal and macd > 0:
+        strength = "strong_" if abs(hist) > 0.02 else ""
+        return f"{strength}bullish", 0.85 if "strong" in strength else 0.6
+    elif macd < signal and macd < 0:
+        strength = "strong_" if abs(hist) > 0.02 else ""
+        return f"{strength}bearish", 0.85 if "strong" in strength else 0.6
+    return "neutral", 0.4
+
+
+def stochastic_rule(k, d):
+    if k > 80 and d > 80:
+        return "overbought", 0.8
+    elif k < 20 and d < 20:
+        return "oversold", 0.8
+    elif k > d and k < 50:
+        return "bullish_cross", 0.7
+    elif k < d and k > 50:
+        return "bearish_cross", 0.7
+    return "neutral", 0.5
+
+
+def cci_rule(value):
+    if value > 100:
+        return "overbought", 0.7
+    elif value < -100:
+        return "oversold", 0.7
+    return "neutral", 0.5
+
+
+RULES = {"ma": ma_rule, "adx": adx_rule, "rsi": rsi_rule, "macd": macd_rule,
+         "stochastic": stochastic_rule, "mfi": rsi_rule, "cci": cci_rule}
+
+NAN = float("nan")
+rng = np.random.default_rng(7)
+OSCILLATOR = [NAN, 0.0, 19.999, 20.0, 20.001, 25.0, 29.999, 30.0, 40.0, 50.0, 70.0, 70.001, 80.0, 80.001, 100.0]
+INPUTS = {
+    "ma": [(current, ma) for current in (NAN, 0.0, 97.0, 98.0, 99.0, 100.0, 101.0, 102.0, 103.0, -5.0)
+           for ma in (NAN, 100.0, 98.0, 102.0, -4.0)] + [tuple(v) for v in rng.uniform(50, 150, (200, 2))],
+    "adx": [(v,) for v in OSCILLATOR] + [(v,) for v in rng.uniform(0, 60, 200)],
+    "rsi": [(v,) for v in OSCILLATOR] + [(v,) for v in rng.uniform(0, 100, 200)],
+    "mfi": [(v,) for v in OSCILLATOR],
+    "cci": [(v,) for v in (NAN, -100.001, -100.0, 0.0, 100.0, 100.001)] + [(v,) for v in rng.uniform(-300, 300, 200)],
+    "macd": [(m, s, h) for m in (NAN, -0.5, 0.0, 0.5) for s in (NAN, -0.5, 0.0, 0.5)
+             for h in (NAN, -0.03, -0.02, 0.0, 0.02, 0.021)] + [tuple(v) for v in rng.normal(0, 0.05, (200, 3))],
+    "stochastic": [(k, d) for k in OSCILLATOR for d in OSCILLATOR] + [tuple(v) for v in rng.uniform(0, 100, (200, 2))]
+}
+
+
+def same(a, b):
+    return (math.isnan(a) and math.isnan(b)) or a == b
+
+
+@pytest.mark.parametrize("name", sorted(CLASSIFIERS))
+def test_vectorized_classifiers_match_the_scalar_rules(name):
+    classifier, labels = CLASSIFIERS[name]
+    rows = INPUTS[name]
+    codes, confidence = classifier(*(np.array(column) for column in zip(*rows)))
+
+    for row, label, value in zip(rows, decode(codes, labels), confidence):
+        expected_label, expected_confidence = RULES[name](*row)
+        assert (label, row) == (expected_label, row)
+        assert same(value, expected_confidence), (row, value, expected_confidence)
+
+
+def test_matrices_classify_like_their_flattened_values():
+    classifier, labels = CLASSIFIERS["rsi"]
+    values = rng.uniform(0, 100, (5, 40))
+    codes, confidence = classifier(values)
+    flat_codes, flat_confidence = classifier(values.ravel())
+    assert codes.shape == values.shape
+    np.testing.assert_array_equal(codes.ravel(), flat_codes)
+    np.testing.assert_array_equal(confidence.ravel(), flat_confidence)
+
+
+def test_zero_moving_average_is_classified_instead_of_raising():
+    # The scalar rule raised ZeroDivisionError here; the classifier takes the limit instead
+    with pytest.raises(ZeroDivisionError):
+        ma_rule(100.0, 0.0)
+    codes, confidence = CLASSIFIERS["ma"][0](np.array([100.0, -1.0, 0.0]), np.zeros(3))
+    labels = decode(codes, CLASSIFIERS["ma"][1])
+    assert list(labels) == ["strong_above", "strong_below", "below"]
+    assert confidence[0] == confidence[1] == 1.0 and math.isnan(confidence[2])
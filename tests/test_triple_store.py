@@ -0,0 +1,92 @@
+import sqlite3
+
+from rdflib import Literal, Namespace, URIRef
+
+import triple_store
+from triple_store import SQLiteStore
+
+EX = Namespace("http://example.org/stock#")
+G1, G2 = URIRef("urn:eos:run:AAPL:1"), URIRef("urn:eos:run:AAPL:2")
+
+
+def open_store(path, **kwargs):
+    store = SQLiteStore(**kwargs)
+    store.open(str(path))
+    return store
+
+
+def test_union_length_is_maintained_across_graphs(tmp_path):
+    store = open_store(tmp_path / "kg.db")
+    store.addN([(EX.AAPL, EX.rsi, Literal(30), G1), (EX.AAPL, EX.rsi, Literal(30), G2),
+                (EX.AAPL, EX.macd, Literal(1.5), G2)])
+    assert len(store) == 2
+    assert store.__len__(G2) == 2
+
+    store.remove_graph(G2)
+    assert len(store) == 1
+    store.remove((EX.AAPL, None, None), G1)
+    assert len(store) == 0
+
+
+def test_count_row_is_seeded_for_an_existing_database(tmp_path):
+    path = tmp_path / "kg.db"
+    store = open_store(path)
+    store.addN([(EX.AAPL, EX.rsi, Literal(30), G1), (EX.AAPL, EX.rsi, Literal(30), G2)])
+    store.close()
+    # A database written before the count row existed
+    connection = sqlite3.connect(path)
+    connection.executescript("DROP TRIGGER quads_counted_insert; DROP TRIGGER quads_counted_delete; DROP TABLE counts;")
+    connection.close()
+
+    assert len(open_store(path)) == 1
+
+
+def test_writes_are_committed_without_waiting_for_a_batch(tmp_path):
+    path = tmp_path / "kg.db"
+    store = open_store(path, batch_size=5000)
+    store.addN([(EX.AAPL, EX.rsi, Literal(30), G1)])
+
+    other = sqlite3.connect(path, timeout=0)
+    other.execute("BEGIN IMMEDIATE")  # raises "database is locked" if a write transaction is open
+    assert other.execute("SELECT COUNT(*) FROM quads").fetchone()[0] == 1
+    other.rollback()
+
+
+def test_union_triples_are_read_lazily(tmp_path, monkeypatch):
+    store = open_store(tmp_path / "kg.db")
+    store.addN((EX[f"s{i}"], EX.rsi, Literal(i), G1 if i % 2 else G2) for i in range(2000))
+    monkeypatch.setattr(triple_store, "FETCH_ROWS", 10)
+
+    fetched = []
+    connection = store._connection()
+
+    class Spy:
+        def execute(self, *args):
+            cursor = connection.execute(*args)
+
+            class Cursor:
+                def fetchmany(self, size):
+                    rows = cursor.fetchmany(size)
+                    fetched.append(len(rows))
+                    return rows
+
+                def close(self):
+                    cursor.close()
+            return Cursor()
+
+    monkeypatch.setattr(store, "_connection", lambda: Spy())
+    results = store.triples((None, EX.rsi, None))
+    (triple, graphs) = next(results)
+    assert sum(fetched) == 10
+    assert len(list(graphs)) == 1
+
+
+def test_graph_cache_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(triple_store, "GRAPH_CACHE_SIZE", 4)
+    store = open_store(tmp_path / "kg.db")
+    store.addN((EX.AAPL, EX.rsi, Literal(i), URIRef(f"urn:eos:run:AAPL:{i}")) for i in range(10))
+    assert len(list(store.triples((None, None, None)))) == 10
+    assert len(store._graphs) == 4
+
+    store.remove_graph(URIRef("urn:eos:run:AAPL:9"))
+    assert URIRef("urn:eos:run:AAPL:9") not in store._graphs
@@ -0,0 +1,422 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ============================================================
+# PERSISTENT TRIPLE STORE
+# ============================================================
+# Context-aware rdflib Store on a local SQLite file. Terms are
+# interned into an id table and quads are stored as integer
+# rows, so the knowledge graph survives restarts and is shared
+# by every gunicorn worker (WAL mode, one connection per
+# process/thread, each write committed as soon as it is applied
+# so no worker holds the write lock across a batch or run).
+# ============================================================
+
+import itertools
+import os
+from collections import OrderedDict
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from rdflib import BNode, Graph, Literal, URIRef
+from rdflib.store import NO_STORE, VALID_STORE, Store
+
+DEFAULT_BATCH_SIZE = 5000
+TERM_CACHE_SIZE = 500_000
+GRAPH_CACHE_SIZE = 1024
+FETCH_ROWS = 1000
+
+URI, BLANK, LITERAL = 0, 1, 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    kind INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    datatype TEXT NOT NULL DEFAULT '',
+    lang TEXT NOT NULL DEFAULT '',
+    UNIQUE (kind, value, datatype, lang)
+);
+CREATE TABLE IF NOT EXISTS quads (
+    g INTEGER NOT NULL,
+    s INTEGER NOT NULL,
+    p INTEGER NOT NULL,
+    o INTEGER NOT NULL,
+    PRIMARY KEY (g, s, p, o)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS quads_spo ON quads (s, p, o);
+CREATE INDEX IF NOT EXISTS quads_po ON quads (p, o);
+CREATE INDEX IF NOT EXISTS quads_os ON quads (o, s);
+CREATE TABLE IF NOT EXISTS graphs (id INTEGER PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS namespaces (prefix TEXT PRIMARY KEY, uri TEXT NOT NULL UNIQUE);
+-- Signal index entries (ontology_index) by graph (0: default graph) and node, kept out of the RDF graphs
+CREATE TABLE IF NOT EXISTS signal_marks (
+    g INTEGER NOT NULL,
+    node INTEGER NOT NULL,
+    entry TEXT NOT NULL,
+    PRIMARY KEY (g, node)
+) WITHOUT ROWID;
+-- Distinct (s, p, o) across all graphs, kept by triggers so len() needs no scan
+CREATE TABLE IF NOT EXISTS counts (name TEXT PRIMARY KEY, n INTEGER NOT NULL);
+INSERT INTO counts (name, n) SELECT 'triples', (SELECT COUNT(*) FROM (SELECT DISTINCT s, p, o FROM quads))
+WHERE NOT EXISTS (SELECT 1 FROM counts WHERE name = 'triples');
+CREATE TRIGGER IF NOT EXISTS quads_counted_insert AFTER INSERT ON quads
+WHEN (SELECT COUNT(*) FROM (SELECT 1 FROM quads WHERE s=NEW.s AND p=NEW.p AND o=NEW.o LIMIT 2)) = 1
+BEGIN UPDATE counts SET n = n + 1 WHERE name = 'triples'; END;
+CREATE TRIGGER IF NOT EXISTS quads_counted_delete AFTER DELETE ON quads
+WHEN NOT EXISTS (SELECT 1 FROM quads WHERE s=OLD.s AND p=OLD.p AND o=OLD.o)
+BEGIN UPDATE counts SET n = n - 1 WHERE name = 'triples'; END;
+"""
+
+TermKey = Tuple[int, str, str, str]
+
+
+def encode_term(term: Any) -> TermKey:
+    """(kind, value, datatype, lang) row for an rdflib term"""
+    if isinstance(term, Literal):
+        return LITERAL, str(term), str(term.datatype or ""), term.language or ""
+    if isinstance(term, BNode):
+        return BLANK, str(term), "", ""
+    if isinstance(term, URIRef):
+        return URI, str(term), "", ""
+    raise TypeError(f"Unsupported term type: {type(term).__name__}")
+
+
+def decode_term(kind: int, value: str, datatype: str, lang: str) -> Any:
+    if kind == LITERAL:
+        return Literal(value, lang=lang or None, datatype=URIRef(datatype) if datatype else None)
+    if kind == BLANK:
+        return BNode(value)
+    return URIRef(value)
+
+
+def _context_id(context: Any) -> Any:
+    """Identifier of a context argument (Graph, identifier or None)"""
+    if context is None:
+        return None
+    return getattr(context, "identifier", context)
+
+
+class SQLiteStore(Store):
+    """rdflib Store persisted in SQLite"""
+
+    context_aware = True
+    formula_aware = False
+    transaction_aware = True
+    graph_aware = True
+    # Each read sees a committed snapshot, so iterating alongside writers is safe
+    concurrent_reads = True
+
+    def __init__(self, configuration: Optional[str] = None, identifier: Any = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        self.path: Optional[str] = None
+        # Largest number of quads written (and committed) as one transaction
+        self.batch_size = batch_size
+        self._local = threading.local()
+        self._term_ids: Dict[TermKey, int] = {}
+        self._terms: Dict[int, Any] = {}
+        # Graph objects handed out with union results, least recently used first
+        self._graphs: "OrderedDict[Any, Graph]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        super().__init__(configuration, identifier)
+
+    # Connection management -----------------------------------------------
+
+    def open(self, configuration: str, create: bool = True) -> int:
+        if not create and not os.path.exists(configuration):
+            return NO_STORE
+        directory = os.path.dirname(os.path.abspath(configuration))
+        os.makedirs(directory, exist_ok=True)
+        self.path = configuration
+        connection = self._connection()
+        connection.executescript(SCHEMA)
+        connection.commit()
+        return VALID_STORE
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per process and thread: safe under gunicorn --preload forks
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            if self.path is None:
+                raise RuntimeError("SQLiteStore is not open")
+            local.connection = sqlite3.connect(self.path, timeout=30)
+            local.connection.execute("PRAGMA journal_mode=WAL")
+            local.connection.execute("PRAGMA synchronous=NORMAL")
+            local.pid = os.getpid()
+        return local.connection
+
+    def close(self, commit_pending_transaction: bool = False):
+        local = self._local
+        if getattr(local, "pid", None) == os.getpid():
+            if commit_pending_transaction:
+                local.connection.commit()
+            local.connection.close()
+        local.pid = None
+
+    def destroy(self, configuration: str):
+        self.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(configuration + suffix):
+                os.remove(configuration + suffix)
+
+    def commit(self):
+        # Writes commit themselves; this only flushes anything left open by a caller
+        self._connection().commit()
+
+    def rollback(self):
+        self._connection().rollback()
+
+    # Term interning ------------------------------------------------------
+
+    def _lookup_id(self, term: Any) -> Optional[int]:
+        key = encode_term(term)
+        term_id = self._term_ids.get(key)
+        if term_id is None:
+            row = self._connection().execute(
+                "SELECT id FROM terms WHERE kind=? AND value=? AND datatype=? AND lang=?", key
+            ).fetchone()
+            if row is None:
+                return None
+            term_id = row[0]
+            self._remember(key, term_id, term)
+        return term_id
+
+    def intern(self, terms: Iterable[Any]) -> Dict[Any, int]:
+        """Ids for many terms, inserting the unknown ones in one statement"""
+        keys = {term: encode_term(term) for term in set(terms)}
+        ids = {key: self._term_ids.get(key) for key in set(keys.values())}
+        missing = [key for key, term_id in ids.items() if term_id is None]
+        if missing:
+            connection = self._connection()
+            connection.executemany(
+                "INSERT OR IGNORE INTO terms (kind, value, datatype, lang) VALUES (?, ?, ?, ?)", missing
+            )
+            for key in missing:
+                ids[key] = connection.execute(
+                    "SELECT id FROM terms WHERE kind=? AND value=? AND datatype=? AND lang=?", key
+                ).fetchone()[0]
+                self._remember(key, ids[key], decode_term(*key))
+        return {term: ids[key] for term, key in keys.items()}
+
+    def _term(self, term_id: int) -> Any:
+        term = self._terms.get(term_id)
+        if term is None:
+            row = self._connection().execute(
+                "SELECT kind, value, datatype, lang FROM terms WHERE id=?", (term_id,)
+            ).fetchone()
+            term = decode_term(*row)
+            self._remember(tuple(row), term_id, term)
+        return term
+
+    def _remember(self, key: TermKey, term_id: int, term: Any):
+        with self._cache_lock:
+            if len(self._terms) >= TERM_CACHE_SIZE:
+                self._term_ids.clear()
+                self._terms.clear()
+            self._term_ids[key] = term_id
+            self._terms[term_id] = term
+
+    # Writes --------------------------------------------------------------
+
+    def add(self, triple: Tuple[Any, Any, Any], context: Any, quoted: bool = False):
+        Store.add(self, triple, context, quoted)
+        self.addN([(*triple, context)])
+
+    def addN(self, quads: Iterable[Tuple[Any, Any, Any, Any]]):
+        """Insert quads in transactions of at most batch_size (terms interned once per transaction)"""
+        quads = iter(quads)
+        while True:
+            chunk = [(s, p, o, _context_id(c)) for s, p, o, c in itertools.islice(quads, self.batch_size)]
+            if not chunk:
+                return
+            ids = self.intern(itertools.chain.from_iterable(chunk))
+            connection = self._connection()
+            rows = [(ids[g], ids[s], ids[p], ids[o]) for s, p, o, g in chunk]
+            connection.executemany("INSERT OR IGNORE INTO quads (g, s, p, o) VALUES (?, ?, ?, ?)", rows)
+            connection.executemany("INSERT OR IGNORE INTO graphs (id) VALUES (?)", {(row[0],) for row in rows})
+            connection.commit()
+
+    def remove(self, triple_pattern: Tuple[Any, Any, Any], context: Any = None):
+        where, params = self._where(triple_pattern, context)
+        if where is None:
+            return
+        connection = self._connection()
+        connection.execute(f"DELETE FROM quads{where}", params)
+        connection.commit()
+
+    def add_graph(self, graph: Graph):
+        graph_id = self.intern([graph.identifier])[graph.identifier]
+        connection = self._connection()
+        connection.execute("INSERT OR IGNORE INTO graphs (id) VALUES (?)", (graph_id,))
+        connection.commit()
+
+    def remove_graph(self, graph: Graph):
+        identifier = _context_id(graph)
+        with self._cache_lock:
+            self._graphs.pop(identifier, None)
+        graph_id = self._lookup_id(identifier)
+        if graph_id is None:
+            return
+        connection = self._connection()
+        connection.execute("DELETE FROM quads WHERE g=?", (graph_id,))
+        connection.execute("DELETE FROM graphs WHERE id=?", (graph_id,))
+        connection.execute("DELETE FROM signal_marks WHERE g=?", (graph_id,))
+        connection.commit()
+
+    # Reads ---------------------------------------------------------------
+
+    def _where(self, triple_pattern: Tuple[Any, Any, Any], context: Any) -> Tuple[Optional[str], list]:
+        """WHERE clause for a pattern; None when a bound term is unknown (no matches)"""
+        clauses, params = [], []
+        bound = list(zip("spo", triple_pattern)) + [("g", _context_id(context))]
+        for column, term in bound:
+            if term is None:
+                continue
+            term_id = self._lookup_id(term)
+            if term_id is None:
+                return None, []
+            clauses.append(f"{column}=?")
+            params.append(term_id)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def triples(self, triple_pattern: Tuple[Any, Any, Any], context: Any = None
+                ) -> Iterator[Tuple[Tuple[Any, Any, Any], Iterator[Any]]]:
+        where, params = self._where(triple_pattern, context)
+        if where is None:
+            return
+        if context is not None:
+            graph = self._graph(_context_id(context))
+            for s, p, o in self._rows(f"SELECT s, p, o FROM quads{where}", params):
+                yield (self._term(s), self._term(p), self._term(o)), iter((graph,))
+            return
+
+        # Union view: one result per distinct triple with every graph holding it
+        rows = self._rows(f"SELECT s, p, o, group_concat(g) FROM quads{where} GROUP BY s, p, o", params)
+        for s, p, o, graph_ids in rows:
+            graphs = [self._graph(self._term(int(graph_id))) for graph_id in graph_ids.split(",")]
+            yield (self._term(s), self._term(p), self._term(o)), iter(graphs)
+
+    def _rows(self, query: str, params: list) -> Iterator[tuple]:
+        """Result rows read from the cursor FETCH_ROWS at a time"""
+        cursor = self._connection().execute(query, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(FETCH_ROWS)
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            cursor.close()
+
+    def _graph(self, identifier: Any) -> Graph:
+        with self._cache_lock:
+            graph = self._graphs.get(identifier)
+            if graph is None:
+                graph = self._graphs[identifier] = Graph(store=self, identifier=identifier)
+                if len(self._graphs) > GRAPH_CACHE_SIZE:
+                    self._graphs.popitem(last=False)
+            else:
+                self._graphs.move_to_end(identifier)
+            return graph
+
+    def __len__(self, context: Any = None) -> int:
+        if context is None:
+            query, params = "SELECT n FROM counts WHERE name = 'triples'", ()
+        else:
+            graph_id = self._lookup_id(_context_id(context))
+            if graph_id is None:
+                return 0
+            query, params = "SELECT COUNT(*) FROM quads WHERE g=?", (graph_id,)
+        return self._connection().execute(query, params).fetchone()[0]
+
+    def contexts(self, triple: Optional[Tuple[Any, Any, Any]] = None) -> Iterator[Any]:
+        if triple is None or triple == (None, None, None):
+            rows = self._connection().execute("SELECT id FROM graphs").fetchall()
+        else:
+            where, params = self._where(triple, None)
+            if where is None:
+                return
+            rows = self._connection().execute(f"SELECT DISTINCT g FROM quads{where}", params).fetchall()
+        for (graph_id,) in rows:
+            yield self._term(graph_id)
+
+    # Namespaces ----------------------------------------------------------
+
+    def bind(self, prefix: str, namespace: URIRef, override: bool = True):
+        connection = self._connection()
+        bound = connection.execute(
+            "SELECT prefix, uri FROM namespaces WHERE prefix=? OR uri=?", (prefix, str(namespace))
+        ).fetchall()
+        if bound and not override:
+            return
+        connection.execute("DELETE FROM namespaces WHERE prefix=? OR uri=?", (prefix, str(namespace)))
+        connection.execute("INSERT INTO namespaces (prefix, uri) VALUES (?, ?)", (prefix, str(namespace)))
+        connection.commit()
+
+    def namespace(self, prefix: str) -> Optional[URIRef]:
+        row = self._connection().execute("SELECT uri FROM namespaces WHERE prefix=?", (prefix,)).fetchone()
+        return URIRef(row[0]) if row else None
+
+    def prefix(self, namespace: URIRef) -> Optional[str]:
+        row = self._connection().execute("SELECT prefix FROM namespaces WHERE uri=?", (str(namespace),)).fetchone()
+        return row[0] if row else None
+
+    def namespaces(self) -> Iterator[Tuple[str, URIRef]]:
+        for prefix, uri in self._connection().execute("SELECT prefix, uri FROM namespaces").fetchall():
+            yield prefix, URIRef(uri)
+
+    # Signal index marks --------------------------------------------------
+
+    def add_signal_marks(self, marks: Iterable[Tuple[Any, Any, str]]):
+        """Store (graph or None, node, entry) rows for the signal index; they leave with their graph"""
+        marks = [(_context_id(g), node, entry) for g, node, entry in marks]
+        if not marks:
+            return
+        ids = self.intern(term for g, node, _ in marks for term in (g, node) if term is not None)
+        connection = self._connection()
+        connection.executemany("INSERT OR REPLACE INTO signal_marks (g, node, entry) VALUES (?, ?, ?)",
+                               [(ids[g] if g is not None else 0, ids[node], entry) for g, node, entry in marks])
+        connection.commit()
+
+    def signal_marks(self) -> Iterator[Tuple[Any, Any, str]]:
+        """(graph identifier or None, node, entry) rows stored by add_signal_marks"""
+        rows = self._connection().execute("SELECT g, node, entry FROM signal_marks").fetchall()
+        for graph_id, node_id, entry in rows:
+            yield (self._term(graph_id) if graph_id else None), self._term(node_id), entry
+
+    # Bulk load -----------------------------------------------------------
+
+    def bulk_load(self, source: Any, format: Optional[str] = None, context: Any = None,
+                  chunk_size: int = 50_000) -> int:
+        """Load a file or graph into one context in chunks of ``chunk_size`` quads"""
+        if not isinstance(source, Graph):
+            parsed = Graph()
+            parsed.parse(source, format=format)
+            source = parsed
+        for prefix, namespace in source.namespaces():
+            self.bind(prefix, namespace, override=False)
+
+        context = _context_id(context) or URIRef("urn:x-rdflib:default")
+        loaded = 0
+        triples = iter(source.triples((None, None, None)))
+        while True:
+            chunk = [(s, p, o, context) for s, p, o in itertools.islice(triples, chunk_size)]
+            if not chunk:
+                break
+            self.addN(chunk)
+            loaded += len(chunk)
+        return loaded
+
+
+def open_ontology_store(config: Any = None) -> Optional[Store]:
+    """SQLite store at config.ontology_store_path / ONTOLOGY_STORE_PATH, else the in-memory
+    store named by ontology_storage / ONTOLOGY_STORAGE ("compact", or None for rdflib's default)"""
+    path = getattr(config, "ontology_store_path", None) or os.environ.get("ONTOLOGY_STORE_PATH")
+    if path:
+        return SQLiteStore(path, batch_size=getattr(config, "ontology_commit_batch", DEFAULT_BATCH_SIZE))
+    storage = getattr(config, "ontology_storage", None) or os.environ.get("ONTOLOGY_STORAGE", "memory")
+    if storage == "compact":
+        from compact_store import CompactStore
+        return CompactStore()
+    return None